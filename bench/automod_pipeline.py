@@ -0,0 +1,55 @@
+"""Messages per second through the compiled automod pipeline
+
+Uses the moderation section of config.yml with a random chat stream of
+ordinary messages, plus a share of messages that trip a rule so the
+verdict path is exercised too. The invite resolver is a no-op, so no
+network calls are made.
+"""
+import argparse
+import asyncio
+import os
+import random
+
+import yaml
+
+from common import ROOT, fake_message, timer
+from utils.automod import AutoModPipeline
+
+WORDS = "the quick brown fox jumps over the lazy dog hello world discord bot server channel".split()
+
+async def resolve_invite(code):
+    return None
+
+def make_stream(count: int, flagged_share: float, rng: random.Random):
+    messages = []
+    for i in range(count):
+        content = " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 30)))
+        if rng.random() < flagged_share:
+            content = rng.choice((content.upper(), content + " discord.gg/abcdef"))
+        # Enough authors that the spam rule only sees ordinary message rates
+        messages.append(fake_message(content, author_id=i % 10000, channel_id=i % 20, message_id=i))
+    return messages
+
+async def main(count: int, flagged_share: float):
+    with open(os.path.join(ROOT, "config.yml"), encoding="utf-8") as f:
+        config = yaml.safe_load(f)['moderation']
+    
+    with timer() as build:
+        pipeline = AutoModPipeline.from_config(config, resolve_invite)
+    messages = make_stream(count, flagged_share, random.Random(1))
+    
+    flagged = 0
+    with timer() as elapsed:
+        for message in messages:
+            flagged += bool(await pipeline.evaluate(message))
+    
+    print(f"{len(pipeline.rules)} rules compiled in {build.elapsed * 1000:.2f} ms")
+    print(f"{count / elapsed.elapsed:.0f} messages/s ({elapsed.elapsed / count * 1e6:.1f} us/message), "
+          f"{flagged} flagged")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--flagged-share", type=float, default=0.05)
+    args = parser.parse_args()
+    asyncio.run(main(args.messages, args.flagged_share))
@@ -0,0 +1,46 @@
+"""Shared helpers for the benchmark scripts
+
+Run the scripts from the repository root, e.g. `python bench/database_pool.py`.
+They only need the bot's own dependencies and never touch database.db.
+"""
+import os
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+def fake_message(content: str, author_id: int = 1, channel_id: int = 10, guild_id: int = 100,
+                 message_id: int = 0):
+    """A stand-in for discord.Message with the attributes automod reads"""
+    return SimpleNamespace(
+        id=message_id,
+        content=content,
+        author=SimpleNamespace(id=author_id, bot=False, display_name=f"user{author_id}", mention=f"<@{author_id}>"),
+        channel=SimpleNamespace(id=channel_id),
+        guild=SimpleNamespace(id=guild_id)
+    )
+
+@contextmanager
+def temp_database(name: str = "bench.db"):
+    """Yield a database path inside a directory removed afterwards"""
+    with tempfile.TemporaryDirectory() as directory:
+        yield os.path.join(directory, name)
+
+@contextmanager
+def timer():
+    """Measure a block; the yielded namespace's `elapsed` is set on exit, in seconds"""
+    result = SimpleNamespace(elapsed=0.0)
+    start = time.perf_counter()
+    try:
+        yield result
+    finally:
+        result.elapsed = time.perf_counter() - start
+
+def percentile(samples, fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
@@ -0,0 +1,63 @@
+"""History lookups while message deletes are being logged, rollback journal vs. WAL
+
+A writer task logs message deletes back to back (as during a purge) while
+several readers run /history-sized queries. In rollback-journal mode the
+readers wait for each write transaction; in WAL mode they read the last
+committed snapshot instead.
+"""
+import argparse
+import asyncio
+import time
+
+from common import percentile, temp_database, timer
+from utils.database import DatabaseManager
+
+PROFILES = {
+    "rollback journal": {'journal_mode': 'delete', 'synchronous': 'full'},
+    "wal": {'journal_mode': 'wal', 'synchronous': 'normal'},
+}
+
+async def run(storage: dict, readers: int, queries: int):
+    with temp_database() as path:
+        db = DatabaseManager(path, durability="immediate", storage=storage)
+        await db.initialize()
+        try:
+            await asyncio.gather(*(db.log_mod_action(1, i % 50, 9, "warn", "r" * 50) for i in range(3000)))
+            
+            stop = asyncio.Event()
+            latencies = []
+            
+            async def writer():
+                writes = 0
+                while not stop.is_set():
+                    await db.log_message_action(1, 2, writes, 3, "delete", "x" * 100)
+                    writes += 1
+                return writes
+            
+            async def reader():
+                for i in range(queries):
+                    start = time.perf_counter()
+                    await db.get_user_history(1, i % 50, 25)
+                    latencies.append(time.perf_counter() - start)
+            
+            writer_task = asyncio.create_task(writer())
+            with timer() as elapsed:
+                await asyncio.gather(*(reader() for _ in range(readers)))
+            stop.set()
+            writes = await writer_task
+        finally:
+            await db.close()
+    return latencies, writes / elapsed.elapsed
+
+async def main(readers: int, queries: int):
+    for label, storage in PROFILES.items():
+        latencies, write_rate = await run(storage, readers, queries)
+        print(f"{label:>16}: reads p50 {percentile(latencies, 0.5) * 1000:.2f} ms, "
+              f"p99 {percentile(latencies, 0.99) * 1000:.2f} ms, {write_rate:.0f} writes/s during reads")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--queries", type=int, default=300, help="queries per reader")
+    args = parser.parse_args()
+    asyncio.run(main(args.readers, args.queries))
@@ -0,0 +1,70 @@
+"""Per-call latency of DatabaseManager with pooled connections vs. a connection per call
+
+The connection-per-call side reproduces what every DatabaseManager method
+did before the pool: open aiosqlite (a new thread plus schema parse), run
+one statement, commit and close.
+"""
+import argparse
+import asyncio
+
+import aiosqlite
+
+from common import temp_database, timer
+from utils.database import DatabaseManager
+
+INSERT_MESSAGE_LOG = """INSERT INTO message_logs
+    (guild_id, channel_id, message_id, user_id, content, action_type, additional_data)
+    VALUES (?, ?, ?, ?, ?, ?, ?)"""
+
+SELECT_HISTORY = "SELECT * FROM mod_history WHERE guild_id = ? AND user_id = ? ORDER BY timestamp DESC LIMIT ?"
+
+async def connection_per_call(path: str, calls: int):
+    async def write(message_id):
+        async with aiosqlite.connect(path) as db:
+            await db.execute(INSERT_MESSAGE_LOG, (1, 2, message_id, 3, "hello", "delete", None))
+            await db.commit()
+    
+    async def read(user_id):
+        async with aiosqlite.connect(path) as db:
+            db.row_factory = aiosqlite.Row
+            cursor = await db.execute(SELECT_HISTORY, (1, user_id, 25))
+            return [dict(row) for row in await cursor.fetchall()]
+    
+    with timer() as writes:
+        for i in range(calls):
+            await write(i)
+    with timer() as reads:
+        for i in range(calls):
+            await read(i % 50)
+    return writes.elapsed, reads.elapsed
+
+async def pooled(path: str, calls: int):
+    db = DatabaseManager(path, durability="immediate")
+    await db.initialize()
+    try:
+        with timer() as writes:
+            for i in range(calls):
+                await db.log_message_action(1, 2, i, 3, "delete", "hello")
+        with timer() as reads:
+            for i in range(calls):
+                await db.get_user_history(1, i % 50, 25)
+    finally:
+        await db.close()
+    return writes.elapsed, reads.elapsed
+
+async def main(calls: int):
+    for label, run in (("connection per call", connection_per_call), ("pooled", pooled)):
+        with temp_database() as path:
+            # Same schema and journal mode for both sides
+            schema = DatabaseManager(path)
+            await schema.initialize()
+            await schema.close()
+            
+            write_time, read_time = await run(path, calls)
+        print(f"{label:>20}: write {write_time / calls * 1e6:7.0f} us/call, "
+              f"read {read_time / calls * 1e6:7.0f} us/call")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=500)
+    asyncio.run(main(parser.parse_args().calls))
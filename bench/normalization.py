@@ -0,0 +1,79 @@
+"""Per-message cost of the normalized views automod rules share
+
+Builds a fresh MessageContext per message and reads its folded and
+normalized views and invite code, as the pipeline does once per message.
+Fails when the mean cost of any corpus other than the long worst case goes
+over the per-message budget.
+"""
+import argparse
+import random
+import string
+import sys
+import time
+
+from common import fake_message, percentile
+from utils.automod import MessageContext
+
+# Cyrillic lookalikes
+HOMOGLYPHS = {"a": "а", "e": "е", "o": "о", "p": "р", "c": "с", "x": "х", "i": "і"}
+ZERO_WIDTH = "\u200b\u200c\u200d\u2060"
+LEET = {"a": "4", "e": "3", "i": "1", "o": "0", "s": "$", "t": "7"}
+
+def plain(rng: random.Random) -> str:
+    words = ("".join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 9))) for _ in range(rng.randint(10, 25)))
+    return " ".join(words).capitalize() + "."
+
+def obfuscated(rng: random.Random) -> str:
+    chars = []
+    for char in plain(rng):
+        roll = rng.random()
+        if roll < 0.15 and char in HOMOGLYPHS:
+            char = HOMOGLYPHS[char]
+        elif roll < 0.25 and char in LEET:
+            char = LEET[char]
+        elif roll < 0.3:
+            char += rng.choice(ZERO_WIDTH)
+        elif roll < 0.33:
+            char *= 4
+        chars.append(char)
+    return "".join(chars) + " join discord . gg / abcdef"
+
+def worst_case(rng: random.Random) -> str:
+    return (obfuscated(rng) * 20)[:2000]
+
+CORPORA = {"plain ascii": plain, "obfuscated": obfuscated, "2000 chars": worst_case}
+
+def measure(messages):
+    samples = []
+    for message in messages:
+        start = time.perf_counter()
+        ctx = MessageContext(message)
+        ctx.folded
+        ctx.normalized
+        ctx.invite_code
+        samples.append(time.perf_counter() - start)
+    return samples
+
+def main(count: int, budget_us: float) -> int:
+    rng = random.Random(1)
+    over_budget = False
+    for label, generate in CORPORA.items():
+        messages = [fake_message(generate(rng), message_id=i) for i in range(count)]
+        samples = measure(messages)
+        mean = sum(samples) / len(samples) * 1e6
+        p99 = percentile(samples, 0.99) * 1e6
+        print(f"{label:>12}: mean {mean:6.1f} us, p99 {p99:6.1f} us per message")
+        if generate is not worst_case and mean > budget_us:
+            over_budget = True
+    
+    if over_budget:
+        print(f"over the {budget_us:.0f} us per-message budget")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=5000)
+    parser.add_argument("--budget-us", type=float, default=100.0)
+    args = parser.parse_args()
+    sys.exit(main(args.messages, args.budget_us))
@@ -0,0 +1,100 @@
+"""Permission checks per second for members with many roles
+
+Compares PermissionManager.is_helper, the check automod runs for every
+message, with a cold cache (level computed from the compiled role map) and
+a warm one, against the old chain: is_helper -> is_moderator -> is_admin ->
+is_owner, each re-reading the config and scanning the member's roles
+against Python lists.
+"""
+import argparse
+import random
+from types import SimpleNamespace
+
+from common import timer
+from utils.permissions import PermissionManager
+
+def old_is_helper(config, member) -> bool:
+    """The pre-compiled chain, minus the bot.is_owner fallback"""
+    def is_owner(user):
+        return user.id in config.get('bot', {}).get('owners', [])
+    
+    def is_admin(member):
+        if is_owner(member) or member.guild_permissions.administrator:
+            return True
+        admin_roles = config.get('permissions', {}).get('admin_roles', [])
+        return any(role.id in admin_roles for role in member.roles)
+    
+    def is_moderator(member):
+        if is_admin(member):
+            return True
+        moderator_roles = config.get('permissions', {}).get('moderator_roles', [])
+        return any(role.id in moderator_roles for role in member.roles)
+    
+    if is_moderator(member):
+        return True
+    helper_roles = config.get('permissions', {}).get('helper_roles', [])
+    return any(role.id in helper_roles for role in member.roles)
+
+def make_members(rng: random.Random, count: int, roles_per_member: int, ordinary_roles: list,
+                 staff_roles: list, staff_share: float):
+    guild = SimpleNamespace(id=1)
+    not_admin = SimpleNamespace(administrator=False)
+    members = []
+    for i in range(count):
+        role_ids = rng.sample(ordinary_roles, roles_per_member)
+        if rng.random() < staff_share:
+            role_ids[-1] = rng.choice(staff_roles)
+        members.append(SimpleNamespace(id=i, guild=guild, guild_permissions=not_admin,
+                                       roles=[SimpleNamespace(id=role_id) for role_id in role_ids]))
+    return members
+
+def main(members: int, roles: int, staff_roles: int, staff_share: float, checks: int):
+    rng = random.Random(1)
+    guild_roles = [10 ** 17 + i for i in range(roles * 4 + 3 * staff_roles)]
+    staff = guild_roles[:3 * staff_roles]
+    config = {
+        'bot': {'owners': [42]},
+        'permissions': {
+            'admin_roles': staff[:staff_roles],
+            'moderator_roles': staff[staff_roles:2 * staff_roles],
+            'helper_roles': staff[2 * staff_roles:],
+        },
+    }
+    bot = SimpleNamespace(config=config, owner_id=None, owner_ids=None)
+    manager = PermissionManager(bot)
+    
+    population = make_members(rng, members, roles, guild_roles[len(staff):], staff, staff_share)
+    stream = [population[rng.randrange(members)] for _ in range(checks)]
+    
+    expected = [old_is_helper(config, member) for member in population]
+    assert [manager.is_helper(member) for member in population] == expected, "levels disagree"
+    print(f"{members} members with {roles} roles, {sum(expected)} of them staff")
+    
+    with timer() as old:
+        for member in stream:
+            old_is_helper(config, member)
+    
+    with timer() as cold:
+        for member in stream:
+            manager.invalidate_all()
+            manager.is_helper(member)
+    
+    manager.invalidate_all()
+    for member in population:
+        manager.is_helper(member)
+    with timer() as warm:
+        for member in stream:
+            manager.is_helper(member)
+    
+    for label, elapsed in (("old chain", old), ("cold cache", cold), ("warm cache", warm)):
+        print(f"{label:>10}: {checks / elapsed.elapsed:12,.0f} checks/s")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--members", type=int, default=10000)
+    parser.add_argument("--roles", type=int, default=50, help="roles per member")
+    parser.add_argument("--staff-roles", type=int, default=10, help="roles configured per staff level")
+    parser.add_argument("--staff-share", type=float, default=0.02, help="share of members holding a staff role")
+    parser.add_argument("--checks", type=int, default=200000)
+    args = parser.parse_args()
+    main(args.members, args.roles, args.staff_roles, args.staff_share, args.checks)
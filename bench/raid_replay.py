@@ -0,0 +1,86 @@
+"""Synthetic raid replay through RaidFingerprintIndex
+
+Ordinary chatter from a few thousand users across 30 channels, sprinkled
+with common greetings several members post at once, is mixed with a raid:
+bot accounts posting one payload (with a random mention each) across 20
+channels. Thresholds come from moderation.raid in config.yml unless
+overridden. Reports detection delay, raid accounts caught, ordinary
+messages flagged and the cost per message. Ordinary messages flagged are
+mostly the greetings; lower thresholds or more greetings flag more of them.
+"""
+import argparse
+import os
+import random
+
+import yaml
+
+from common import ROOT, fake_message, timer
+from cogs.automod import RaidFingerprintIndex
+from utils.automod import MessageContext
+
+RAID_AUTHOR_BASE = 10 ** 6
+GREETINGS = ("good morning everyone!", "happy birthday!!", "welcome to the server", "gg well played everyone")
+
+def make_stream(rng: random.Random, messages: int, raiders: int, raid_start: float, greeting_share: float):
+    words = ["".join(rng.choices("abcdefghijklmnopqrstuvwxyz", k=rng.randint(3, 8))) for _ in range(3000)]
+    stream = []
+    for i in range(messages):
+        if rng.random() < greeting_share:
+            content = rng.choice(GREETINGS)
+        else:
+            content = " ".join(rng.choices(words, k=8))
+        stream.append((i * 0.05, fake_message(content, author_id=rng.randint(1, 2000),
+                                               channel_id=rng.randint(1, 30), message_id=i)))
+    
+    for bot in range(raiders):
+        content = f"<@{rng.randint(10 ** 17, 10 ** 18)}> FREE N1TRO >> discord.gg/abcdef claim now"
+        stream.append((raid_start + bot * 0.2, fake_message(content, author_id=RAID_AUTHOR_BASE + bot,
+                                                            channel_id=100 + bot % 20,
+                                                            message_id=RAID_AUTHOR_BASE + bot)))
+    stream.sort(key=lambda item: item[0])
+    return stream
+
+def main(args):
+    with open(os.path.join(ROOT, "config.yml"), encoding="utf-8") as f:
+        config = yaml.safe_load(f)['moderation']['raid']
+    accounts = args.accounts or config.get('accounts', 4)
+    channels = args.channels or config.get('channels', 3)
+    window = config.get('window', 30)
+    min_length = config.get('min_length', 10)
+    
+    stream = make_stream(random.Random(2), args.messages, args.raiders, args.raid_start, args.greeting_share)
+    index = RaidFingerprintIndex(accounts, channels, window, config.get('max_fingerprints', 5000))
+    
+    caught = set()
+    false_positives = 0
+    first_detection = None
+    with timer() as elapsed:
+        for now, message in stream:
+            ctx = MessageContext(message)
+            if len(ctx.payload) < max(1, min_length):
+                continue
+            for _, author_id, _, message_id in index.add(ctx.guild_id, ctx.fingerprint, ctx.author_id,
+                                                          ctx.channel_id, message.id, now):
+                if author_id >= RAID_AUTHOR_BASE:
+                    caught.add(author_id)
+                    if first_detection is None:
+                        first_detection = now
+                else:
+                    false_positives += 1
+    
+    delay = f"{first_detection - args.raid_start:.1f}s after it began" if first_detection is not None else "never"
+    print(f"thresholds: {accounts} accounts or {channels} channels within {window}s")
+    print(f"{len(stream)} messages, {elapsed.elapsed / len(stream) * 1e6:.1f} us/message")
+    print(f"raid detected {delay}; {len(caught)}/{args.raiders} raid accounts caught, "
+          f"{false_positives} ordinary messages flagged")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--raiders", type=int, default=60)
+    parser.add_argument("--raid-start", type=float, default=500.0, help="seconds into the replay")
+    parser.add_argument("--greeting-share", type=float, default=0.02,
+                        help="share of chatter that is a common greeting many members post")
+    parser.add_argument("--accounts", type=int, help="override moderation.raid.accounts")
+    parser.add_argument("--channels", type=int, help="override moderation.raid.channels")
+    main(parser.parse_args())
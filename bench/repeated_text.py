@@ -0,0 +1,79 @@
+"""Repeated-text detection: MinHash signatures vs. calculate_text_similarity
+
+Accuracy is measured on pairs of near-duplicates (shifted by a prefix, one
+character changed, or one word appended) and pairs of unrelated messages.
+Throughput compares one NearDuplicateIndex over a 200-message window with
+the old pairwise comparison over its 5-message window and over the same
+200 messages.
+"""
+import argparse
+import random
+import string
+from collections import deque
+
+from common import timer
+from utils.automod import NearDuplicateIndex
+from utils.helpers import calculate_text_similarity
+from utils.text import minhash_signature, normalize_text, signature_similarity
+
+THRESHOLD = 0.8
+
+def make_corpus(rng: random.Random):
+    words = ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 8))) for _ in range(3000)]
+    
+    def sentence():
+        return " ".join(rng.choices(words, k=rng.randint(5, 15)))
+    
+    def mutate(text):
+        roll = rng.random()
+        if roll < 1 / 3:
+            return rng.choice(("hey ", "lol ", ">> ", "guys ")) + text
+        if roll < 2 / 3:
+            chars = list(text)
+            chars[rng.randrange(len(chars))] = rng.choice(string.ascii_lowercase)
+            return "".join(chars)
+        return text + " " + rng.choice(words)
+    
+    return sentence, mutate
+
+def old_match(first: str, second: str) -> bool:
+    return calculate_text_similarity(normalize_text(first), normalize_text(second)) >= THRESHOLD
+
+def new_match(first: str, second: str) -> bool:
+    return signature_similarity(
+        minhash_signature(normalize_text(first)), minhash_signature(normalize_text(second))
+    ) >= THRESHOLD
+
+def main(pairs: int, messages: int, window: int):
+    sentence, mutate = make_corpus(random.Random(1))
+    duplicates = [(text, mutate(text)) for text in (sentence() for _ in range(pairs))]
+    unrelated = [(sentence(), sentence()) for _ in range(pairs)]
+    
+    for label, match in (("old", old_match), ("minhash", new_match)):
+        recall = sum(match(a, b) for a, b in duplicates) / pairs
+        false_positives = sum(match(a, b) for a, b in unrelated) / pairs
+        print(f"{label:>8} accuracy: recall {recall:.3f}, false positive rate {false_positives:.3f}")
+    
+    stream = [normalize_text(sentence()) for _ in range(messages)]
+    
+    index = NearDuplicateIndex(window, 3600)
+    with timer() as elapsed:
+        for now, text in enumerate(stream):
+            index.add(minhash_signature(text), THRESHOLD, float(now))
+    print(f"minhash window={window}: {elapsed.elapsed / messages * 1e6:7.1f} us/message")
+    
+    for size in (5, window):
+        recent = deque(maxlen=size)
+        with timer() as elapsed:
+            for text in stream:
+                any(calculate_text_similarity(text, previous) >= THRESHOLD for previous in recent)
+                recent.append(text)
+        print(f"    old window={size}: {elapsed.elapsed / messages * 1e6:7.1f} us/message")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pairs", type=int, default=1000)
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--window", type=int, default=200)
+    args = parser.parse_args()
+    main(args.pairs, args.messages, args.window)
@@ -0,0 +1,75 @@
+"""Memory and speed of spam tracking for many distinct users
+
+Compares SlidingWindowCounter, keyed by (guild, user), with the
+defaultdict of deques of datetimes that check_spam kept per user ID
+before. Every user sends a few messages, then the sweeper runs once the
+window has passed. The old structure had no eviction, so whatever it
+holds after the run it keeps for good.
+"""
+import argparse
+import random
+import tracemalloc
+from collections import defaultdict, deque
+from datetime import datetime, timedelta
+
+from common import timer
+from utils.automod import SlidingWindowCounter
+
+MAX_MESSAGES = 5
+WINDOW = 10
+
+def old_check(user_messages, user_id: int) -> bool:
+    now = datetime.now()
+    user_messages[user_id].append(now)
+    time_window = timedelta(seconds=WINDOW)
+    recent_messages = [t for t in user_messages[user_id] if now - t <= time_window]
+    return len(recent_messages) >= MAX_MESSAGES
+
+def events(users: int, per_user: int, guilds: int):
+    rng = random.Random(1)
+    return [(rng.randrange(guilds), user_id) for _ in range(per_user) for user_id in range(users)]
+
+def measure(label: str, make, stream):
+    """Time a run over the stream, then repeat it under tracemalloc for the memory held"""
+    structure, record = make()
+    with timer() as elapsed:
+        for guild_id, user_id in stream:
+            record(guild_id, user_id)
+    del structure, record
+    
+    tracemalloc.start()
+    structure, record = make()
+    for guild_id, user_id in stream:
+        record(guild_id, user_id)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(f"{label:>16}: {elapsed.elapsed / len(stream) * 1e6:5.2f} us/message, "
+          f"{size / 2 ** 20:6.1f} MiB for {len(structure)} keys")
+    return structure
+
+def main(users: int, per_user: int, guilds: int):
+    stream = events(users, per_user, guilds)
+    
+    def old_deques():
+        user_messages = defaultdict(lambda: deque(maxlen=10))
+        return user_messages, lambda guild_id, user_id: old_check(user_messages, user_id)
+    
+    def ring_buffers():
+        counter = SlidingWindowCounter(MAX_MESSAGES, WINDOW)
+        # A fixed clock keeps every user inside one window; the sweep below moves past it
+        return counter, lambda guild_id, user_id: counter.hit((guild_id, user_id), 0.0)
+    
+    measure("old deques", old_deques, stream)
+    counter = measure("ring buffers", ring_buffers, stream)
+    
+    with timer() as sweep:
+        removed = counter.sweep(now=WINDOW + 1.0)
+    print(f"{'sweep':>16}: evicted {removed} idle keys in {sweep.elapsed * 1000:.0f} ms, {len(counter)} left")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--messages-per-user", type=int, default=3)
+    parser.add_argument("--guilds", type=int, default=1)
+    args = parser.parse_args()
+    main(args.users, args.messages_per_user, args.guilds)
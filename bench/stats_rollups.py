@@ -0,0 +1,130 @@
+"""Statistics rollups over a large synthetic moderation history (10M rows by default)
+
+Builds a database as it looked before the rollup tables existed (schema
+version 2) and fills mod_history and automod_violations with rows spread
+over 60 days. Then it times the migrations that backfill the counters,
+compacts old hours into daily rollups, and times the /modstats and /stats
+queries against the raw scans they replace, checking both agree. Finally
+it measures log writes with the counter upserts in the write path.
+
+Needs roughly 150 bytes of disk per row in the temporary directory
+(TMPDIR).
+"""
+import argparse
+import asyncio
+import random
+import sqlite3
+import time
+
+from common import temp_database, timer
+from utils.database import DatabaseManager
+
+ACTIONS = ("ban", "kick", "warn", "timeout", "tempban", "unban", "purge")
+VIOLATIONS = ("Spam", "Bad Words", "Invite Links", "Repeated Text", "Excessive Caps", "Raid")
+CHUNK = 500_000
+DAYS = 60
+
+def build_history(path: str, rows: int, guilds: int, now: int):
+    """Create a version 2 database holding `rows` log rows, without statistics tables"""
+    connection = sqlite3.connect(path)
+    connection.execute("PRAGMA synchronous = OFF")
+    for table in ("stat_counters", "stat_buckets", "stat_days"):
+        connection.execute(f"DROP TABLE {table}")
+    connection.execute("PRAGMA user_version = 2")
+    
+    rng = random.Random(1)
+    
+    def timestamp():
+        return time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(now - rng.randint(0, DAYS * 86400)))
+    
+    for start in range(0, rows // 2, CHUNK):
+        size = min(CHUNK, rows // 2 - start)
+        connection.executemany(
+            "INSERT INTO mod_history (guild_id, user_id, moderator_id, action_type, reason, timestamp) "
+            "VALUES (?, ?, ?, ?, 'r', ?)",
+            [(rng.randint(1, guilds), rng.randint(1, 10 ** 6), rng.randint(1, 40), rng.choice(ACTIONS), timestamp())
+             for _ in range(size)]
+        )
+        connection.executemany(
+            "INSERT INTO automod_violations (guild_id, user_id, violation_type, content, channel_id, timestamp) "
+            "VALUES (?, ?, ?, 'x', 1, ?)",
+            [(rng.randint(1, guilds), rng.randint(1, 10 ** 6), rng.choice(VIOLATIONS), timestamp())
+             for _ in range(size)]
+        )
+        connection.commit()
+    return connection
+
+async def timed(label: str, call, repeat: int = 50):
+    with timer() as elapsed:
+        for _ in range(repeat):
+            result = await call()
+    print(f"{label:>32}: {elapsed.elapsed / repeat * 1000:8.2f} ms")
+    return result
+
+async def main(rows: int, guilds: int, writes: int):
+    now = int(time.time())
+    with temp_database() as path:
+        schema = DatabaseManager(path)
+        await schema.initialize()
+        await schema.close()
+        
+        with timer() as build:
+            connection = build_history(path, rows, guilds, now)
+        print(f"generated {rows:,} rows in {build.elapsed:.0f}s")
+        
+        db = DatabaseManager(path)
+        with timer() as migrate:
+            await db.initialize()
+        print(f"backfill (migrations 3-4): {migrate.elapsed:.1f}s")
+        try:
+            with timer() as compact:
+                folded = await db.compact_stat_buckets(7 * 24)
+            hourly = connection.execute("SELECT COUNT(*) FROM stat_buckets").fetchone()[0]
+            daily = connection.execute("SELECT COUNT(*) FROM stat_days").fetchone()[0]
+            print(f"compaction: folded {folded:,} hourly rows in {compact.elapsed:.1f}s, "
+                  f"{hourly:,} hourly and {daily:,} daily rows left")
+            
+            guild_id = 1
+            await timed("/modstats 24h timeline", lambda: db.get_stat_series(guild_id, "mod_action", 24))
+            await timed("/modstats 7d daily timeline",
+                        lambda: db.get_stat_series(guild_id, "automod", 168, granularity="day"))
+            per_moderator = await timed("/modstats 30d per moderator",
+                                        lambda: db.get_stat_counts(guild_id, "moderator", 720))
+            recent_automod = await timed("/modstats 24h per violation",
+                                         lambda: db.get_stat_counts(guild_id, "automod", 24))
+            await timed("/stats overview", lambda: db.get_guild_stats(guild_id))
+            
+            # The 30-day window reaches past hourly retention, so it starts at the beginning of its first day
+            start_day = (now // 3600 - 720 + 1) // 24
+            with timer() as scan:
+                raw = dict(connection.execute(
+                    "SELECT CAST(moderator_id AS TEXT), COUNT(*) FROM mod_history "
+                    "WHERE guild_id = ? AND CAST(strftime('%s', timestamp) AS INTEGER) / 86400 >= ? GROUP BY 1",
+                    (guild_id, start_day)
+                ).fetchall())
+            print(f"{'raw scan 30d per moderator':>32}: {scan.elapsed * 1000:8.2f} ms")
+            assert raw == per_moderator, "rollups disagree with mod_history"
+            
+            raw_recent = dict(connection.execute(
+                "SELECT violation_type, COUNT(*) FROM automod_violations "
+                "WHERE guild_id = ? AND CAST(strftime('%s', timestamp) AS INTEGER) / 3600 > ? GROUP BY 1",
+                (guild_id, now // 3600 - 24)
+            ).fetchall())
+            assert raw_recent == recent_automod, "rollups disagree with automod_violations"
+            
+            with timer() as elapsed:
+                for i in range(writes):
+                    await db.log_mod_action(guild_id, i, 3, "warn", "r")
+                await db.flush()
+            print(f"{'log_mod_action with counters':>32}: {writes / elapsed.elapsed:8,.0f} writes/s (batched)")
+        finally:
+            await db.close()
+            connection.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--guilds", type=int, default=20)
+    parser.add_argument("--writes", type=int, default=20000)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.guilds, args.writes))
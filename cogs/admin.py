@@ -3,8 +3,9 @@ from discord.ext import commands
 from discord import app_commands
 from typing import Optional, Literal
 import yaml
+from collections import Counter
 import logging
-from datetime import datetime, timedelta
+from datetime import datetime
 import asyncio
 from utils.helpers import create_embed, create_error_embed, create_success_embed, load_config, load_messages
 from utils.permissions import has_permissions, can_use_command
@@ -25,13 +26,18 @@ class AdminCog(commands.Cog, name="Administration"):
         setup_results = []
         
         try:
-            # Initialize guild in database
-            await self.bot.db.setup_guild(guild.id)
+            # Initialize guild in database, keeping any existing settings
+            settings = await self.bot.db.get_guild_settings(guild.id)
+            await self.bot.db.setup_guild(guild.id, settings)
             setup_results.append("✅ Database initialized")
             
             # Create mod-logs channel if it doesn't exist
-            log_channel_name = self.bot.config['moderation']['log_channel_name']
-            log_channel = discord.utils.get(guild.text_channels, name=log_channel_name)
+            log_channel_name = self.bot.guild_config.get(guild.id)['moderation']['log_channel_name']
+            logging_cog = self.bot.get_cog("Logging")
+            if logging_cog is not None:
+                log_channel = logging_cog.get_log_channel(guild)
+            else:
+                log_channel = discord.utils.get(guild.text_channels, name=log_channel_name)
             
             if not log_channel:
                 # Create the channel
@@ -60,7 +66,10 @@ class AdminCog(commands.Cog, name="Administration"):
                 )
                 setup_results.append(f"✅ Created #{log_channel_name} channel")
             else:
-                setup_results.append(f"✅ Found existing #{log_channel_name} channel")
+                setup_results.append(f"✅ Found existing #{log_channel.name} channel")
+            
+            # Remember the channel by ID so renaming it doesn't break logging
+            await self.bot.guild_config.update(guild.id, {'log_channel_id': log_channel.id})
             
             # Send welcome message to log channel
             embed = discord.Embed(
@@ -198,7 +207,7 @@ class AdminCog(commands.Cog, name="Administration"):
             timestamp=datetime.utcnow()
         )
         
-        automod_config = self.bot.config.get('moderation', {})
+        automod_config = self.bot.guild_config.get(interaction.guild.id).get('moderation', {})
         
         # Spam detection
         spam_config = automod_config.get('spam', {})
@@ -244,7 +253,7 @@ class AdminCog(commands.Cog, name="Administration"):
             inline=True
         )
         
-        embed.set_footer(text="Auto-moderation settings are configured in config.yml")
+        embed.set_footer(text="Auto-moderation settings come from config.yml and this server's overrides")
         
         await interaction.followup.send(embed=embed, ephemeral=True)
     
@@ -256,7 +265,7 @@ class AdminCog(commands.Cog, name="Administration"):
             timestamp=datetime.utcnow()
         )
         
-        logging_config = self.bot.config.get('logging', {})
+        logging_config = self.bot.guild_config.get(interaction.guild.id).get('logging', {})
         events_config = logging_config.get('events', {})
         
         embed.add_field(
@@ -268,6 +277,7 @@ class AdminCog(commands.Cog, name="Administration"):
         # Message events
         message_events = [
             ('Message Delete', events_config.get('message_delete', True)),
+            ('Bulk Delete', events_config.get('message_bulk_delete', True)),
             ('Message Edit', events_config.get('message_edit', True))
         ]
         
@@ -306,8 +316,12 @@ class AdminCog(commands.Cog, name="Administration"):
         )
         
         # Log channel
-        log_channel_name = self.bot.config['moderation']['log_channel_name']
-        log_channel = discord.utils.get(interaction.guild.text_channels, name=log_channel_name)
+        log_channel_name = self.bot.guild_config.get(interaction.guild.id)['moderation']['log_channel_name']
+        logging_cog = self.bot.get_cog("Logging")
+        if logging_cog is not None:
+            log_channel = logging_cog.get_log_channel(interaction.guild)
+        else:
+            log_channel = discord.utils.get(interaction.guild.text_channels, name=log_channel_name)
         
         embed.add_field(
             name="Log Channel",
@@ -315,7 +329,15 @@ class AdminCog(commands.Cog, name="Administration"):
             inline=False
         )
         
-        embed.set_footer(text="Logging settings are configured in config.yml")
+        if logging_cog is not None and log_channel:
+            queue = logging_cog.dispatcher.channel_stats(log_channel.id)
+            embed.add_field(
+                name="Log Queue",
+                value=f"**Pending:** {queue['depth']}\n**Lag:** {queue['lag']:.1f}s (last batch {queue['last_lag']:.1f}s)\n**Spilled:** {queue['spilled']}",
+                inline=False
+            )
+        
+        embed.set_footer(text="Logging settings come from config.yml and this server's overrides")
         
         await interaction.followup.send(embed=embed, ephemeral=True)
     
@@ -327,8 +349,9 @@ class AdminCog(commands.Cog, name="Administration"):
             timestamp=datetime.utcnow()
         )
         
-        bot_config = self.bot.config.get('bot', {})
-        mod_config = self.bot.config.get('moderation', {})
+        guild_config = self.bot.guild_config.get(interaction.guild.id)
+        bot_config = guild_config.get('bot', {})
+        mod_config = guild_config.get('moderation', {})
         
         embed.add_field(
             name="Bot Settings",
@@ -353,7 +376,7 @@ class AdminCog(commands.Cog, name="Administration"):
             inline=True
         )
         
-        embed.set_footer(text="General settings are configured in config.yml")
+        embed.set_footer(text="General settings come from config.yml and this server's overrides")
         
         await interaction.followup.send(embed=embed, ephemeral=True)
     
@@ -441,6 +464,9 @@ class AdminCog(commands.Cog, name="Administration"):
             self.bot.config = load_config()
             self.bot.messages = load_messages()
             
+            # Let cogs rebuild anything compiled from the old configuration
+            self.bot.dispatch('config_reload')
+            
             embed = create_success_embed(
                 "Configuration reloaded successfully!"
             )
@@ -494,29 +520,56 @@ class AdminCog(commands.Cog, name="Administration"):
                 inline=True
             )
             
-            # Database stats (simplified, as we'd need to add these methods to DatabaseManager)
+            # Database info
             embed.add_field(
                 name="Database",
-                value="**Status:** Connected\n"
-                      "**Tables:** 7\n"
-                      "**Auto-backup:** Enabled",
+                value=f"**Status:** Connected\n"
+                      f"**Durability:** {self.bot.db.durability.title()}\n"
+                      f"**Reader Connections:** {self.bot.db.pool_size}",
                 inline=True
             )
             
-            # Recent activity summary
-            now = datetime.now()
-            day_ago = now - timedelta(days=1)
+            # Activity comes from counters maintained on every write, so this never scans the log tables
+            stats = await self.bot.db.get_guild_stats(guild.id, hours=24)
             
-            # Get recent mod actions count
-            recent_history = await self.bot.db.get_user_history(guild.id, 0, 1000)  # Get all recent
-            recent_actions = [h for h in recent_history if datetime.fromisoformat(h['timestamp'].replace('Z', '+00:00')) > day_ago]
+            def total(metric: str, window: str) -> int:
+                return sum(stats[metric][window].values())
             
             embed.add_field(
                 name="Recent Activity (24h)",
-                value=f"**Mod Actions:** {len(recent_actions)}\n"
-                      "**Auto-mod Violations:** N/A\n"  # Would need to implement this query
-                      "**Messages Logged:** N/A",  # Would need to implement this query
-                inline=False
+                value=f"**Mod Actions:** {total('mod_action', 'recent')}\n"
+                      f"**Auto-mod Violations:** {total('automod', 'recent')}\n"
+                      f"**Messages Logged:** {total('message_log', 'recent')}",
+                inline=True
+            )
+            
+            embed.add_field(
+                name="All Time",
+                value=f"**Mod Actions:** {total('mod_action', 'total')}\n"
+                      f"**Auto-mod Violations:** {total('automod', 'total')}\n"
+                      f"**Messages Logged:** {total('message_log', 'total')}",
+                inline=True
+            )
+            
+            top_actions = Counter(stats['mod_action']['total']).most_common(5)
+            embed.add_field(
+                name="Top Actions",
+                value="\n".join(f"**{action.title()}:** {count}" for action, count in top_actions) or "None",
+                inline=True
+            )
+            
+            top_moderators = Counter(stats['moderator']['total']).most_common(5)
+            embed.add_field(
+                name="Top Moderators",
+                value="\n".join(f"<@{moderator_id}>: {count}" for moderator_id, count in top_moderators) or "None",
+                inline=True
+            )
+            
+            top_violations = Counter(stats['automod']['total']).most_common(5)
+            embed.add_field(
+                name="Top Violations",
+                value="\n".join(f"**{violation}:** {count}" for violation, count in top_violations) or "None",
+                inline=True
             )
             
             embed.set_thumbnail(url=self.bot.user.display_avatar.url)
@@ -1,24 +1,347 @@
+import asyncio
 import discord
-from discord.ext import commands
-import re
+from discord.ext import commands, tasks
+from collections import Counter, OrderedDict, deque
 from datetime import datetime, timedelta
-from collections import defaultdict, deque
 import logging
-from utils.helpers import calculate_caps_ratio, calculate_text_similarity, extract_invite_code
+import time
+from typing import Dict, List, Optional, Tuple
+from utils.automod import AutoModPipeline, MessageContext, Verdict
+from utils.cache import AsyncTTLCache
 from utils.permissions import PermissionManager
+from utils.scheduler import GroupedExecutor
 
 logger = logging.getLogger(__name__)
 
+# Channel warning used when messages.yml has no string for a rule
+DEFAULT_WARNING = "⚠️ **{user}**, your message broke this server's rules."
+
+class RaidPayload:
+    """Recent sightings of one content fingerprint within a guild"""
+    
+    __slots__ = ("entries", "authors", "channels", "flagged_until")
+    
+    def __init__(self):
+        self.entries = deque()  # (timestamp, author_id, channel_id, message_id), oldest first
+        self.authors = Counter()
+        self.channels = Counter()
+        self.flagged_until = float('-inf')
+    
+    @property
+    def last_seen(self) -> float:
+        newest = self.entries[-1][0] if self.entries else float('-inf')
+        return max(newest, self.flagged_until)
+    
+    def expire(self, cutoff: float):
+        while self.entries and self.entries[0][0] < cutoff:
+            _, author_id, channel_id, _ = self.entries.popleft()
+            self.authors[author_id] -= 1
+            if not self.authors[author_id]:
+                del self.authors[author_id]
+            self.channels[channel_id] -= 1
+            if not self.channels[channel_id]:
+                del self.channels[channel_id]
+
+class RaidFingerprintIndex:
+    """Guild-wide index of recent message fingerprints for cross-channel raid detection
+    
+    A payload is flagged once it is posted by `accounts` distinct accounts or in
+    `channels` distinct channels within `window` seconds. Each guild keeps at
+    most `max_fingerprints` payloads, least recently seen evicted first.
+    """
+    
+    def __init__(self, accounts: int, channels: int, window: float, max_fingerprints: int):
+        self.accounts = max(2, accounts)
+        self.channels = max(2, channels)
+        self.window = window
+        self.max_fingerprints = max(1, max_fingerprints)
+        self.guilds: Dict[int, "OrderedDict[int, RaidPayload]"] = {}
+    
+    def add(self, guild_id: int, fingerprint: int, author_id: int, channel_id: int,
+            message_id: int, now: float = None) -> List[tuple]:
+        """Record a message, returning the sightings to act on if its payload is a raid"""
+        if now is None:
+            now = time.monotonic()
+        
+        payloads = self.guilds.get(guild_id)
+        if payloads is None:
+            payloads = self.guilds[guild_id] = OrderedDict()
+        
+        payload = payloads.get(fingerprint)
+        if payload is None:
+            payload = payloads[fingerprint] = RaidPayload()
+            while len(payloads) > self.max_fingerprints:
+                payloads.popitem(last=False)
+        else:
+            payloads.move_to_end(fingerprint)
+        
+        entry = (now, author_id, channel_id, message_id)
+        
+        # Raid already underway for this payload; every further copy is part of it
+        if payload.flagged_until >= now:
+            payload.flagged_until = now + self.window
+            return [entry]
+        
+        payload.expire(now - self.window)
+        payload.entries.append(entry)
+        payload.authors[author_id] += 1
+        payload.channels[channel_id] += 1
+        
+        if len(payload.authors) < self.accounts and len(payload.channels) < self.channels:
+            return []
+        
+        flagged = list(payload.entries)
+        payload.expire(float('inf'))
+        payload.flagged_until = now + self.window
+        return flagged
+    
+    def sweep(self, now: float = None) -> int:
+        """Drop payloads not seen within the window, returning how many were removed"""
+        if now is None:
+            now = time.monotonic()
+        cutoff = now - self.window
+        
+        evicted = 0
+        for guild_id in list(self.guilds):
+            payloads = self.guilds[guild_id]
+            idle = [fingerprint for fingerprint, payload in payloads.items() if payload.last_seen < cutoff]
+            for fingerprint in idle:
+                del payloads[fingerprint]
+            evicted += len(idle)
+            if not payloads:
+                del self.guilds[guild_id]
+        return evicted
+
+class RaidBatch:
+    """Raid sightings in one guild collected for a single response"""
+    
+    def __init__(self, content: str):
+        self.content = content
+        self.messages: Dict[int, set] = {}  # channel_id -> message IDs
+        self.offenders: Dict[int, int] = {}  # author_id -> first channel_id
+        self.message_count = 0
+    
+    def add(self, entries: List[tuple]):
+        for _, author_id, channel_id, message_id in entries:
+            message_ids = self.messages.setdefault(channel_id, set())
+            if message_id not in message_ids:
+                message_ids.add(message_id)
+                self.message_count += 1
+            self.offenders.setdefault(author_id, channel_id)
+
+class RaidResponder:
+    """Collects raid offenders for a short window and handles them as one batch
+    
+    Messages are bulk deleted per channel, punishments run concurrently within
+    rate limits and every database row is written in a single transaction.
+    """
+    
+    REASON = "Raid detection"
+    
+    def __init__(self, cog: "AutoModerationCog"):
+        self.cog = cog
+        self.bot = cog.bot
+        self._batches: Dict[int, RaidBatch] = {}
+        self._tasks = set()
+    
+    def submit(self, message: discord.Message, entries: List[tuple]):
+        """Add sightings to the guild's pending batch, starting its timer if needed"""
+        guild = message.guild
+        batch = self._batches.get(guild.id)
+        if batch is None:
+            batch = self._batches[guild.id] = RaidBatch(message.content)
+            task = asyncio.create_task(self._flush_later(guild))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        batch.add(entries)
+    
+    def cancel(self):
+        for task in self._tasks:
+            task.cancel()
+        self._batches.clear()
+    
+    async def _flush_later(self, guild: discord.Guild):
+        await asyncio.sleep(self.cog.raid_for(guild.id)[0].get('batch_window', 2))
+        batch = self._batches.pop(guild.id, None)
+        if batch is None:
+            return
+        
+        try:
+            await self.flush(guild, batch)
+        except Exception as e:
+            logger.error(f"Error responding to raid in {guild}: {e}")
+    
+    async def flush(self, guild: discord.Guild, batch: RaidBatch):
+        config, _ = self.cog.raid_for(guild.id)
+        punishment = config.get('punishment', 'timeout')
+        duration = config.get('duration', 3600) if punishment == "timeout" else None
+        executor = GroupedExecutor(
+            config.get('max_concurrency', 10), config.get('per_bucket_concurrency', 5)
+        )
+        
+        await self.delete_messages(guild, batch, executor)
+        
+        members = []
+        for author_id in batch.offenders:
+            member = guild.get_member(author_id)
+            if member is not None and not self.cog.is_staff(member):
+                members.append(member)
+        
+        # Member edits, kicks and bans share the guild's rate-limit buckets
+        punished = await self.apply(executor, guild, members, punishment, self.REASON, duration)
+        
+        counts = await self.bot.db.record_bulk_punishment(
+            guild.id, self.bot.user.id, punishment, self.REASON,
+            [member.id for member in punished], duration,
+            violations=[(member.id, "Raid", batch.content, batch.offenders[member.id]) for member in punished]
+        )
+        
+        bot_config = self.cog.bot.guild_config.get(guild.id)['bot']
+        if punishment == "warn" and bot_config['auto_punish_on_max_warnings']:
+            max_warnings = bot_config['max_warnings']
+            over_limit = [member for member in punished if counts.get(member.id, 0) >= max_warnings]
+            reason = "Maximum warnings reached (automod)"
+            
+            # Auto-timeout for 1 hour
+            escalated = await self.apply(executor, guild, over_limit, "timeout", reason, 3600)
+            if escalated:
+                await self.bot.db.record_bulk_punishment(
+                    guild.id, self.bot.user.id, "auto_timeout", reason,
+                    [member.id for member in escalated], 3600
+                )
+        
+        await self.cog.send_raid_log(guild, batch, f"{punishment} applied to {len(punished)} members")
+    
+    async def delete_messages(self, guild: discord.Guild, batch: RaidBatch, executor: GroupedExecutor):
+        """Bulk delete the batch's messages, 100 per request, with channels in parallel"""
+        chunks = {}
+        for channel_id, message_ids in batch.messages.items():
+            channel = guild.get_channel(channel_id)
+            if channel is None:
+                continue
+            message_ids = sorted(message_ids)
+            chunks[channel] = [message_ids[start:start + 100] for start in range(0, len(message_ids), 100)]
+        
+        async def delete_chunk(channel, message_ids):
+            try:
+                await channel.delete_messages(
+                    [discord.Object(id=message_id) for message_id in message_ids], reason=self.REASON
+                )
+            except (discord.NotFound, discord.Forbidden):
+                pass
+        
+        await executor.run(chunks, delete_chunk)
+    
+    async def apply(self, executor: GroupedExecutor, guild: discord.Guild, members: List[discord.Member],
+                    punishment: str, reason: str, duration: int = None) -> List[discord.Member]:
+        """Apply a punishment to members concurrently, returning those it succeeded for"""
+        if punishment == "warn" or not members:
+            return members
+        
+        async def punish(_, member):
+            if punishment == "timeout":
+                until = datetime.now() + timedelta(seconds=duration or 600)
+                await member.timeout(until, reason=reason)
+            elif punishment == "kick":
+                await member.kick(reason=reason)
+            elif punishment == "ban":
+                self.bot.expect_audit_entry(guild.id, discord.AuditLogAction.ban, member.id, self.bot.user, reason)
+                await member.ban(reason=reason, delete_message_days=1)
+        
+        results = await executor.run({guild.id: members}, punish)
+        return [member for member, result in results if not isinstance(result, Exception)]
+
 class AutoModerationCog(commands.Cog, name="Auto Moderation"):
     def __init__(self, bot):
         self.bot = bot
         
-        # Track user message history for spam detection
-        self.user_messages = defaultdict(lambda: deque(maxlen=10))
-        self.user_violations = defaultdict(int)
+        # Invite code -> guild ID, shared across pipeline rebuilds
+        cache_config = self.bot.config.get('moderation', {}).get('invite_links', {}).get('cache', {})
+        self.invite_cache = AsyncTTLCache(
+            maxsize=cache_config.get('size', 1024),
+            ttl=cache_config.get('ttl', 3600),
+            negative_ttl=cache_config.get('negative_ttl', 300)
+        )
+        
+        self.raid_responder = RaidResponder(self)
+        
+        # Guild ID -> compiled pipeline; guilds without automod overrides share self.pipeline
+        self.pipelines: Dict[int, AutoModPipeline] = {}
+        # Guild ID -> (raid settings, raid index); guilds with the default raid settings share self.raid_index
+        self.raid_detectors: Dict[int, Tuple[Dict, Optional[RaidFingerprintIndex]]] = {}
+        self.build_pipeline()
+    
+    async def cog_load(self):
+        self.sweep_state.start()
+    
+    async def cog_unload(self):
+        self.sweep_state.cancel()
+        self.raid_responder.cancel()
+    
+    @tasks.loop(minutes=1)
+    async def sweep_state(self):
+        """Evict idle automod state so memory stays bounded by active users"""
+        pipelines = {id(pipeline): pipeline for pipeline in self.pipelines.values()}
+        pipelines[id(self.pipeline)] = self.pipeline
+        evicted = sum(pipeline.sweep() for pipeline in pipelines.values())
+        indexes = {id(index): index for _, index in self.raid_detectors.values() if index is not None}
+        if self.raid_index is not None:
+            indexes[id(self.raid_index)] = self.raid_index
+        evicted += sum(index.sweep() for index in indexes.values())
+        if evicted:
+            logger.debug(f"Evicted {evicted} idle automod entries")
+    
+    def build_pipeline(self):
+        """Compile the automod rules and raid index from the current configuration"""
+        self.pipeline = AutoModPipeline.from_config(
+            self.bot.config.get('moderation', {}), self.resolve_invite
+        )
+        self.pipelines.clear()
         
-        # Cache for recent messages for similarity checking
-        self.recent_messages = defaultdict(lambda: deque(maxlen=5))
+        self.raid_config = self.bot.config.get('moderation', {}).get('raid', {})
+        self.raid_index = self.build_raid_index(self.raid_config)
+        self.raid_detectors.clear()
+    
+    @staticmethod
+    def build_raid_index(config: Dict) -> Optional[RaidFingerprintIndex]:
+        """Create a raid index from moderation.raid settings, or None if raid detection is disabled"""
+        if not config.get('enabled', False):
+            return None
+        return RaidFingerprintIndex(
+            accounts=config.get('accounts', 4),
+            channels=config.get('channels', 3),
+            window=config.get('window', 30),
+            max_fingerprints=config.get('max_fingerprints', 5000)
+        )
+    
+    def raid_for(self, guild_id: int) -> Tuple[Dict, Optional[RaidFingerprintIndex]]:
+        """Get a guild's effective raid settings and the index to record its messages in
+        
+        The index keeps each guild's payloads apart, so every guild using the
+        default settings shares one; a guild overriding them gets its own.
+        """
+        detector = self.raid_detectors.get(guild_id)
+        if detector is None:
+            config = self.bot.guild_config.get(guild_id).get('moderation', {}).get('raid', {})
+            if config == self.raid_config:
+                detector = (self.raid_config, self.raid_index)
+            else:
+                detector = (config, self.build_raid_index(config))
+            self.raid_detectors[guild_id] = detector
+        return detector
+    
+    def pipeline_for(self, guild_id: int) -> AutoModPipeline:
+        """Get the pipeline for a guild, compiling one from its effective config if it overrides automod settings"""
+        pipeline = self.pipelines.get(guild_id)
+        if pipeline is None:
+            if self.bot.guild_config.has_overrides(guild_id, 'moderation'):
+                pipeline = AutoModPipeline.from_config(
+                    self.bot.guild_config.get(guild_id).get('moderation', {}), self.resolve_invite
+                )
+            else:
+                pipeline = self.pipeline
+            self.pipelines[guild_id] = pipeline
+        return pipeline
     
     def is_staff(self, member: discord.Member) -> bool:
         """Check if member is staff (immune to automod)"""
@@ -36,10 +359,11 @@ class AutoModerationCog(commands.Cog, name="Auto Moderation"):
                 
                 # Get warning count for potential auto-punishment
                 warning_count = await self.bot.db.get_warning_count(member.guild.id, member.id)
-                max_warnings = self.bot.config['bot']['max_warnings']
+                bot_config = self.bot.guild_config.get(member.guild.id)['bot']
+                max_warnings = bot_config['max_warnings']
                 
                 if (warning_count >= max_warnings and 
-                    self.bot.config['bot']['auto_punish_on_max_warnings']):
+                    bot_config['auto_punish_on_max_warnings']):
                     
                     # Auto-timeout for 1 hour
                     until = datetime.now() + timedelta(hours=1)
@@ -67,6 +391,7 @@ class AutoModerationCog(commands.Cog, name="Auto Moderation"):
                 )
             
             elif punishment == "ban":
+                self.bot.expect_audit_entry(member.guild.id, discord.AuditLogAction.ban, member.id, self.bot.user, reason)
                 await member.ban(reason=reason, delete_message_days=1)
                 await self.bot.db.log_mod_action(
                     member.guild.id, member.id, self.bot.user.id, "ban", reason
@@ -77,17 +402,38 @@ class AutoModerationCog(commands.Cog, name="Auto Moderation"):
         except Exception as e:
             logger.error(f"Error punishing user {member}: {e}")
     
-    async def send_automod_log(self, message: discord.Message, violation_type: str, action_taken: str):
+    def get_log_channel(self, guild: discord.Guild) -> Optional[discord.TextChannel]:
+        """Resolve the logging channel through the Logging cog's per-guild cache"""
+        logging_cog = self.bot.get_cog("Logging")
+        if logging_cog is not None:
+            return logging_cog.get_log_channel(guild)
+        
+        log_channel_name = self.bot.guild_config.get(guild.id)['moderation']['log_channel_name']
+        return discord.utils.get(guild.text_channels, name=log_channel_name)
+    
+    async def post_log(self, log_channel: discord.TextChannel, embed: discord.Embed):
+        """Send an embed through the Logging cog's batched dispatcher when it is loaded"""
+        logging_cog = self.bot.get_cog("Logging")
+        if logging_cog is not None:
+            await logging_cog.dispatch(log_channel, embed)
+            return
+        
+        try:
+            await log_channel.send(embed=embed)
+        except discord.Forbidden:
+            pass
+    
+    async def send_automod_log(self, message: discord.Message, verdicts: List[Verdict], action_taken: str):
         """Send automod log to logging channel"""
-        # Log to database
-        await self.bot.db.log_automod_violation(
-            message.guild.id, message.author.id, violation_type,
-            message.content, message.channel.id, action_taken
-        )
+        # Log to database, one row per violation so /automodlogs can filter by type
+        for verdict in verdicts:
+            await self.bot.db.log_automod_violation(
+                message.guild.id, message.author.id, verdict.violation_type,
+                message.content, message.channel.id, action_taken
+            )
         
         # Get logging channel
-        log_channel_name = self.bot.config['moderation']['log_channel_name']
-        log_channel = discord.utils.get(message.guild.text_channels, name=log_channel_name)
+        log_channel = self.get_log_channel(message.guild)
         
         if not log_channel:
             return
@@ -110,7 +456,7 @@ class AutoModerationCog(commands.Cog, name="Auto Moderation"):
         )
         embed.add_field(
             name="Violation",
-            value=violation_type,
+            value=", ".join(verdict.violation_type for verdict in verdicts),
             inline=True
         )
         embed.add_field(
@@ -131,10 +477,7 @@ class AutoModerationCog(commands.Cog, name="Auto Moderation"):
             icon_url=message.author.display_avatar.url
         )
         
-        try:
-            await log_channel.send(embed=embed)
-        except discord.Forbidden:
-            pass
+        await self.post_log(log_channel, embed)
     
     @commands.Cog.listener()
     async def on_message(self, message: discord.Message):
@@ -143,262 +486,120 @@ class AutoModerationCog(commands.Cog, name="Auto Moderation"):
         if not message.guild or message.author.bot or self.is_staff(message.author):
             return
         
-        # Skip if automod is disabled
-        if not self.bot.config.get('moderation', {}).get('spam', {}).get('enabled', False):
+        # Skip if every automod rule is disabled
+        pipeline = self.pipeline_for(message.guild.id)
+        raid_config, raid_index = self.raid_for(message.guild.id)
+        if not pipeline.rules and raid_index is None:
             return
         
-        member = message.author
-        guild = message.guild
-        
-        # Check for spam
-        await self.check_spam(message)
-        
-        # Check for excessive caps
-        await self.check_caps(message)
-        
-        # Check for repeated text
-        await self.check_repeated_text(message)
-        
-        # Check for bad words
-        await self.check_bad_words(message)
-        
-        # Check for invite links
-        await self.check_invite_links(message)
-    
-    async def check_spam(self, message: discord.Message):
-        """Check for spam (too many messages in short time)"""
-        config = self.bot.config['moderation']['spam']
-        if not config['enabled']:
-            return
-        
-        user_id = message.author.id
-        now = datetime.now()
-        
-        # Add current message to user's history
-        self.user_messages[user_id].append(now)
+        ctx = MessageContext(message)
         
-        # Count messages in time window
-        time_window = timedelta(seconds=config['time_window'])
-        recent_messages = [
-            msg_time for msg_time in self.user_messages[user_id]
-            if now - msg_time <= time_window
-        ]
-        
-        if len(recent_messages) >= config['max_messages']:
-            # Spam detected
-            try:
-                await message.delete()
-            except discord.NotFound:
-                pass  # Message already deleted
-            except discord.Forbidden:
-                pass  # No permission to delete
-            
-            # Apply punishment
-            punishment = config['punishment']
-            duration = config.get('duration', 600)  # Default 10 minutes
-            
-            await self.punish_user(
-                message.author, punishment, 
-                "Spam detection", duration
-            )
-            
-            # Send warning message
-            warning_msg = self.bot.messages['automod']['spam']['punishment'].format(
-                user=message.author.display_name
+        # Length is measured without mentions, so bare pings never share the empty fingerprint
+        if raid_index is not None and len(ctx.payload) >= max(1, raid_config.get('min_length', 10)):
+            entries = raid_index.add(
+                ctx.guild_id, ctx.fingerprint, ctx.author_id, ctx.channel_id, message.id
             )
-            
-            try:
-                warning = await message.channel.send(warning_msg)
-                # Delete warning after 5 seconds
-                await warning.delete(delay=5)
-            except discord.Forbidden:
-                pass
-            
-            await self.send_automod_log(message, "Spam", f"{punishment} applied")
-            
-            # Clear user's message history to prevent further triggers
-            self.user_messages[user_id].clear()
-    
-    async def check_caps(self, message: discord.Message):
-        """Check for excessive capital letters"""
-        config = self.bot.config['moderation']['caps']
-        if not config['enabled']:
-            return
-        
-        content = message.content
-        if len(content) < config['min_length']:
-            return
-        
-        caps_ratio = calculate_caps_ratio(content)
+            if entries:
+                self.raid_responder.submit(message, entries)
+                return
         
-        if caps_ratio >= config['threshold']:
-            # Excessive caps detected
-            try:
-                await message.delete()
-            except discord.NotFound:
-                pass
-            except discord.Forbidden:
-                pass
-            
-            # Apply punishment
-            punishment = config['punishment']
-            await self.punish_user(
-                message.author, punishment, 
-                "Excessive capital letters"
-            )
-            
-            # Send warning message
-            warning_msg = self.bot.messages['automod']['caps']['warning'].format(
-                user=message.author.display_name
-            )
-            
-            try:
-                warning = await message.channel.send(warning_msg)
-                await warning.delete(delay=5)
-            except discord.Forbidden:
-                pass
-            
-            await self.send_automod_log(message, "Excessive Caps", f"{punishment} applied")
+        verdicts = await pipeline.evaluate(message, ctx)
+        if verdicts:
+            await self.apply_verdicts(message, verdicts)
     
-    async def check_repeated_text(self, message: discord.Message):
-        """Check for repeated/similar text"""
-        config = self.bot.config['moderation']['repeated_text']
-        if not config['enabled']:
-            return
-        
-        content = message.content.lower()
-        channel_id = message.channel.id
-        
-        # Add to recent messages
-        self.recent_messages[channel_id].append(content)
-        
-        # Check similarity with recent messages
-        for recent_content in list(self.recent_messages[channel_id])[:-1]:  # Exclude current message
-            similarity = calculate_text_similarity(content, recent_content)
-            
-            if similarity >= config['threshold']:
-                # Repeated text detected
-                try:
-                    await message.delete()
-                except discord.NotFound:
-                    pass
-                except discord.Forbidden:
-                    pass
-                
-                # Apply punishment
-                punishment = config['punishment']
-                await self.punish_user(
-                    message.author, punishment, 
-                    "Repeated text"
-                )
-                
-                # Send warning message
-                warning_msg = self.bot.messages['automod']['repeated_text']['warning'].format(
-                    user=message.author.display_name
-                )
-                
-                try:
-                    warning = await message.channel.send(warning_msg)
-                    await warning.delete(delay=5)
-                except discord.Forbidden:
-                    pass
-                
-                await self.send_automod_log(message, "Repeated Text", f"{punishment} applied")
-                break
+    @commands.Cog.listener()
+    async def on_config_reload(self):
+        """Recompile automod rules after /reload"""
+        self.build_pipeline()
     
-    async def check_bad_words(self, message: discord.Message):
-        """Check for bad words"""
-        config = self.bot.config['moderation']['bad_words']
-        if not config['enabled']:
-            return
-        
-        bad_words = config.get('words', [])
-        if not bad_words:
-            return
-        
-        content = message.content.lower()
-        
-        # Check for bad words
-        for bad_word in bad_words:
-            if bad_word.lower() in content:
-                # Bad word detected
-                try:
-                    await message.delete()
-                except discord.NotFound:
-                    pass
-                except discord.Forbidden:
-                    pass
-                
-                # Apply punishment
-                punishment = config['punishment']
-                await self.punish_user(
-                    message.author, punishment, 
-                    f"Inappropriate language: {bad_word}"
-                )
-                
-                # Send warning message
-                warning_msg = self.bot.messages['automod']['bad_words']['warning'].format(
-                    user=message.author.display_name
-                )
-                
-                try:
-                    warning = await message.channel.send(warning_msg)
-                    await warning.delete(delay=5)
-                except discord.Forbidden:
-                    pass
-                
-                await self.send_automod_log(message, "Inappropriate Language", f"{punishment} applied")
-                break
+    @commands.Cog.listener()
+    async def on_guild_settings_update(self, guild_id: int):
+        """Recompile the guild's rules and raid settings from its new overrides on next use"""
+        self.pipelines.pop(guild_id, None)
+        self.raid_detectors.pop(guild_id, None)
     
-    async def check_invite_links(self, message: discord.Message):
-        """Check for Discord invite links"""
-        config = self.bot.config['moderation']['invite_links']
-        if not config['enabled']:
-            return
-        
-        invite_code = extract_invite_code(message.content)
-        if not invite_code:
-            return
-        
-        # Check if invite is whitelisted
-        whitelist = config.get('whitelist', [])
+    async def apply_verdicts(self, message: discord.Message, verdicts: List[Verdict]):
+        """Apply one consolidated action for every rule that flagged a message"""
+        # The most severe punishment wins; ties go to the first rule in pipeline order
+        primary = max(verdicts, key=lambda verdict: verdict.severity)
         
-        try:
-            invite = await self.bot.fetch_invite(invite_code)
-            if invite.guild and invite.guild.id in whitelist:
-                return  # Whitelisted server
-        except discord.NotFound:
-            pass  # Invalid invite
-        except discord.HTTPException:
-            pass  # Error fetching invite
-        
-        # Invite link detected (not whitelisted)
         try:
             await message.delete()
         except discord.NotFound:
-            pass
+            pass  # Message already deleted
         except discord.Forbidden:
-            pass
+            pass  # No permission to delete
         
         # Apply punishment
-        punishment = config['punishment']
-        await self.punish_user(
-            message.author, punishment, 
-            "Unauthorized invite link"
-        )
+        reason = "; ".join(verdict.reason for verdict in verdicts)
+        await self.punish_user(message.author, primary.punishment, reason, primary.duration)
         
         # Send warning message
-        warning_msg = self.bot.messages['automod']['invite_links']['warning'].format(
-            user=message.author.display_name
-        )
+        # A missing string must not stop the violation from being logged
+        section, key = primary.message_key.split('.')
+        template = self.bot.messages.get('automod', {}).get(section, {}).get(key)
+        if template is None:
+            logger.warning(f"Missing automod.{primary.message_key} in messages.yml")
+            template = DEFAULT_WARNING
+        warning_msg = template.format(user=message.author.display_name)
         
         try:
             warning = await message.channel.send(warning_msg)
+            # Delete warning after 5 seconds
             await warning.delete(delay=5)
         except discord.Forbidden:
             pass
         
-        await self.send_automod_log(message, "Invite Link", f"{punishment} applied")
+        await self.send_automod_log(message, verdicts, f"{primary.punishment} applied")
+    
+    async def send_raid_log(self, guild: discord.Guild, batch: "RaidBatch", action_taken: str):
+        """Send one log embed summarizing a raid response"""
+        log_channel = self.get_log_channel(guild)
+        
+        if not log_channel:
+            return
+        
+        embed = discord.Embed(
+            title="🚨 Raid Detected",
+            color=0xff0000,
+            timestamp=datetime.utcnow()
+        )
+        
+        embed.add_field(name="Messages", value=str(batch.message_count), inline=True)
+        embed.add_field(name="Accounts", value=str(len(batch.offenders)), inline=True)
+        embed.add_field(name="Channels", value=str(len(batch.messages)), inline=True)
+        embed.add_field(
+            name="Users",
+            value=", ".join(f"<@{user_id}>" for user_id in list(batch.offenders)[:20])[:1024],
+            inline=False
+        )
+        embed.add_field(name="Action Taken", value=action_taken, inline=True)
+        
+        if batch.content:
+            embed.add_field(
+                name="Content",
+                value=batch.content[:1024] if len(batch.content) > 1024 else batch.content,
+                inline=False
+            )
+        
+        await self.post_log(log_channel, embed)
+    
+    async def resolve_invite(self, invite_code: str) -> Optional[int]:
+        """Resolve an invite code to the ID of the guild it points to (cached)"""
+        try:
+            return await self.invite_cache.get_or_fetch(
+                invite_code, lambda: self.fetch_invite_guild(invite_code)
+            )
+        except discord.HTTPException:
+            return None  # Error fetching invite, not cached so the next message retries
+    
+    async def fetch_invite_guild(self, invite_code: str) -> Optional[int]:
+        """Fetch an invite from Discord, returning None for invalid invites"""
+        try:
+            invite = await self.bot.fetch_invite(invite_code, with_counts=False)
+            return invite.guild.id if invite.guild else None
+        except discord.NotFound:
+            return None  # Invalid invite
 
 async def setup(bot):
     await bot.add_cog(AutoModerationCog(bot))
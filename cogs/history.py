@@ -1,18 +1,48 @@
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 from discord import app_commands
-from typing import Optional
+from collections import Counter
+from functools import partial
+from typing import Literal, Optional
 from datetime import datetime, timedelta
 import logging
-from utils.helpers import create_embed, create_error_embed, format_duration, format_timestamp, Paginator
+import time
+from utils.helpers import (
+    create_embed, create_error_embed, format_bar_chart, format_duration, format_timestamp,
+    truncate_text, KeysetPaginator
+)
 from utils.permissions import has_permissions, can_use_command
 
 logger = logging.getLogger(__name__)
 
+# /modstats period -> (hours covered, timeline granularity)
+STATS_PERIODS = {
+    "24h": (24, "hour"),
+    "7d": (24 * 7, "day"),
+    "30d": (24 * 30, "day")
+}
+
 class HistoryCog(commands.Cog, name="History"):
     def __init__(self, bot):
         self.bot = bot
     
+    async def cog_load(self):
+        self.compact_stats.start()
+    
+    async def cog_unload(self):
+        self.compact_stats.cancel()
+    
+    @tasks.loop(hours=1)
+    async def compact_stats(self):
+        """Fold hourly statistics past their retention into daily rollups"""
+        keep_days = self.bot.config.get('database', {}).get('hourly_stats_days', 7)
+        try:
+            folded = await self.bot.db.compact_stat_buckets(keep_days * 24)
+            if folded:
+                logger.info(f"Compacted {folded} hourly statistics buckets into daily rollups")
+        except Exception as e:
+            logger.error(f"Error compacting statistics: {e}")
+    
     @app_commands.command(name="history", description="View moderation history for a user")
     @app_commands.describe(
         user="The user to view history for",
@@ -61,7 +91,7 @@ class HistoryCog(commands.Cog, name="History"):
             
             # Get current warnings count
             warnings_count = await self.bot.db.get_warning_count(interaction.guild.id, user.id)
-            max_warnings = self.bot.config['bot']['max_warnings']
+            max_warnings = self.bot.guild_config.get(interaction.guild.id)['bot']['max_warnings']
             embed.add_field(
                 name="Active Warnings",
                 value=f"{warnings_count}/{max_warnings}",
@@ -138,8 +168,13 @@ class HistoryCog(commands.Cog, name="History"):
         await interaction.response.defer()
         
         try:
-            # Get complete user history
-            history = await self.bot.db.get_user_history(interaction.guild.id, user.id, 1000)
+            # Count the history and fetch only the first page; later pages load on demand
+            total = await self.bot.db.count_user_history(interaction.guild.id, user.id)
+            paginator = KeysetPaginator(
+                partial(self.bot.db.get_user_history_page, interaction.guild.id, user.id),
+                total, per_page=5
+            )
+            history = await paginator.first() if total else []
             
             if not history:
                 embed = create_error_embed(
@@ -148,14 +183,10 @@ class HistoryCog(commands.Cog, name="History"):
                 await interaction.followup.send(embed=embed, ephemeral=True)
                 return
             
-            # Create paginated view
-            paginator = Paginator(history, per_page=5)
-            current_page = 0
-            
             def create_history_embed(page_entries, page_num):
                 embed = discord.Embed(
                     title=f"📋 Complete History - {user.display_name}",
-                    description=f"Page {page_num + 1}/{paginator.max_pages} • Total: {len(history)} entries",
+                    description=f"Page {page_num + 1}/{paginator.max_pages} • Total: {paginator.total} entries",
                     color=0x0099ff,
                     timestamp=datetime.utcnow()
                 )
@@ -202,7 +233,7 @@ class HistoryCog(commands.Cog, name="History"):
             
             # Create view with navigation buttons
             view = HistoryPaginationView(paginator, create_history_embed, user)
-            embed = create_history_embed(paginator.get_page(0), 0)
+            embed = create_history_embed(history, 0)
             
             await interaction.followup.send(embed=embed, view=view)
             
@@ -247,7 +278,7 @@ class HistoryCog(commands.Cog, name="History"):
             
             embed.set_thumbnail(url=user.display_avatar.url)
             
-            max_warnings = self.bot.config['bot']['max_warnings']
+            max_warnings = self.bot.guild_config.get(interaction.guild.id)['bot']['max_warnings']
             embed.add_field(
                 name="Warning Count",
                 value=f"{len(warnings)}/{max_warnings}",
@@ -461,14 +492,100 @@ class HistoryCog(commands.Cog, name="History"):
                 self.bot.messages['commands']['error']
             )
             await interaction.followup.send(embed=embed, ephemeral=True)
+    
+    @app_commands.command(name="modstats", description="View moderation trends for this server")
+    @app_commands.describe(
+        period="Time range to show"
+    )
+    @has_permissions("moderator")
+    async def mod_stats(
+        self,
+        interaction: discord.Interaction,
+        period: Literal["24h", "7d", "30d"] = "7d"
+    ):
+        """View moderation and auto-moderation trends from the statistics rollups"""
+        await interaction.response.defer(ephemeral=True)
+        
+        try:
+            guild_id = interaction.guild.id
+            hours, granularity = STATS_PERIODS[period]
+            
+            actions = await self.bot.db.get_stat_series(guild_id, 'mod_action', hours, granularity=granularity)
+            violations = await self.bot.db.get_stat_series(guild_id, 'automod', hours, granularity=granularity)
+            by_action = Counter(await self.bot.db.get_stat_counts(guild_id, 'mod_action', hours))
+            by_moderator = Counter(await self.bot.db.get_stat_counts(guild_id, 'moderator', hours))
+            by_violation = Counter(await self.bot.db.get_stat_counts(guild_id, 'automod', hours))
+            
+            embed = discord.Embed(
+                title=f"📈 Moderation Stats - Last {period}",
+                description=f"**Mod Actions:** {sum(by_action.values())} • "
+                            f"**Auto-mod Violations:** {sum(by_violation.values())}",
+                color=0x0099ff,
+                timestamp=datetime.utcnow()
+            )
+            
+            embed.add_field(
+                name="Mod Actions",
+                value=self.format_timeline(actions, hours, granularity),
+                inline=False
+            )
+            embed.add_field(
+                name="Auto-mod Violations",
+                value=self.format_timeline(violations, hours, granularity),
+                inline=False
+            )
+            
+            embed.add_field(
+                name="By Action",
+                value="\n".join(f"**{action.title()}:** {count}" for action, count in by_action.most_common(10)) or "None",
+                inline=True
+            )
+            embed.add_field(
+                name="By Moderator",
+                value="\n".join(f"<@{moderator_id}>: {count}" for moderator_id, count in by_moderator.most_common(10)) or "None",
+                inline=True
+            )
+            embed.add_field(
+                name="By Violation",
+                value="\n".join(f"**{violation}:** {count}" for violation, count in by_violation.most_common(10)) or "None",
+                inline=True
+            )
+            
+            embed.set_footer(text="Times are UTC")
+            
+            await interaction.followup.send(embed=embed, ephemeral=True)
+            
+        except Exception as e:
+            logger.error(f"Error retrieving moderation stats: {e}")
+            embed = create_error_embed(
+                self.bot.messages['commands']['error']
+            )
+            await interaction.followup.send(embed=embed, ephemeral=True)
+    
+    @staticmethod
+    def format_timeline(series, hours: int, granularity: str) -> str:
+        """Chart a (period start, count) series, including the periods without any events"""
+        counts = dict(series)
+        current_hour = int(time.time()) // 3600
+        
+        if granularity == "day":
+            periods = range((current_hour - hours + 1) // 24, current_hour // 24 + 1)
+            starts = [datetime.utcfromtimestamp(day * 86400) for day in periods]
+            label = "%b %d"
+        else:
+            periods = range(current_hour - hours + 1, current_hour + 1)
+            starts = [datetime.utcfromtimestamp(hour * 3600) for hour in periods]
+            label = "%H:00"
+        
+        chart = format_bar_chart([(start.strftime(label), counts.get(start, 0)) for start in starts])
+        return truncate_text(f"```\n{chart}\n```", 1024)
 
 class HistoryPaginationView(discord.ui.View):
-    def __init__(self, paginator: Paginator, embed_func, user: discord.User):
+    def __init__(self, paginator: KeysetPaginator, embed_func, user: discord.User):
         super().__init__(timeout=300)
         self.paginator = paginator
         self.embed_func = embed_func
         self.user = user
-        self.current_page = 0
         
         # Disable buttons if only one page
         if paginator.max_pages <= 1:
@@ -477,37 +594,35 @@ class HistoryPaginationView(discord.ui.View):
     
     async def update_embed(self, interaction: discord.Interaction):
         """Update the embed with current page"""
-        page_entries = self.paginator.get_page(self.current_page)
-        embed = self.embed_func(page_entries, self.current_page)
+        current_page = self.paginator.page_num
+        embed = self.embed_func(self.paginator.entries, current_page)
         
         # Update button states
-        self.first_page.disabled = self.current_page == 0
-        self.previous_page.disabled = self.current_page == 0
-        self.next_page.disabled = self.current_page >= self.paginator.max_pages - 1
-        self.last_page.disabled = self.current_page >= self.paginator.max_pages - 1
+        self.first_page.disabled = current_page == 0
+        self.previous_page.disabled = current_page == 0
+        self.next_page.disabled = current_page >= self.paginator.max_pages - 1
+        self.last_page.disabled = current_page >= self.paginator.max_pages - 1
         
         await interaction.response.edit_message(embed=embed, view=self)
     
     @discord.ui.button(label='<<', style=discord.ButtonStyle.secondary)
     async def first_page(self, interaction: discord.Interaction, button: discord.ui.Button):
-        self.current_page = 0
+        await self.paginator.first()
         await self.update_embed(interaction)
     
     @discord.ui.button(label='<', style=discord.ButtonStyle.primary)
     async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
-        if self.current_page > 0:
-            self.current_page -= 1
+        await self.paginator.previous()
         await self.update_embed(interaction)
     
     @discord.ui.button(label='>', style=discord.ButtonStyle.primary)
     async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
-        if self.current_page < self.paginator.max_pages - 1:
-            self.current_page += 1
+        await self.paginator.next()
         await self.update_embed(interaction)
     
     @discord.ui.button(label='>>', style=discord.ButtonStyle.secondary)
     async def last_page(self, interaction: discord.Interaction, button: discord.ui.Button):
-        self.current_page = self.paginator.max_pages - 1
+        await self.paginator.last()
         await self.update_embed(interaction)
     
     @discord.ui.button(label='Close', style=discord.ButtonStyle.danger)
@@ -1,23 +1,186 @@
 import discord
 from discord.ext import commands
+from collections import Counter, OrderedDict
 from datetime import datetime
+import io
+import json
 import logging
+from typing import Dict, List, Optional
+from utils.audit import AuditLogCorrelator
+from utils.cache import MessageContentStore
+from utils.dispatcher import LogDispatcher
 from utils.helpers import create_embed, clean_content, truncate_text
 
 logger = logging.getLogger(__name__)
 
+WEBHOOK_NAME = "Moderation Logs"
+
+# Deleted message IDs remembered so bulk and single delete events don't log a message twice
+RECENT_DELETIONS_SIZE = 10000
+
 class LoggingCog(commands.Cog, name="Logging"):
     def __init__(self, bot):
         self.bot = bot
+        
+        # Guild ID -> resolved log channel ID (None if the guild has none)
+        self.log_channel_ids: Dict[int, Optional[int]] = {}
+        
+        self.recent_deletions: "OrderedDict[int, None]" = OrderedDict()
+        
+        # Content of recent messages, for deletes and edits discord.py's cache no longer covers
+        store_config = self.bot.config['logging'].get('content_store', {})
+        self.content_store = MessageContentStore(
+            max_messages=store_config.get('max_messages', 50000),
+            max_bytes=store_config.get('max_mb', 32) * 1024 * 1024
+        )
+        
+        # Ban/unban moderators and reasons, shared across concurrent events
+        self.audit = AuditLogCorrelator()
+        
+        # Log channel ID -> webhook used in webhook delivery mode (None if unavailable)
+        self.webhooks: Dict[int, Optional[discord.Webhook]] = {}
+        
+        dispatch_config = self.bot.config['logging'].get('dispatch', {})
+        self.dispatcher = LogDispatcher(
+            self.deliver,
+            max_queue=dispatch_config.get('max_queue', 500),
+            flush_interval=dispatch_config.get('flush_interval_ms', 1000) / 1000,
+            overflow=dispatch_config.get('overflow', 'summarize'),
+            spill=self.spill_embeds,
+            unspill=self.unspill_embeds
+        )
+    
+    async def cog_unload(self):
+        """Send whatever is still queued before shutting down"""
+        await self.dispatcher.close()
+    
+    async def deliver(self, channel: discord.TextChannel, embeds: List[discord.Embed]):
+        """Post a batch of log embeds as a single message
+        
+        In webhook delivery mode logs go through a webhook owned by the bot, so
+        they use the webhook's rate limit instead of the bot's channel bucket
+        shared with moderation commands. Falls back to a normal send whenever
+        the webhook can't be created or used.
+        """
+        if self.logging_config(channel.guild.id).get('delivery', 'channel') == "webhook":
+            webhook = await self.get_log_webhook(channel)
+            if webhook is not None:
+                try:
+                    await webhook.send(
+                        embeds=embeds,
+                        username=self.bot.user.display_name,
+                        avatar_url=self.bot.user.display_avatar.url
+                    )
+                    return
+                except (discord.NotFound, discord.Forbidden):
+                    # Webhook was deleted or its channel moved; recreate it on the next batch
+                    self.webhooks.pop(channel.id, None)
+        
+        await channel.send(embeds=embeds)
+    
+    async def get_log_webhook(self, channel: discord.TextChannel) -> Optional[discord.Webhook]:
+        """Get the bot's log webhook for a channel, creating it on first use"""
+        if channel.id in self.webhooks:
+            return self.webhooks[channel.id]
+        
+        webhook = None
+        try:
+            for existing in await channel.webhooks():
+                if existing.name == WEBHOOK_NAME and existing.user == self.bot.user and existing.token:
+                    webhook = existing
+                    break
+            
+            if webhook is None:
+                webhook = await channel.create_webhook(name=WEBHOOK_NAME, reason="Moderation log delivery")
+        except discord.Forbidden:
+            logger.warning(f"Missing Manage Webhooks in {channel.guild.name}, sending logs as the bot")
+        except discord.HTTPException as e:
+            logger.error(f"Error creating log webhook in {channel.guild.name}: {e}")
+        
+        # None is cached too, so a guild without permission doesn't retry on every batch
+        self.webhooks[channel.id] = webhook
+        return webhook
+    
+    async def spill_embeds(self, channel: discord.TextChannel, embeds: List[discord.Embed]):
+        await self.bot.db.spill_log_embeds(
+            channel.guild.id, channel.id, [json.dumps(embed.to_dict()) for embed in embeds]
+        )
+    
+    async def unspill_embeds(self, channel: discord.TextChannel, limit: int) -> List[discord.Embed]:
+        payloads = await self.bot.db.pop_spilled_log_embeds(channel.id, limit)
+        return [discord.Embed.from_dict(json.loads(payload)) for payload in payloads]
     
-    def get_log_channel(self, guild: discord.Guild) -> discord.TextChannel:
-        """Get the logging channel for a guild"""
-        log_channel_name = self.bot.config['moderation']['log_channel_name']
-        return discord.utils.get(guild.text_channels, name=log_channel_name)
+    async def dispatch(self, channel: discord.TextChannel, embed: discord.Embed):
+        """Queue an embed for a log channel; embeds are batched up to ten per message"""
+        await self.dispatcher.enqueue(channel, embed)
+    
+    def logging_config(self, guild_id: int) -> Dict:
+        """Get the guild's effective logging settings"""
+        return self.bot.guild_config.get(guild_id)['logging']
+    
+    def event_enabled(self, guild_id: int, event: str) -> bool:
+        return self.logging_config(guild_id)['events'].get(event, True)
+    
+    def get_log_channel(self, guild: discord.Guild) -> Optional[discord.TextChannel]:
+        """Get the logging channel for a guild
+        
+        Resolved once per guild and cached by ID; a channel configured in guild
+        settings wins over the log_channel_name lookup.
+        """
+        if guild.id in self.log_channel_ids:
+            channel_id = self.log_channel_ids[guild.id]
+            return guild.get_channel(channel_id) if channel_id else None
+        
+        channel = None
+        channel_id = self.bot.guild_config.overrides(guild.id).get('log_channel_id')
+        if channel_id:
+            channel = guild.get_channel(channel_id)
+        
+        if channel is None:
+            log_channel_name = self.bot.guild_config.get(guild.id)['moderation']['log_channel_name']
+            channel = discord.utils.get(guild.text_channels, name=log_channel_name)
+        
+        self.log_channel_ids[guild.id] = channel.id if channel else None
+        return channel
+    
+    def invalidate_log_channel(self, guild: discord.Guild):
+        self.log_channel_ids.pop(guild.id, None)
+    
+    @commands.Cog.listener()
+    async def on_config_reload(self):
+        """log_channel_name or the delivery mode may have changed"""
+        self.log_channel_ids.clear()
+        self.webhooks.clear()
+    
+    @commands.Cog.listener()
+    async def on_guild_settings_update(self, guild_id: int):
+        """The guild's log_channel_id or log_channel_name may have changed"""
+        self.log_channel_ids.pop(guild_id, None)
     
     async def send_log(self, guild: discord.Guild, embed: discord.Embed):
         """Send a log message to the logging channel"""
-        if not self.bot.config['logging']['enabled']:
+        if not self.logging_config(guild.id)['enabled']:
+            return
+        
+        log_channel = self.get_log_channel(guild)
+        if not log_channel:
+            return
+        
+        await self.dispatch(log_channel, embed)
+    
+    def mark_deleted(self, message_id: int) -> bool:
+        """Record a deleted message ID, returning False if it was already logged"""
+        if message_id in self.recent_deletions:
+            return False
+        
+        self.recent_deletions[message_id] = None
+        if len(self.recent_deletions) > RECENT_DELETIONS_SIZE:
+            self.recent_deletions.popitem(last=False)
+        return True
+    
+    async def send_log_file(self, guild: discord.Guild, embed: discord.Embed, file: discord.File):
+        """Send a log embed with an attachment directly, since files can't be batched"""
+        if not self.logging_config(guild.id)['enabled']:
             return
         
         log_channel = self.get_log_channel(guild)
@@ -25,25 +188,69 @@ class LoggingCog(commands.Cog, name="Logging"):
             return
         
         try:
-            await log_channel.send(embed=embed)
+            await log_channel.send(embed=embed, file=file)
         except discord.Forbidden:
             logger.warning(f"No permission to send logs in {guild.name}")
         except Exception as e:
             logger.error(f"Error sending log in {guild.name}: {e}")
     
+    @commands.Cog.listener()
+    async def on_message(self, message: discord.Message):
+        """Keep a compact copy of message content for deletes and edits discord.py has no cache for"""
+        if message.guild is None or message.author.bot:
+            return
+        
+        attachments = ", ".join(att.filename for att in message.attachments) or None
+        self.content_store.put(
+            message.id, message.guild.id, message.channel.id, message.author.id,
+            message.content, attachments
+        )
+    
     @commands.Cog.listener()
     async def on_message_delete(self, message: discord.Message):
         """Log deleted messages"""
-        if not self.bot.config['logging']['events']['message_delete']:
-            return
+        self.content_store.pop(message.id)
         
         if message.guild is None or message.author.bot:
             return
         
+        if not self.event_enabled(message.guild.id, 'message_delete'):
+            return
+        
+        attachments = ", ".join([att.filename for att in message.attachments]) or None
+        await self.log_deleted_message(
+            message.guild, message.channel.id, message.id, message.author.id,
+            message.content, attachments, author=message.author
+        )
+    
+    @commands.Cog.listener()
+    async def on_raw_message_delete(self, payload: discord.RawMessageDeleteEvent):
+        """Log deleted messages that were no longer in discord.py's cache"""
+        if payload.cached_message is not None:
+            return  # on_message_delete handles it
+        
+        stored = self.content_store.pop(payload.message_id)
+        if stored is None or not self.event_enabled(stored.guild_id, 'message_delete'):
+            return
+        
+        guild = self.bot.get_guild(stored.guild_id)
+        if guild is None:
+            return
+        
+        await self.log_deleted_message(
+            guild, stored.channel_id, payload.message_id, stored.author_id,
+            stored.content, stored.attachments, author=guild.get_member(stored.author_id)
+        )
+    
+    async def log_deleted_message(self, guild: discord.Guild, channel_id: int, message_id: int, author_id: int,
+                                  content: str, attachments: Optional[str], author: discord.abc.User = None):
+        """Log a single deleted message; author may be None if they are no longer cached"""
+        if not self.mark_deleted(message_id):
+            return
+        
         # Log to database
         await self.bot.db.log_message_action(
-            message.guild.id, message.channel.id, message.id,
-            message.author.id, "delete", clean_content(message.content)
+            guild.id, channel_id, message_id, author_id, "delete", clean_content(content)
         )
         
         # Create embed for logging channel
@@ -55,55 +262,163 @@ class LoggingCog(commands.Cog, name="Logging"):
         
         embed.add_field(
             name="Author",
-            value=f"{message.author} ({message.author.id})",
+            value=f"{author} ({author_id})" if author else f"<@{author_id}> ({author_id})",
             inline=True
         )
         embed.add_field(
             name="Channel",
-            value=message.channel.mention,
+            value=f"<#{channel_id}>",
             inline=True
         )
         
-        if message.content:
+        if content:
             embed.add_field(
                 name="Content",
-                value=truncate_text(clean_content(message.content), 1024),
+                value=truncate_text(clean_content(content), 1024),
                 inline=False
             )
         
-        if message.attachments:
-            attachments = ", ".join([att.filename for att in message.attachments])
+        if attachments:
             embed.add_field(
                 name="Attachments",
                 value=truncate_text(attachments, 1024),
                 inline=False
             )
         
-        embed.set_author(
-            name=message.author.display_name,
-            icon_url=message.author.display_avatar.url
+        if author:
+            embed.set_author(
+                name=author.display_name,
+                icon_url=author.display_avatar.url
+            )
+        
+        await self.send_log(guild, embed)
+    
+    @commands.Cog.listener()
+    async def on_raw_bulk_message_delete(self, payload: discord.RawBulkMessageDeleteEvent):
+        """Log a bulk delete with one database write and one summary embed"""
+        stored = {message_id: self.content_store.pop(message_id) for message_id in payload.message_ids}
+        
+        guild = self.bot.get_guild(payload.guild_id) if payload.guild_id else None
+        if guild is None or not self.event_enabled(guild.id, 'message_bulk_delete'):
+            return
+        
+        message_ids = [message_id for message_id in payload.message_ids if self.mark_deleted(message_id)]
+        if not message_ids:
+            return
+        
+        # (message_id, author_id, author, content, attachments) for every message whose content is known
+        cached = {message.id: message for message in payload.cached_messages}
+        known = []
+        for message_id in sorted(message_ids):
+            message = cached.get(message_id)
+            if message is not None:
+                if not message.author.bot:
+                    attachments = ", ".join(att.filename for att in message.attachments) or None
+                    known.append((message_id, message.author.id, message.author, message.content, attachments))
+            elif stored[message_id] is not None:
+                entry = stored[message_id]
+                known.append((message_id, entry.author_id, guild.get_member(entry.author_id), entry.content, entry.attachments))
+        
+        # Log to database
+        await self.bot.db.log_message_actions([
+            (guild.id, payload.channel_id, message_id, author_id, "bulk_delete", clean_content(content))
+            for message_id, author_id, _, content, _ in known
+        ])
+        
+        # Create embed for logging channel
+        embed = discord.Embed(
+            title="🗑️ Bulk Message Delete",
+            color=0xff0000,
+            timestamp=datetime.utcnow()
         )
         
-        await self.send_log(message.guild, embed)
+        embed.add_field(name="Channel", value=f"<#{payload.channel_id}>", inline=True)
+        embed.add_field(name="Messages", value=str(len(message_ids)), inline=True)
+        embed.add_field(name="Content Known", value=str(len(known)), inline=True)
+        
+        if known:
+            authors = Counter(author_id for _, author_id, _, _, _ in known)
+            embed.add_field(
+                name="Authors",
+                value=truncate_text("\n".join(f"<@{author_id}> ({author_id}): {count}" for author_id, count in authors.most_common(10)), 1024),
+                inline=False
+            )
+        
+        if known and self.logging_config(guild.id).get('bulk_delete_transcript', True):
+            transcript = self.build_transcript(known, len(message_ids) - len(known))
+            file = discord.File(io.BytesIO(transcript.encode('utf-8')), filename=f"deleted-{payload.channel_id}.txt")
+            await self.send_log_file(guild, embed, file)
+        else:
+            await self.send_log(guild, embed)
+    
+    @staticmethod
+    def build_transcript(messages: List[tuple], unknown: int) -> str:
+        """Plain-text transcript of deleted messages, oldest first"""
+        lines = []
+        for message_id, author_id, author, content, attachments in messages:
+            sent_at = discord.utils.snowflake_time(message_id)
+            line = f"[{sent_at:%Y-%m-%d %H:%M:%S}] {author or 'Unknown user'} ({author_id}): {content}"
+            if attachments:
+                line += f" [attachments: {attachments}]"
+            lines.append(line)
+        
+        if unknown:
+            lines.append(f"... and {unknown} messages whose content was not cached")
+        return "\n".join(lines)
     
     @commands.Cog.listener()
     async def on_message_edit(self, before: discord.Message, after: discord.Message):
         """Log edited messages"""
-        if not self.bot.config['logging']['events']['message_edit']:
+        if before.guild is None or before.author.bot:
             return
         
-        if before.guild is None or before.author.bot:
+        if not self.event_enabled(before.guild.id, 'message_edit'):
             return
         
         # Skip if content didn't change
         if before.content == after.content:
             return
         
+        await self.log_edited_message(
+            before.guild, before.channel.id, before.id, before.author.id,
+            before.content, after.content, after.jump_url, author=before.author
+        )
+    
+    @commands.Cog.listener()
+    async def on_raw_message_edit(self, payload: discord.RawMessageUpdateEvent):
+        """Log edits of messages that were no longer in discord.py's cache"""
+        if 'content' not in payload.data:
+            return  # Embed or pin update, not a content edit
+        
+        new_content = payload.data['content']
+        stored = self.content_store.get(payload.message_id)
+        if stored is None:
+            return
+        self.content_store.update(payload.message_id, new_content)
+        
+        if payload.cached_message is not None:
+            return  # on_message_edit handles it
+        
+        if not self.event_enabled(stored.guild_id, 'message_edit') or stored.content == new_content:
+            return
+        
+        guild = self.bot.get_guild(stored.guild_id)
+        if guild is None:
+            return
+        
+        jump_url = f"https://discord.com/channels/{guild.id}/{stored.channel_id}/{payload.message_id}"
+        await self.log_edited_message(
+            guild, stored.channel_id, payload.message_id, stored.author_id,
+            stored.content, new_content, jump_url, author=guild.get_member(stored.author_id)
+        )
+    
+    async def log_edited_message(self, guild: discord.Guild, channel_id: int, message_id: int, author_id: int,
+                                 before: str, after: str, jump_url: str, author: discord.abc.User = None):
+        """Log a message edit; author may be None if they are no longer cached"""
         # Log to database
         await self.bot.db.log_message_action(
-            before.guild.id, before.channel.id, before.id,
-            before.author.id, "edit", clean_content(before.content),
-            {"new_content": clean_content(after.content)}
+            guild.id, channel_id, message_id, author_id, "edit", clean_content(before),
+            {"new_content": clean_content(after)}
         )
         
         # Create embed for logging channel
@@ -115,45 +430,46 @@ class LoggingCog(commands.Cog, name="Logging"):
         
         embed.add_field(
             name="Author",
-            value=f"{before.author} ({before.author.id})",
+            value=f"{author} ({author_id})" if author else f"<@{author_id}> ({author_id})",
             inline=True
         )
         embed.add_field(
             name="Channel",
-            value=before.channel.mention,
+            value=f"<#{channel_id}>",
             inline=True
         )
         embed.add_field(
             name="Jump to Message",
-            value=f"[Click here]({after.jump_url})",
+            value=f"[Click here]({jump_url})",
             inline=True
         )
         
-        if before.content:
+        if before:
             embed.add_field(
                 name="Before",
-                value=truncate_text(clean_content(before.content), 512),
+                value=truncate_text(clean_content(before), 512),
                 inline=False
             )
         
-        if after.content:
+        if after:
             embed.add_field(
                 name="After",
-                value=truncate_text(clean_content(after.content), 512),
+                value=truncate_text(clean_content(after), 512),
                 inline=False
             )
         
-        embed.set_author(
-            name=before.author.display_name,
-            icon_url=before.author.display_avatar.url
-        )
+        if author:
+            embed.set_author(
+                name=author.display_name,
+                icon_url=author.display_avatar.url
+            )
         
-        await self.send_log(before.guild, embed)
+        await self.send_log(guild, embed)
     
     @commands.Cog.listener()
     async def on_member_join(self, member: discord.Member):
         """Log member joins"""
-        if not self.bot.config['logging']['events']['member_join']:
+        if not self.event_enabled(member.guild.id, 'member_join'):
             return
         
         embed = discord.Embed(
@@ -198,7 +514,7 @@ class LoggingCog(commands.Cog, name="Logging"):
     @commands.Cog.listener()
     async def on_member_remove(self, member: discord.Member):
         """Log member leaves"""
-        if not self.bot.config['logging']['events']['member_leave']:
+        if not self.event_enabled(member.guild.id, 'member_leave'):
             return
         
         embed = discord.Embed(
@@ -243,21 +559,17 @@ class LoggingCog(commands.Cog, name="Logging"):
     @commands.Cog.listener()
     async def on_member_ban(self, guild: discord.Guild, user: discord.User):
         """Log member bans"""
-        if not self.bot.config['logging']['events']['member_ban']:
+        if not self.event_enabled(guild.id, 'member_ban'):
             return
         
         # Try to get ban reason from audit log
         ban_reason = "Unknown"
         moderator = "Unknown"
         
-        try:
-            async for entry in guild.audit_logs(action=discord.AuditLogAction.ban, limit=5):
-                if entry.target == user:
-                    ban_reason = entry.reason or "No reason provided"
-                    moderator = entry.user
-                    break
-        except discord.Forbidden:
-            pass
+        found = await self.audit.lookup(guild, discord.AuditLogAction.ban, user.id)
+        if found is not None:
+            moderator, reason = found
+            ban_reason = reason or "No reason provided"
         
         embed = discord.Embed(
             title="🔨 Member Banned",
@@ -292,21 +604,17 @@ class LoggingCog(commands.Cog, name="Logging"):
     @commands.Cog.listener()
     async def on_member_unban(self, guild: discord.Guild, user: discord.User):
         """Log member unbans"""
-        if not self.bot.config['logging']['events']['member_unban']:
+        if not self.event_enabled(guild.id, 'member_unban'):
             return
         
         # Try to get unban reason from audit log
         unban_reason = "Unknown"
         moderator = "Unknown"
         
-        try:
-            async for entry in guild.audit_logs(action=discord.AuditLogAction.unban, limit=5):
-                if entry.target == user:
-                    unban_reason = entry.reason or "No reason provided"
-                    moderator = entry.user
-                    break
-        except discord.Forbidden:
-            pass
+        found = await self.audit.lookup(guild, discord.AuditLogAction.unban, user.id)
+        if found is not None:
+            moderator, reason = found
+            unban_reason = reason or "No reason provided"
         
         embed = discord.Embed(
             title="✅ Member Unbanned",
@@ -341,7 +649,7 @@ class LoggingCog(commands.Cog, name="Logging"):
     @commands.Cog.listener()
     async def on_guild_role_create(self, role: discord.Role):
         """Log role creation"""
-        if not self.bot.config['logging']['events']['role_create']:
+        if not self.event_enabled(role.guild.id, 'role_create'):
             return
         
         embed = discord.Embed(
@@ -361,7 +669,7 @@ class LoggingCog(commands.Cog, name="Logging"):
     @commands.Cog.listener()
     async def on_guild_role_delete(self, role: discord.Role):
         """Log role deletion"""
-        if not self.bot.config['logging']['events']['role_delete']:
+        if not self.event_enabled(role.guild.id, 'role_delete'):
             return
         
         embed = discord.Embed(
@@ -379,7 +687,9 @@ class LoggingCog(commands.Cog, name="Logging"):
     @commands.Cog.listener()
     async def on_guild_channel_create(self, channel):
         """Log channel creation"""
-        if not self.bot.config['logging']['events']['channel_create']:
+        self.invalidate_log_channel(channel.guild)
+        
+        if not self.event_enabled(channel.guild.id, 'channel_create'):
             return
         
         embed = discord.Embed(
@@ -399,7 +709,10 @@ class LoggingCog(commands.Cog, name="Logging"):
     @commands.Cog.listener()
     async def on_guild_channel_delete(self, channel):
         """Log channel deletion"""
-        if not self.bot.config['logging']['events']['channel_delete']:
+        self.invalidate_log_channel(channel.guild)
+        self.webhooks.pop(channel.id, None)
+        
+        if not self.event_enabled(channel.guild.id, 'channel_delete'):
             return
         
         embed = discord.Embed(
@@ -416,10 +729,16 @@ class LoggingCog(commands.Cog, name="Logging"):
         
         await self.send_log(channel.guild, embed)
     
+    @commands.Cog.listener()
+    async def on_guild_channel_update(self, before, after):
+        """Re-resolve the log channel when a channel is renamed"""
+        if before.name != after.name:
+            self.invalidate_log_channel(after.guild)
+    
     @commands.Cog.listener()
     async def on_voice_state_update(self, member: discord.Member, before: discord.VoiceState, after: discord.VoiceState):
         """Log voice state changes"""
-        if not self.bot.config['logging']['events']['voice_state_update']:
+        if not self.event_enabled(member.guild.id, 'voice_state_update'):
             return
         
         if before.channel == after.channel:
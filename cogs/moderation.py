@@ -90,7 +90,7 @@ class ModerationCog(commands.Cog, name="Moderation"):
         
         # Send DM notification
         dm_sent = False
-        if self.bot.config['moderation']['dm_on_punishment']:
+        if self.bot.guild_config.get(guild.id)['moderation']['dm_on_punishment']:
             dm_embed = discord.Embed(
                 title="🔨 You have been banned",
                 description=self.bot.messages['commands']['ban']['dm'].format(
@@ -109,6 +109,7 @@ class ModerationCog(commands.Cog, name="Moderation"):
         
         try:
             # Execute the ban
+            self.bot.expect_audit_entry(guild.id, discord.AuditLogAction.ban, user.id, moderator, reason)
             await guild.ban(user, reason=reason, delete_message_days=delete_messages)
             
             # Log the action
@@ -120,7 +121,7 @@ class ModerationCog(commands.Cog, name="Moderation"):
             
             # Add temporary action if applicable
             if temp_ban:
-                await self.bot.db.add_temp_action(guild.id, user.id, "tempban", expires_at)
+                await self.bot.add_temp_action(guild.id, user.id, "tempban", expires_at)
             
             # Log staff action
             await self.bot.db.log_staff_action(
@@ -221,6 +222,7 @@ class ModerationCog(commands.Cog, name="Moderation"):
         
         try:
             # Execute the unban
+            self.bot.expect_audit_entry(guild.id, discord.AuditLogAction.unban, banned_user.id, moderator, reason)
             await guild.unban(banned_user, reason=reason)
             
             # Log the action
@@ -287,7 +289,7 @@ class ModerationCog(commands.Cog, name="Moderation"):
         
         # Send DM notification
         dm_sent = False
-        if self.bot.config['moderation']['dm_on_punishment']:
+        if self.bot.guild_config.get(guild.id)['moderation']['dm_on_punishment']:
             dm_embed = discord.Embed(
                 title="👢 You have been kicked",
                 description=self.bot.messages['commands']['kick']['dm'].format(
@@ -389,7 +391,7 @@ class ModerationCog(commands.Cog, name="Moderation"):
         
         # Send DM notification
         dm_sent = False
-        if self.bot.config['moderation']['dm_on_punishment']:
+        if self.bot.guild_config.get(guild.id)['moderation']['dm_on_punishment']:
             dm_embed = discord.Embed(
                 title="🔇 You have been timed out",
                 description=self.bot.messages['commands']['timeout']['dm'].format(
@@ -413,7 +415,7 @@ class ModerationCog(commands.Cog, name="Moderation"):
             )
             
             # Add temporary action
-            await self.bot.db.add_temp_action(guild.id, user.id, "timeout", until)
+            await self.bot.add_temp_action(guild.id, user.id, "timeout", until)
             
             # Log staff action
             await self.bot.db.log_staff_action(
@@ -540,7 +542,8 @@ class ModerationCog(commands.Cog, name="Moderation"):
             
             # Get current warning count
             warning_count = await self.bot.db.get_warning_count(guild.id, user.id)
-            max_warnings = self.bot.config['bot']['max_warnings']
+            bot_config = self.bot.guild_config.get(guild.id)['bot']
+            max_warnings = bot_config['max_warnings']
             
             # Log the action
             await self.bot.db.log_mod_action(
@@ -555,7 +558,7 @@ class ModerationCog(commands.Cog, name="Moderation"):
             
             # Send DM notification
             dm_sent = False
-            if self.bot.config['moderation']['dm_on_punishment']:
+            if self.bot.guild_config.get(guild.id)['moderation']['dm_on_punishment']:
                 dm_embed = discord.Embed(
                     title="⚠️ You have been warned",
                     description=self.bot.messages['commands']['warn']['dm'].format(
@@ -571,7 +574,7 @@ class ModerationCog(commands.Cog, name="Moderation"):
             # Check if max warnings reached
             auto_punish = False
             if (warning_count >= max_warnings and 
-                self.bot.config['bot']['auto_punish_on_max_warnings']):
+                bot_config['auto_punish_on_max_warnings']):
                 
                 auto_punish = True
                 # Auto-timeout for 1 hour
@@ -659,7 +662,7 @@ class ModerationCog(commands.Cog, name="Moderation"):
             
             # Get updated warning count
             warning_count = await self.bot.db.get_warning_count(guild.id, user.id)
-            max_warnings = self.bot.config['bot']['max_warnings']
+            max_warnings = self.bot.guild_config.get(guild.id)['bot']['max_warnings']
             
             # Send success message
             message = self.bot.messages['commands']['unwarn']['success'].format(
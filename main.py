@@ -1,12 +1,16 @@
 import discord
-from discord.ext import commands, tasks
+from discord.ext import commands
 import yaml
 import logging
 import os
 import asyncio
+from collections import defaultdict
+from datetime import datetime, timedelta
 from utils.database import DatabaseManager
 from utils.helpers import load_config, load_messages
 from utils.permissions import PermissionManager
+from utils.scheduler import GroupedExecutor, TempActionScheduler
+from utils.settings import GuildConfig
 
 # Setup logging
 logging.basicConfig(
@@ -36,21 +40,49 @@ class ModerationBot(commands.Bot):
             command_prefix=self.config['bot']['prefix'],
             intents=intents,
             help_command=None,
-            case_insensitive=True
+            case_insensitive=True,
+            max_messages=self.config['bot'].get('max_messages', 1000)
         )
         
         # Initialize managers
-        self.db = DatabaseManager()
+        db_config = self.config.get('database', {})
+        self.db = DatabaseManager(
+            pool_size=db_config.get('pool_size', 4),
+            durability=db_config.get('durability', 'batched'),
+            batch_size=db_config.get('batch_size', 100),
+            flush_interval_ms=db_config.get('flush_interval_ms', 250),
+            storage=db_config.get('storage', {})
+        )
         self.permissions = PermissionManager(self)
+        self.guild_config = GuildConfig(self)
         
         # Store active timeouts and temporary actions
         self.temp_actions = {}
+        self.temp_action_scheduler = TempActionScheduler(self.process_expired_temp_actions)
+        # Task that loads pending actions and starts the scheduler once the bot is ready
+        self._temp_action_loader = None
+        temp_config = self.config.get('moderation', {}).get('temp_actions', {})
+        self.temp_action_executor = GroupedExecutor(
+            max_concurrency=temp_config.get('max_concurrency', 10),
+            per_group_concurrency=temp_config.get('per_guild_concurrency', 2)
+        )
         
     async def setup_hook(self):
         """Setup hook called when bot is starting up"""
         # Initialize database
         await self.db.initialize()
         
+        # Resolve the application owner(s) once, so owner checks never need an API call
+        try:
+            app_info = await self.application_info()
+            if app_info.team:
+                self.owner_ids = {member.id for member in app_info.team.members}
+            else:
+                self.owner_id = app_info.owner.id
+        except discord.HTTPException as e:
+            logger.error(f"Failed to fetch application info: {e}")
+        self.permissions.compile()
+        
         # Load cogs
         cogs_to_load = [
             'cogs.moderation',
@@ -68,8 +100,9 @@ class ModerationBot(commands.Bot):
             except Exception as e:
                 logger.error(f"Failed to load cog {cog}: {e}")
         
-        # Start background tasks
-        self.check_temp_actions.start()
+        # Start background tasks; keep the handle so the task isn't garbage-collected mid-run
+        self._temp_action_loader = asyncio.create_task(self.start_temp_action_scheduler())
+        self._temp_action_loader.add_done_callback(self._temp_action_loader_done)
         
         # Sync slash commands
         try:
@@ -94,8 +127,9 @@ class ModerationBot(commands.Bot):
         """Called when bot joins a new guild"""
         logger.info(f"Joined new guild: {guild.name} (ID: {guild.id})")
         
-        # Initialize guild in database
-        await self.db.setup_guild(guild.id)
+        # Initialize guild in database, keeping settings from an earlier stay
+        if not await self.db.get_guild_settings(guild.id):
+            await self.db.setup_guild(guild.id)
         
         # Send welcome message to system channel if available
         if guild.system_channel:
@@ -114,53 +148,152 @@ class ModerationBot(commands.Bot):
             except discord.Forbidden:
                 pass  # No permission to send messages
     
+    async def on_member_update(self, before: discord.Member, after: discord.Member):
+        """Drop the cached permission level when a member's roles change"""
+        if before.roles != after.roles:
+            self.permissions.invalidate_member(after)
+    
+    async def on_member_join(self, member: discord.Member):
+        """A member who rejoins starts from their new roles, not the level cached before they left"""
+        self.permissions.invalidate_member(member)
+    
+    async def on_member_remove(self, member: discord.Member):
+        self.permissions.invalidate_member(member)
+    
+    async def on_guild_update(self, before: discord.Guild, after: discord.Guild):
+        """Ownership transfers change who has implicit administrator permissions"""
+        if before.owner_id != after.owner_id:
+            self.permissions.invalidate_guild(after)
+    
+    async def on_guild_role_update(self, before: discord.Role, after: discord.Role):
+        """A role's permissions changing can change the level of everyone holding it"""
+        if before.permissions != after.permissions:
+            self.permissions.invalidate_guild(after.guild)
+    
+    async def on_guild_role_delete(self, role: discord.Role):
+        self.permissions.invalidate_guild(role.guild)
+    
+    async def on_config_reload(self):
+        """Recompile permission roles and drop merged guild configs after /reload"""
+        self.permissions.compile()
+        self.guild_config.invalidate()
+    
+    async def close(self):
+        """Shut down the bot and release database connections"""
+        if self._temp_action_loader is not None and not self._temp_action_loader.done():
+            self._temp_action_loader.cancel()
+            try:
+                await self._temp_action_loader
+            except asyncio.CancelledError:
+                pass
+        await self.temp_action_scheduler.stop()
+        await super().close()
+        await self.db.close()
+    
     async def on_error(self, event, *args, **kwargs):
         """Global error handler"""
         logger.error(f"Error in event {event}", exc_info=True)
     
-    @tasks.loop(minutes=1)
-    async def check_temp_actions(self):
-        """Check and remove expired temporary actions"""
+    def expect_audit_entry(self, guild_id: int, action: discord.AuditLogAction, target_id: int,
+                           moderator, reason: str):
+        """Tell the Logging cog about an action the bot is about to perform, skipping its audit log lookup"""
+        logging_cog = self.get_cog("Logging")
+        if logging_cog is not None:
+            logging_cog.audit.record(guild_id, action, target_id, moderator, reason)
+    
+    async def add_temp_action(self, guild_id: int, user_id: int, action_type: str, 
+                              expires_at: datetime) -> int:
+        """Store a temporary action and schedule it for its exact expiry time"""
+        action_id = await self.db.add_temp_action(guild_id, user_id, action_type, expires_at)
+        self.temp_action_scheduler.schedule({
+            'id': action_id,
+            'guild_id': guild_id,
+            'user_id': user_id,
+            'action_type': action_type,
+            'expires_at': expires_at
+        })
+        return action_id
+    
+    async def start_temp_action_scheduler(self):
+        """Load pending temporary actions and start the scheduler once the bot is ready"""
+        await self.wait_until_ready()
+        
         try:
-            expired_actions = await self.db.get_expired_temp_actions()
-            
-            for action in expired_actions:
-                guild = self.get_guild(action['guild_id'])
-                if not guild:
-                    continue
-                
-                user = guild.get_member(action['user_id'])
-                if not user:
-                    continue
-                
-                action_type = action['action_type']
-                
-                if action_type == 'timeout' and user.timed_out_until:
-                    try:
-                        await user.timeout(None, reason="Temporary timeout expired")
-                        logger.info(f"Removed timeout for {user} in {guild}")
-                    except discord.Forbidden:
-                        logger.warning(f"No permission to remove timeout for {user} in {guild}")
-                
-                elif action_type == 'tempban':
-                    try:
-                        await guild.unban(user, reason="Temporary ban expired")
-                        logger.info(f"Unbanned {user} from {guild}")
-                    except discord.NotFound:
-                        pass  # User already unbanned
-                    except discord.Forbidden:
-                        logger.warning(f"No permission to unban {user} from {guild}")
-                
-                # Mark action as completed
-                await self.db.complete_temp_action(action['id'])
-                
+            pending_actions = await self.db.get_pending_temp_actions()
+            for action in pending_actions:
+                self.temp_action_scheduler.schedule(action)
+            logger.info(f"Scheduled {len(pending_actions)} pending temporary actions")
         except Exception as e:
-            logger.error(f"Error in check_temp_actions: {e}")
+            logger.error(f"Error loading pending temporary actions: {e}")
+        
+        self.temp_action_scheduler.start()
     
-    @check_temp_actions.before_loop
-    async def before_check_temp_actions(self):
-        """Wait until bot is ready before starting the task"""
-        await self.wait_until_ready()
+    def _temp_action_loader_done(self, task: asyncio.Task):
+        """Log a failure of the startup task, which nothing else awaits"""
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("Temporary action scheduler failed to start", exc_info=task.exception())
+    
+    async def process_expired_temp_actions(self, expired_actions):
+        """Remove expired temporary actions (called by the scheduler)
+        
+        Actions run concurrently, grouped per guild, and every finished action
+        is marked completed with a single batched UPDATE.
+        """
+        actions_by_guild = defaultdict(list)
+        for action in expired_actions:
+            actions_by_guild[action['guild_id']].append(action)
+        
+        results = await self.temp_action_executor.run(actions_by_guild, self.expire_temp_action)
+        
+        completed_ids = []
+        for action, done in results:
+            if done is True:
+                completed_ids.append(action['id'])
+            else:
+                # Guild unavailable or transient API error: try again shortly
+                self.temp_action_scheduler.schedule(
+                    dict(action, expires_at=datetime.now() + timedelta(minutes=1))
+                )
+        
+        await self.db.complete_temp_actions(completed_ids)
+    
+    async def expire_temp_action(self, guild_id: int, action) -> bool:
+        """Undo a single expired temporary action, returning True once it is finished"""
+        guild = self.get_guild(guild_id)
+        if guild is None:
+            # The bot has left the guild; there is nothing left to undo
+            logger.info(f"Dropping expired {action['action_type']} for {action['user_id']} in departed guild {guild_id}")
+            return True
+        if guild.unavailable:
+            return False  # Outage: retry shortly
+        
+        user_id = action['user_id']
+        action_type = action['action_type']
+        
+        if action_type == 'timeout':
+            # Discord lifts timeouts on its own; only clear it early if the member is cached
+            member = guild.get_member(user_id)
+            if member and member.timed_out_until:
+                try:
+                    await member.timeout(None, reason="Temporary timeout expired")
+                    logger.info(f"Removed timeout for {member} in {guild}")
+                except discord.NotFound:
+                    pass  # Member left the guild
+                except discord.Forbidden:
+                    logger.warning(f"No permission to remove timeout for {member} in {guild}")
+        
+        elif action_type == 'tempban':
+            # Banned users are not members, so unban by ID without a member lookup
+            try:
+                self.expect_audit_entry(guild.id, discord.AuditLogAction.unban, user_id, self.user, "Temporary ban expired")
+                await guild.unban(discord.Object(id=user_id), reason="Temporary ban expired")
+                logger.info(f"Unbanned {user_id} from {guild}")
+            except discord.NotFound:
+                pass  # User already unbanned
+            except discord.Forbidden:
+                logger.warning(f"No permission to unban {user_id} from {guild}")
+        
+        return True
 
 async def main():
     """Main function to run the bot"""
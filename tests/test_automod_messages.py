@@ -0,0 +1,19 @@
+import os
+
+import pytest
+import yaml
+
+from utils.automod import AutoModRule
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def all_rules(cls=AutoModRule):
+    for subclass in cls.__subclasses__():
+        yield subclass
+        yield from all_rules(subclass)
+
+@pytest.mark.parametrize("rule", [rule for rule in all_rules() if rule.section], ids=lambda rule: rule.__name__)
+def test_every_rule_has_a_channel_warning(rule):
+    with open(os.path.join(ROOT, "messages.yml"), encoding="utf-8") as f:
+        messages = yaml.safe_load(f)
+    assert rule.message_key in messages['automod'].get(rule.section, {})
@@ -0,0 +1,95 @@
+import os
+from types import SimpleNamespace
+
+import pytest
+import yaml
+
+from utils.automod import BadWordsRule, MessageContext
+from utils.text import normalize_text
+
+# Everyday English, with the punctuation, numbers and doubled letters ordinary chat is full of
+PLAIN_ENGLISH = [
+    "what was that?",
+    "I will follow you",
+    "hello everyone, how are you all doing today?",
+    "Hell yeah!!! that was awesome",
+    "Wow!! That's amazing!!!",
+    "see you at 10:30, room 101",
+    "it costs $5, or 4 for $15",
+    "as soon as possible please",
+    "that's a classic mistake, don't be a fool about it",
+    "I passed the assessment with 100% :)",
+    "the class was good | the assignment was hard",
+    "2 + 2 = 4",
+    "she shall pass the glass to the bass player",
+    "look at all those balloons in the hallway",
+    "mississippi is a long word",
+    "Good luck!!! You've got this!!!",
+    "follow the guidelines in #rules",
+    "my email is someone@example.com",
+    "Shell scripts are useful for assorted tasks",
+    "the committee will reassess the proposal tomorrow",
+    "I bought 3 apples and 7 oranges",
+    "The football game was cool",
+    "brb, grabbing coffee",
+    "Is anyone else having trouble logging in?",
+    "soooo tired today",
+]
+
+# Short words that are easy to corrupt into substrings of ordinary text
+TRICKY_WORDS = ["ass", "fool", "hell", "bass", "pass", "example_bad_word"]
+
+def old_loop(words, content):
+    """The original check: case-insensitive substring search of the raw content"""
+    return {word for word in words if word.lower() in content.lower()}
+
+def flagged(rule, content):
+    message = SimpleNamespace(
+        content=content,
+        author=SimpleNamespace(id=1),
+        channel=SimpleNamespace(id=2),
+        guild=SimpleNamespace(id=3)
+    )
+    verdict = rule.check(MessageContext(message))
+    if verdict is None:
+        return set()
+    return {word for word in rule.originals.values() if word in verdict.reason}
+
+@pytest.fixture(scope="module")
+def default_config():
+    config_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "config.yml")
+    with open(config_path, encoding="utf-8") as f:
+        return yaml.safe_load(f)['moderation']['bad_words']
+
+@pytest.mark.parametrize("content", PLAIN_ENGLISH)
+def test_default_config_flags_nothing_new(default_config, content):
+    rule = BadWordsRule(default_config)
+    assert flagged(rule, content) <= old_loop(default_config.get('words', []), content)
+
+@pytest.mark.parametrize("match", ["substring", "whole_word"])
+@pytest.mark.parametrize("content", PLAIN_ENGLISH)
+def test_short_words_flag_nothing_new(match, content):
+    rule = BadWordsRule({"words": TRICKY_WORDS, "match": match})
+    assert flagged(rule, content) <= old_loop(TRICKY_WORDS, content)
+
+@pytest.mark.parametrize("content", ["what was that?", "I will follow you", "as soon as possible please"])
+def test_doubled_letters_are_kept(content):
+    rule = BadWordsRule({"words": ["ass", "fool"]})
+    assert flagged(rule, content) == set()
+
+@pytest.mark.parametrize("content, word", [
+    ("you 4ss", "ass"),
+    ("a$$hole", "ass"),
+    ("fooooool", "fool"),
+    ("f\u200boo\u200bl", "fool"),
+    ("FOOL", "fool"),
+])
+def test_obfuscated_words_are_still_caught(content, word):
+    rule = BadWordsRule({"words": ["ass", "fool"]})
+    assert word in flagged(rule, content)
+
+@pytest.mark.parametrize("content", ["l8", "see you l8r", "that was gr8"])
+def test_eight_is_not_leetspeak(content):
+    assert normalize_text(content) == content
+    rule = BadWordsRule({"words": ["lb", "grb"]})
+    assert flagged(rule, content) == set()
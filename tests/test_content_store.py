@@ -0,0 +1,23 @@
+from utils.cache import MessageContentStore
+
+def test_uncompressed_content_counts_utf8_bytes():
+    store = MessageContentStore(compress_threshold=128)
+    content = "héllo 👋"  # 7 characters, 11 bytes
+    store.put(1, 100, 10, 5, content)
+    assert store.bytes == len(content.encode('utf-8'))
+    
+    store.update(1, "plain")
+    assert store.bytes == 5
+    
+    store.pop(1)
+    assert store.bytes == 0
+
+def test_byte_limit_applies_to_multibyte_content():
+    # Each message is 40 characters but 160 bytes, so only two fit in 400 bytes
+    store = MessageContentStore(max_bytes=400, compress_threshold=1000)
+    for message_id in range(5):
+        store.put(message_id, 100, 10, 5, "😀" * 40)
+    
+    assert len(store) == 2
+    assert 1 not in store and 4 in store
+    assert store.bytes == 320
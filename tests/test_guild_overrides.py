@@ -0,0 +1,61 @@
+import asyncio
+import os
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import yaml
+
+from cogs.moderation import ModerationCog
+from utils.settings import GuildConfig
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def load(name):
+    with open(os.path.join(ROOT, name), encoding="utf-8") as f:
+        return yaml.safe_load(f)
+
+def make_bot(overrides, warning_count):
+    db = SimpleNamespace(
+        cached_guild_settings=lambda guild_id: overrides.get(guild_id, {}),
+        add_warning=AsyncMock(),
+        get_warning_count=AsyncMock(return_value=warning_count),
+        log_mod_action=AsyncMock(),
+        log_staff_action=AsyncMock()
+    )
+    bot = SimpleNamespace(config=load("config.yml"), messages=load("messages.yml"), db=db, user=SimpleNamespace(id=999))
+    bot.guild_config = GuildConfig(bot)
+    return bot
+
+def warn(bot, guild_id):
+    member = MagicMock(id=42, display_name="target")
+    member.timeout = AsyncMock()
+    member.send = AsyncMock()
+    interaction = SimpleNamespace(
+        guild=SimpleNamespace(id=guild_id, name="Guild"),
+        user=SimpleNamespace(id=7, mention="<@7>"),
+        channel=SimpleNamespace(id=10),
+        response=SimpleNamespace(defer=AsyncMock()),
+        followup=SimpleNamespace(send=AsyncMock())
+    )
+    asyncio.run(ModerationCog.warn.callback(ModerationCog(bot), interaction, member, "reason"))
+    return member, interaction
+
+def test_warn_escalates_at_the_guild_max_warnings():
+    # config.yml allows 3 warnings; guild 1 lowers it to 2
+    bot = make_bot({1: {'bot': {'max_warnings': 2}}}, warning_count=2)
+    
+    member, interaction = warn(bot, guild_id=1)
+    member.timeout.assert_awaited_once()
+    embed = interaction.followup.send.await_args.kwargs['embed']
+    assert any(field.value == "2/2" for field in embed.fields)
+    
+    member, _ = warn(bot, guild_id=2)
+    member.timeout.assert_not_awaited()
+
+def test_warn_respects_guild_auto_punish_and_dm_settings():
+    overrides = {1: {'bot': {'auto_punish_on_max_warnings': False}, 'moderation': {'dm_on_punishment': False}}}
+    bot = make_bot(overrides, warning_count=5)
+    
+    member, _ = warn(bot, guild_id=1)
+    member.timeout.assert_not_awaited()
+    member.send.assert_not_awaited()
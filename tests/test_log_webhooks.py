@@ -0,0 +1,114 @@
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import discord
+
+from cogs.logging import LoggingCog, WEBHOOK_NAME
+
+def http_error(error, status, reason):
+    return error(SimpleNamespace(status=status, reason=reason), reason)
+
+def make_cog(delivery="webhook"):
+    config = {'logging': {'delivery': delivery, 'events': {}}}
+    user = SimpleNamespace(display_name="ModBot", display_avatar=SimpleNamespace(url="https://example.com/a.png"))
+    bot = SimpleNamespace(config=config, guild_config=SimpleNamespace(get=lambda guild_id: config), user=user)
+    return LoggingCog(bot)
+
+def make_webhook(bot_user, name=WEBHOOK_NAME, token="token"):
+    webhook = MagicMock()
+    webhook.name = name
+    webhook.user = bot_user
+    webhook.token = token
+    webhook.send = AsyncMock()
+    return webhook
+
+def make_channel(existing=(), created=None):
+    channel = MagicMock()
+    channel.id = 10
+    channel.guild = SimpleNamespace(id=1, name="Test Guild")
+    channel.webhooks = AsyncMock(return_value=list(existing))
+    channel.create_webhook = AsyncMock(return_value=created)
+    channel.send = AsyncMock()
+    return channel
+
+def test_creates_webhook_on_first_batch():
+    cog = make_cog()
+    created = make_webhook(cog.bot.user)
+    channel = make_channel(created=created)
+    embeds = [discord.Embed(title="one")]
+    
+    asyncio.run(cog.deliver(channel, embeds))
+    
+    channel.create_webhook.assert_awaited_once()
+    assert channel.create_webhook.await_args.kwargs['name'] == WEBHOOK_NAME
+    created.send.assert_awaited_once()
+    assert created.send.await_args.kwargs['embeds'] == embeds
+    assert created.send.await_args.kwargs['username'] == "ModBot"
+    channel.send.assert_not_awaited()
+
+def test_reuses_existing_and_cached_webhook():
+    cog = make_cog()
+    other = make_webhook(SimpleNamespace(), name=WEBHOOK_NAME)
+    ours = make_webhook(cog.bot.user)
+    channel = make_channel(existing=[other, ours])
+    
+    async def scenario():
+        await cog.deliver(channel, [discord.Embed(title="one")])
+        await cog.deliver(channel, [discord.Embed(title="two")])
+    
+    asyncio.run(scenario())
+    
+    # The bot's own webhook is found once, then served from the cache
+    channel.webhooks.assert_awaited_once()
+    channel.create_webhook.assert_not_awaited()
+    assert ours.send.await_count == 2
+    other.send.assert_not_awaited()
+    channel.send.assert_not_awaited()
+
+def test_falls_back_to_channel_without_manage_webhooks():
+    cog = make_cog()
+    channel = make_channel()
+    channel.webhooks.side_effect = http_error(discord.Forbidden, 403, "Missing Permissions")
+    
+    async def scenario():
+        await cog.deliver(channel, [discord.Embed(title="one")])
+        await cog.deliver(channel, [discord.Embed(title="two")])
+    
+    asyncio.run(scenario())
+    
+    assert channel.send.await_count == 2
+    # The missing permission is remembered instead of retried every batch
+    channel.webhooks.assert_awaited_once()
+    assert cog.webhooks[channel.id] is None
+
+def test_recreates_webhook_after_it_is_deleted():
+    cog = make_cog()
+    deleted = make_webhook(cog.bot.user)
+    deleted.send.side_effect = http_error(discord.NotFound, 404, "Unknown Webhook")
+    replacement = make_webhook(cog.bot.user)
+    channel = make_channel(existing=[deleted])
+    
+    async def scenario():
+        await cog.deliver(channel, [discord.Embed(title="one")])
+        assert channel.id not in cog.webhooks
+        channel.webhooks.return_value = []
+        channel.create_webhook.return_value = replacement
+        await cog.deliver(channel, [discord.Embed(title="two")])
+    
+    asyncio.run(scenario())
+    
+    # The failed batch still reaches the channel, and the next one uses a new webhook
+    channel.send.assert_awaited_once()
+    channel.create_webhook.assert_awaited_once()
+    replacement.send.assert_awaited_once()
+    assert cog.webhooks[channel.id] is replacement
+
+def test_channel_delivery_skips_webhooks():
+    cog = make_cog(delivery="channel")
+    channel = make_channel()
+    
+    asyncio.run(cog.deliver(channel, [discord.Embed(title="one")]))
+    
+    channel.send.assert_awaited_once()
+    channel.webhooks.assert_not_awaited()
@@ -0,0 +1,61 @@
+import asyncio
+import importlib
+from types import SimpleNamespace
+
+import pytest
+
+from utils.permissions import LEVELS, PermissionManager
+
+MODERATOR_ROLE = 500
+
+@pytest.fixture
+def bot_listeners(tmp_path, monkeypatch):
+    """ModerationBot with its event handlers, imported where its log file can't land in the repo"""
+    monkeypatch.chdir(tmp_path)
+    return importlib.import_module("main").ModerationBot
+
+def make_bot():
+    config = {'bot': {'owners': []}, 'permissions': {'moderator_roles': [MODERATOR_ROLE]}}
+    bot = SimpleNamespace(config=config, owner_id=None, owner_ids=None)
+    bot.permissions = PermissionManager(bot)
+    return bot
+
+def member(role_ids=(), administrator=False, guild=None):
+    return SimpleNamespace(
+        id=42,
+        guild=guild or SimpleNamespace(id=1, owner_id=7),
+        roles=[SimpleNamespace(id=role_id) for role_id in role_ids],
+        guild_permissions=SimpleNamespace(administrator=administrator)
+    )
+
+def test_rejoining_member_loses_cached_staff_level(bot_listeners):
+    bot = make_bot()
+    staff = member([MODERATOR_ROLE])
+    assert bot.permissions.get_level(staff) == LEVELS["moderator"]
+    
+    # Kicked, then rejoins without any roles
+    asyncio.run(bot_listeners.on_member_remove(bot, staff))
+    rejoined = member()
+    asyncio.run(bot_listeners.on_member_join(bot, rejoined))
+    
+    assert bot.permissions.get_level(rejoined) == LEVELS["user"]
+    assert not bot.permissions.is_moderator(rejoined)
+
+def test_rejoin_without_leave_event_still_recomputes(bot_listeners):
+    bot = make_bot()
+    assert bot.permissions.get_level(member([MODERATOR_ROLE])) == LEVELS["moderator"]
+    
+    # The remove event can be missed (e.g. while disconnected); the join alone is enough
+    rejoined = member()
+    asyncio.run(bot_listeners.on_member_join(bot, rejoined))
+    assert bot.permissions.get_level(rejoined) == LEVELS["user"]
+
+def test_ownership_transfer_invalidates_the_guild(bot_listeners):
+    bot = make_bot()
+    before = SimpleNamespace(id=1, owner_id=7)
+    after = SimpleNamespace(id=1, owner_id=42)
+    assert bot.permissions.get_level(member(guild=before)) == LEVELS["user"]
+    
+    asyncio.run(bot_listeners.on_guild_update(bot, before, after))
+    # The new owner gets administrator implicitly
+    assert bot.permissions.get_level(member(administrator=True, guild=after)) == LEVELS["admin"]
@@ -0,0 +1,61 @@
+import asyncio
+import sqlite3
+
+import pytest
+
+from utils.database import DatabaseManager
+
+# Each case calls a read method; the SELECT it runs is captured with a trace
+# callback, so the plans below are for the exact SQL the bot sends.
+QUERY_PATHS = {
+    "user_history": lambda db: db.get_user_history(1, 2),
+    "user_history_page": lambda db: db.get_user_history_page(1, 2),
+    "user_history_page_before": lambda db: db.get_user_history_page(1, 2, before=("2024-01-01 00:00:00", 50)),
+    "user_history_page_after": lambda db: db.get_user_history_page(1, 2, after=("2024-01-01 00:00:00", 50)),
+    "user_history_oldest": lambda db: db.get_user_history_page(1, 2, oldest=True),
+    "user_history_count": lambda db: db.count_user_history(1, 2),
+    "warnings": lambda db: db.get_warnings(1, 2),
+    "warning_count": lambda db: db.get_warning_count(1, 2),
+    "staff_logs": lambda db: db.get_staff_logs(1),
+    "staff_logs_by_staff": lambda db: db.get_staff_logs(1, staff_id=3),
+    "automod_violations": lambda db: db.get_automod_violations(1),
+    "automod_violations_by_user": lambda db: db.get_automod_violations(1, user_id=2),
+    "automod_violations_by_type": lambda db: db.get_automod_violations(1, violation_type="spam"),
+    "expired_temp_actions": lambda db: db.get_expired_temp_actions(),
+    "pending_temp_actions": lambda db: db.get_pending_temp_actions(),
+}
+
+def capture_queries(path, call):
+    """Run one read method against a fresh database and return the SELECTs it executed"""
+    statements = []
+    
+    async def scenario():
+        db = DatabaseManager(db_path=path)
+        await db.initialize()
+        try:
+            for connection in db._reader_connections:
+                await connection.set_trace_callback(statements.append)
+            await call(db)
+        finally:
+            await db.close()
+    
+    asyncio.run(scenario())
+    return [sql for sql in statements if sql.lstrip().upper().startswith("SELECT")]
+
+@pytest.mark.parametrize("name", sorted(QUERY_PATHS))
+def test_query_uses_index(tmp_path, name):
+    path = str(tmp_path / "test.db")
+    queries = capture_queries(path, QUERY_PATHS[name])
+    assert queries, f"{name} ran no SELECT"
+    
+    connection = sqlite3.connect(path)
+    try:
+        for sql in queries:
+            plan = [row[3] for row in connection.execute(f"EXPLAIN QUERY PLAN {sql}")]
+            details = "\n".join(plan)
+            assert any("USING INDEX" in step or "USING COVERING INDEX" in step for step in plan), details
+            # Walking a partial index (SCAN ... USING INDEX) is fine; a bare table scan is not
+            assert not any(step.startswith("SCAN") and "USING" not in step for step in plan), details
+            assert not any("TEMP B-TREE" in step for step in plan), details
+    finally:
+        connection.close()
@@ -0,0 +1,56 @@
+import asyncio
+import os
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import yaml
+
+from cogs.automod import AutoModerationCog
+from utils.automod import MessageContext
+from utils.settings import GuildConfig
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def make_cog():
+    with open(os.path.join(ROOT, "config.yml"), encoding="utf-8") as f:
+        config = yaml.safe_load(f)
+    config['moderation']['raid'].update(enabled=True, accounts=6, channels=6)
+    bot = SimpleNamespace(config=config, db=SimpleNamespace(cached_guild_settings=lambda guild_id: {}))
+    bot.guild_config = GuildConfig(bot)
+    cog = AutoModerationCog(bot)
+    cog.raid_responder.submit = MagicMock()
+    return cog
+
+def message(content, author_id, channel_id, message_id):
+    return SimpleNamespace(
+        id=message_id,
+        content=content,
+        author=SimpleNamespace(id=author_id, bot=False, display_name=f"user{author_id}"),
+        channel=SimpleNamespace(id=channel_id),
+        guild=SimpleNamespace(id=1)
+    )
+
+def replay(cog, contents):
+    async def scenario():
+        for i, content in enumerate(contents):
+            await cog.on_message(message(content, author_id=100 + i, channel_id=10 + i, message_id=i))
+    asyncio.run(scenario())
+
+def test_mention_only_messages_have_an_empty_payload():
+    for content in ("<@123456789012345678>", "<@!1> <@&2>  <#3>", "@everyone", "@here @everyone"):
+        assert MessageContext(message(content, 1, 1, 1)).payload == ""
+
+def test_bare_pings_from_many_accounts_are_not_a_raid():
+    cog = make_cog()
+    replay(cog, [f"<@{10 ** 17 + i}>" for i in range(6)] + ["@everyone"] * 6)
+    
+    cog.raid_responder.submit.assert_not_called()
+    assert not cog.raid_index.guilds
+
+def test_same_payload_with_different_pings_is_still_a_raid():
+    cog = make_cog()
+    replay(cog, [f"<@{10 ** 17 + i}> free nitro for everyone, claim it now" for i in range(6)])
+    
+    cog.raid_responder.submit.assert_called_once()
+    entries = cog.raid_responder.submit.call_args.args[1]
+    assert len(entries) == 6
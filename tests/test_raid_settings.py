@@ -0,0 +1,52 @@
+import asyncio
+import copy
+import os
+from types import SimpleNamespace
+
+import yaml
+
+from cogs.automod import AutoModerationCog
+from utils.settings import GuildConfig
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def make_cog(overrides):
+    with open(os.path.join(ROOT, "config.yml"), encoding="utf-8") as f:
+        config = yaml.safe_load(f)
+    bot = SimpleNamespace(
+        config=config,
+        db=SimpleNamespace(cached_guild_settings=lambda guild_id: overrides.get(guild_id, {}))
+    )
+    bot.guild_config = GuildConfig(bot)
+    return AutoModerationCog(bot)
+
+def test_guilds_without_raid_overrides_share_the_global_settings():
+    cog = make_cog({})
+    assert cog.raid_for(1) == (cog.raid_config, None)
+    assert cog.raid_for(2)[1] is cog.raid_index
+
+def test_guild_can_enable_raid_detection_with_its_own_thresholds():
+    overrides = {2: {'moderation': {'raid': {'enabled': True, 'accounts': 5}}}}
+    cog = make_cog(overrides)
+    
+    config, index = cog.raid_for(2)
+    assert config['accounts'] == 5
+    assert index is not None and index.accounts == 5
+    # Settings the guild doesn't override come from config.yml
+    assert index.channels == cog.bot.config['moderation']['raid']['channels']
+    
+    # Other guilds keep the shipped default (disabled)
+    assert cog.raid_for(1)[1] is None
+
+def test_settings_update_rebuilds_the_guilds_raid_index():
+    overrides = {2: {'moderation': {'raid': {'enabled': True}}}}
+    cog = make_cog(overrides)
+    first = cog.raid_for(2)[1]
+    
+    overrides[2] = copy.deepcopy(overrides[2])
+    overrides[2]['moderation']['raid']['enabled'] = False
+    cog.bot.guild_config.invalidate(2)
+    asyncio.run(cog.on_guild_settings_update(2))
+    
+    assert first is not None
+    assert cog.raid_for(2)[1] is None
@@ -0,0 +1,41 @@
+import os
+from types import SimpleNamespace
+
+import yaml
+
+from utils.automod import MessageContext, RepeatedTextRule
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def make_rule():
+    with open(os.path.join(ROOT, "config.yml"), encoding="utf-8") as f:
+        return RepeatedTextRule(yaml.safe_load(f)['moderation']['repeated_text'])
+
+def check(rule, content, author_id, channel_id=10):
+    message = SimpleNamespace(
+        id=0,
+        content=content,
+        author=SimpleNamespace(id=author_id, bot=False),
+        channel=SimpleNamespace(id=channel_id),
+        guild=SimpleNamespace(id=1)
+    )
+    return rule.check(MessageContext(message))
+
+def test_different_users_sharing_a_line_are_not_warned():
+    rule = make_rule()
+    assert check(rule, "Good morning everyone!", author_id=1) is None
+    assert check(rule, "Good morning everyone!", author_id=2) is None
+
+def test_user_repeating_themselves_is_warned_across_channels():
+    rule = make_rule()
+    assert check(rule, "Good morning everyone!", author_id=1, channel_id=10) is None
+    for i in range(20):
+        check(rule, f"unrelated chatter number {i} here", author_id=2, channel_id=10)
+    verdict = check(rule, "Good morning everyone!!", author_id=1, channel_id=11)
+    assert verdict is not None and verdict.violation_type == "Repeated Text"
+
+def test_burst_from_several_authors_is_a_flood():
+    rule = make_rule()
+    results = [check(rule, "join my server for free stuff", author_id=author_id) for author_id in (1, 2, 3)]
+    assert results[0] is None and results[1] is None
+    assert results[2] is not None
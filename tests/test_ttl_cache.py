@@ -0,0 +1,52 @@
+import asyncio
+
+import pytest
+
+from utils.cache import AsyncTTLCache
+
+def test_cancelling_the_first_caller_does_not_cancel_coalesced_waiters():
+    async def scenario():
+        cache = AsyncTTLCache()
+        release = asyncio.Event()
+        calls = 0
+        
+        async def fetch():
+            nonlocal calls
+            calls += 1
+            await release.wait()
+            return "guild"
+        
+        first = asyncio.create_task(cache.get_or_fetch("abc", fetch))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(cache.get_or_fetch("abc", fetch))
+        await asyncio.sleep(0)
+        
+        first.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        
+        assert await second == "guild"
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        assert calls == 1
+        assert cache.get("abc") == "guild"
+        assert cache.stats["coalesced"] == 1
+    
+    asyncio.run(scenario())
+
+def test_failed_fetch_reaches_every_waiter_and_is_not_cached():
+    async def scenario():
+        cache = AsyncTTLCache()
+        
+        async def fetch():
+            await asyncio.sleep(0)
+            raise RuntimeError("rate limited")
+        
+        results = await asyncio.gather(
+            cache.get_or_fetch("abc", fetch), cache.get_or_fetch("abc", fetch), return_exceptions=True
+        )
+        assert all(isinstance(result, RuntimeError) for result in results)
+        assert cache.get("abc", "missing") == "missing"
+        assert not cache._inflight
+    
+    asyncio.run(scenario())
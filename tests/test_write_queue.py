@@ -0,0 +1,44 @@
+import asyncio
+import logging
+import sqlite3
+
+from utils.database import DatabaseManager
+
+def run(coro):
+    return asyncio.run(coro)
+
+def test_bad_job_only_drops_itself(tmp_path, caplog):
+    path = str(tmp_path / "test.db")
+    
+    async def scenario():
+        db = DatabaseManager(db_path=path, durability="batched", batch_size=100, flush_interval_ms=50)
+        await db.initialize()
+        try:
+            for user_id in range(10):
+                await db.log_mod_action(1, user_id, 99, "warn", "ok")
+            # action_type is NOT NULL, so this job fails inside the same group commit
+            await db.log_mod_action(1, 10, 99, None, "bad")
+            for user_id in range(11, 20):
+                await db.log_mod_action(1, user_id, 99, "kick", "ok")
+            await db.flush()
+        finally:
+            await db.close()
+    
+    with caplog.at_level(logging.WARNING, logger="utils.database"):
+        run(scenario())
+    
+    connection = sqlite3.connect(path)
+    users = [row[0] for row in connection.execute("SELECT user_id FROM mod_history ORDER BY user_id")]
+    assert users == [user_id for user_id in range(20) if user_id != 10]
+    
+    # The failed job's statistics were rolled back with it
+    counts = dict(connection.execute(
+        "SELECT dimension, count FROM stat_counters WHERE metric = 'mod_action'"
+    ).fetchall())
+    assert counts == {"warn": 10, "kick": 9}
+    connection.close()
+    
+    assert any("retrying them one by one" in record.getMessage() for record in caplog.records)
+    dropped = [record for record in caplog.records if "Dropped queued write" in record.getMessage()]
+    assert len(dropped) == 1
+    assert "mod_history" in dropped[0].getMessage()
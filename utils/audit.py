@@ -0,0 +1,142 @@
+import asyncio
+import discord
+import logging
+import time
+from datetime import timedelta
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+class AuditLogCorrelator:
+    """Matches member events to audit log entries with shared, incremental fetches
+    
+    Entries are fetched per (guild, action), indexed by target ID and kept for
+    `ttl` seconds. Concurrent lookups share one in-flight fetch, later fetches
+    only ask for entries newer than the last one seen, and fetches for the same
+    guild and action are at least `poll_interval` apart. An event that arrives
+    before its audit entry is written waits up to `wait` seconds for it.
+    Actions the bot issues itself can be recorded up front to skip the audit
+    log entirely.
+    """
+    
+    def __init__(self, wait: float = 3.0, poll_interval: float = 0.5, ttl: float = 60.0, fetch_limit: int = 100):
+        self.wait = wait
+        self.poll_interval = poll_interval
+        self.ttl = ttl
+        self.fetch_limit = fetch_limit
+        
+        # (guild_id, action) -> target_id -> (expires_at, moderator, reason, issued_by_bot)
+        self._entries: Dict[tuple, Dict[int, tuple]] = {}
+        self._last_entry_id: Dict[tuple, int] = {}
+        self._fetched_at: Dict[tuple, float] = {}
+        self._inflight: Dict[tuple, asyncio.Future] = {}
+        # Guild ID -> time until which audit log access is assumed missing
+        self._forbidden: Dict[int, float] = {}
+        
+        self.fetches = 0
+        self.hits = 0
+        self.issued_hits = 0
+    
+    def record(self, guild_id: int, action: discord.AuditLogAction, target_id: int, moderator: Any, reason: str):
+        """Remember an action the bot is about to perform, so its event needs no audit log fetch"""
+        entries = self._entries.setdefault((guild_id, action), {})
+        entries[target_id] = (time.monotonic() + self.ttl, moderator, reason, True)
+    
+    async def lookup(self, guild: discord.Guild, action: discord.AuditLogAction,
+                     target_id: int) -> Optional[Tuple[Any, Optional[str]]]:
+        """Return (moderator, reason) for the newest matching entry, or None if none shows up in time"""
+        key = (guild.id, action)
+        deadline = time.monotonic() + self.wait
+        
+        while True:
+            found = self._pop(key, target_id)
+            if found is not None:
+                return found
+            
+            if self._forbidden.get(guild.id, 0) > time.monotonic():
+                return None
+            
+            await self._refresh(guild, action)
+            found = self._pop(key, target_id)
+            if found is not None:
+                return found
+            
+            if time.monotonic() >= deadline:
+                return None
+            await asyncio.sleep(self.poll_interval)
+    
+    def _pop(self, key: tuple, target_id: int) -> Optional[tuple]:
+        entry = self._entries.get(key, {}).pop(target_id, None)
+        if entry is None or entry[0] < time.monotonic():
+            return None
+        
+        if entry[3]:
+            self.issued_hits += 1
+        else:
+            self.hits += 1
+        return entry[1], entry[2]
+    
+    async def _refresh(self, guild: discord.Guild, action: discord.AuditLogAction):
+        """Fetch new entries, sharing a fetch already in flight and respecting poll_interval"""
+        key = (guild.id, action)
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            await asyncio.shield(inflight)
+            return
+        
+        if time.monotonic() - self._fetched_at.get(key, float('-inf')) < self.poll_interval:
+            return
+        
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            await self._fetch(guild, action)
+        except discord.Forbidden:
+            self._forbidden[guild.id] = time.monotonic() + self.ttl
+        except discord.HTTPException as e:
+            logger.error(f"Error fetching audit log for {guild.name}: {e}")
+        finally:
+            self._fetched_at[key] = time.monotonic()
+            self._inflight.pop(key, None)
+            future.set_result(None)
+    
+    async def _fetch(self, guild: discord.Guild, action: discord.AuditLogAction):
+        key = (guild.id, action)
+        now = time.monotonic()
+        entries = self._entries.setdefault(key, {})
+        
+        # Drop expired entries while we're here
+        for target_id in [target_id for target_id, entry in entries.items() if entry[0] < now]:
+            del entries[target_id]
+        
+        after = self._last_entry_id.get(key)
+        kwargs = {"action": action, "limit": self.fetch_limit}
+        if after is not None:
+            kwargs["after"] = discord.Object(id=after)
+        
+        self.fetches += 1
+        newest = after or 0
+        # Older entries can't belong to an event we're waiting on
+        cutoff = discord.utils.utcnow() - timedelta(seconds=self.ttl)
+        async for entry in guild.audit_logs(**kwargs):
+            newest = max(newest, entry.id)
+            target_id = getattr(entry.target, 'id', None)
+            if target_id is None or entry.created_at < cutoff:
+                continue
+            # Entries the bot recorded itself already carry the right moderator
+            current = entries.get(target_id)
+            if current is not None and current[3] and current[0] >= now:
+                continue
+            entries[target_id] = (now + self.ttl, entry.user, entry.reason, False)
+        
+        if newest:
+            self._last_entry_id[key] = newest
+    
+    @property
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "fetches": self.fetches,
+            "hits": self.hits,
+            "issued_hits": self.issued_hits,
+            "cached": sum(len(entries) for entries in self._entries.values())
+        }
@@ -0,0 +1,449 @@
+import discord
+from array import array
+from collections import deque
+from functools import cached_property
+import inspect
+import logging
+import re
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional
+from utils.helpers import extract_invite_code
+from utils.text import (
+    SIGNATURE_BINS, WordMatcher, fold_text, minhash_signature, normalize_folded, normalize_text,
+    signature_similarity
+)
+
+logger = logging.getLogger(__name__)
+
+# Higher value wins when several rules flag the same message
+PUNISHMENT_SEVERITY = {
+    "warn": 1,
+    "timeout": 2,
+    "kick": 3,
+    "ban": 4
+}
+
+# User, role and channel mentions and mass pings; raid payloads often vary only by who they ping
+MENTION_PATTERN = re.compile(r"<(?:@[!&]?|#)\d+>|@(?:everyone|here)\b")
+
+class MessageContext:
+    """Per-message view shared by every automod rule
+    
+    Derived values are computed at most once per message, however many rules use them.
+    """
+    
+    def __init__(self, message: discord.Message):
+        self.message = message
+        self.content = message.content
+        self.author_id = message.author.id
+        self.channel_id = message.channel.id
+        self.guild_id = message.guild.id
+    
+    @cached_property
+    def lowered(self) -> str:
+        return self.content.lower()
+    
+    @cached_property
+    def folded(self) -> str:
+        """Content with NFKC, zero-width stripping and confusables folding, case kept"""
+        return fold_text(self.content)
+    
+    @cached_property
+    def normalized(self) -> str:
+        """Obfuscation-resistant form used for word and repeat matching"""
+        return normalize_folded(self.folded)
+    
+    @cached_property
+    def caps_ratio(self) -> float:
+        """Ratio of uppercase letters among alphabetic characters"""
+        letters = 0
+        upper = 0
+        for char in self.content:
+            if char.isalpha():
+                letters += 1
+                if char.isupper():
+                    upper += 1
+        return upper / letters if letters else 0.0
+    
+    @cached_property
+    def invite_code(self) -> Optional[str]:
+        return extract_invite_code(self.folded)
+    
+    @cached_property
+    def payload(self) -> str:
+        """Normalized content with mentions removed and whitespace collapsed; empty for a bare ping"""
+        text = self.normalized
+        if '<' in self.content or '@' in self.content:
+            text = normalize_text(MENTION_PATTERN.sub('', self.content))
+        return " ".join(text.split())
+    
+    @cached_property
+    def fingerprint(self) -> int:
+        """Hash of the payload, shared by copies of one message that only differ in who they ping"""
+        return hash(self.payload)
+
+class Verdict:
+    """Outcome of a rule that flagged a message"""
+    
+    def __init__(self, violation_type: str, reason: str, punishment: str,
+                 message_key: str, duration: int = None):
+        self.violation_type = violation_type
+        self.reason = reason
+        self.punishment = punishment
+        # Key under messages.yml automod.<rule> used for the channel warning
+        self.message_key = message_key
+        self.duration = duration
+    
+    @property
+    def severity(self) -> int:
+        return PUNISHMENT_SEVERITY.get(self.punishment, 0)
+
+class AutoModRule:
+    """Base class for rules compiled from a moderation.<section> config block"""
+    
+    section = None
+    violation_type = None
+    message_key = "warning"
+    
+    def __init__(self, config: Dict[str, Any]):
+        self.punishment = config.get('punishment', 'warn')
+        self.duration = config.get('duration')
+    
+    def verdict(self, reason: str) -> Verdict:
+        return Verdict(
+            self.violation_type, reason, self.punishment,
+            f"{self.section}.{self.message_key}", self.duration
+        )
+    
+    def check(self, ctx: MessageContext) -> Optional[Verdict]:
+        raise NotImplementedError
+    
+    def sweep(self) -> int:
+        """Evict idle per-user or per-channel state, returning how many entries were dropped"""
+        return 0
+
+class SlidingWindowCounter:
+    """Per-key sliding-window event counter backed by fixed-size ring buffers
+    
+    Each key owns one array of max_events monotonic timestamps; slot 0 holds
+    the next write position. Recording an event is O(1) and tells whether
+    max_events happened within the window.
+    """
+    
+    def __init__(self, max_events: int, window: float):
+        self.max_events = max(1, max_events)
+        self.window = window
+        self._buffers: Dict[Hashable, array] = {}
+        self._empty = array('d', [0.0] + [float('-inf')] * self.max_events)
+    
+    def __len__(self) -> int:
+        return len(self._buffers)
+    
+    def hit(self, key: Hashable, now: float = None) -> bool:
+        """Record an event for key, returning True if the window is now full"""
+        if now is None:
+            now = time.monotonic()
+        
+        buffer = self._buffers.get(key)
+        if buffer is None:
+            buffer = self._buffers[key] = array('d', self._empty)
+        
+        position = int(buffer[0])
+        buffer[position + 1] = now
+        position = (position + 1) % self.max_events
+        buffer[0] = position
+        
+        # The next slot to overwrite holds the oldest of the last max_events timestamps
+        return buffer[position + 1] >= now - self.window
+    
+    def reset(self, key: Hashable):
+        self._buffers.pop(key, None)
+    
+    def sweep(self, now: float = None) -> int:
+        """Drop keys with no event inside the window, returning how many were removed"""
+        if now is None:
+            now = time.monotonic()
+        cutoff = now - self.window
+        
+        idle = []
+        for key, buffer in self._buffers.items():
+            newest = buffer[(int(buffer[0]) - 1) % self.max_events + 1]
+            if newest < cutoff:
+                idle.append(key)
+        
+        for key in idle:
+            del self._buffers[key]
+        return len(idle)
+
+class SpamRule(AutoModRule):
+    section = "spam"
+    violation_type = "Spam"
+    message_key = "punishment"
+    
+    def __init__(self, config: Dict[str, Any]):
+        super().__init__(config)
+        self.duration = config.get('duration', 600)  # Default 10 minutes
+        
+        # Message rate per (guild, user)
+        self.counter = SlidingWindowCounter(config['max_messages'], config['time_window'])
+    
+    def check(self, ctx: MessageContext) -> Optional[Verdict]:
+        key = (ctx.guild_id, ctx.author_id)
+        if not self.counter.hit(key):
+            return None
+        
+        # Clear user's message history to prevent further triggers
+        self.counter.reset(key)
+        return self.verdict("Spam detection")
+    
+    def sweep(self):
+        return self.counter.sweep()
+
+class CapsRule(AutoModRule):
+    section = "caps"
+    violation_type = "Excessive Caps"
+    
+    def __init__(self, config: Dict[str, Any]):
+        super().__init__(config)
+        self.threshold = config['threshold']
+        self.min_length = config['min_length']
+    
+    def check(self, ctx: MessageContext) -> Optional[Verdict]:
+        if len(ctx.content) < self.min_length:
+            return None
+        if ctx.caps_ratio < self.threshold:
+            return None
+        return self.verdict("Excessive capital letters")
+
+class NearDuplicateIndex:
+    """LSH index over the MinHash signatures of one scope's recent messages
+    
+    Signatures are split into bands; a message is only compared against earlier
+    messages sharing at least one band, so a lookup costs O(bands) regardless
+    of the window size. Entries leave the index after window messages or
+    max_age seconds, whichever comes first. Each entry remembers which authors
+    posted its chain of near-duplicates, so a scope shared by several authors
+    can tell one person repeating themselves from many people saying the same thing.
+    """
+    
+    BANDS = 8
+    ROWS = SIGNATURE_BINS // BANDS
+    
+    def __init__(self, window: int, max_age: float):
+        self.window = max(1, window)
+        self.max_age = max_age
+        self.entries = deque()  # (seq, timestamp, signature, authors), oldest first
+        self.buckets: Dict[int, tuple] = {}  # band key -> newest (seq, timestamp, signature, authors)
+        self.seq = 0
+    
+    @property
+    def last_seen(self) -> float:
+        return self.entries[-1][1] if self.entries else float('-inf')
+    
+    def band_keys(self, signature: array) -> List[int]:
+        rows = self.ROWS
+        return [hash((band, signature[band * rows:(band + 1) * rows].tobytes())) for band in range(self.BANDS)]
+    
+    def add(self, signature: array, threshold: float, now: float, author: Hashable = None) -> int:
+        """Insert a signature, returning how many distinct authors posted it recently
+        
+        Returns 0 if no recent entry is at least threshold similar; otherwise
+        the number of authors in the matched chain, this one included.
+        """
+        self._expire(now)
+        
+        keys = self.band_keys(signature)
+        authors = frozenset((author,))
+        duplicate = False
+        checked = set()
+        for key in keys:
+            candidate = self.buckets.get(key)
+            if candidate is None or candidate[0] in checked:
+                continue
+            checked.add(candidate[0])
+            if signature_similarity(signature, candidate[2]) >= threshold:
+                duplicate = True
+                authors |= candidate[3]
+                break
+        
+        self.seq += 1
+        entry = (self.seq, now, signature, authors)
+        self.entries.append(entry)
+        for key in keys:
+            self.buckets[key] = entry
+        
+        if len(self.entries) > self.window:
+            self._evict()
+        return len(authors) if duplicate else 0
+    
+    def _expire(self, now: float):
+        cutoff = now - self.max_age
+        while self.entries and self.entries[0][1] < cutoff:
+            self._evict()
+    
+    def _evict(self):
+        seq, _, signature, _ = self.entries.popleft()
+        for key in self.band_keys(signature):
+            # A newer message may own the bucket now; only drop it if it still points here
+            entry = self.buckets.get(key)
+            if entry is not None and entry[0] == seq:
+                del self.buckets[key]
+
+class RepeatedTextRule(AutoModRule):
+    section = "repeated_text"
+    violation_type = "Repeated Text"
+    
+    def __init__(self, config: Dict[str, Any]):
+        super().__init__(config)
+        # Estimated Jaccard similarity of the messages' character shingles
+        self.threshold = config['threshold']
+        self.min_length = config.get('min_length', 10)
+        
+        # A user repeating themselves is caught over a long window
+        self.window = config.get('window', 200)
+        self.max_age = config.get('max_age', 3600)
+        
+        # Different users sharing a line ("good morning everyone!") is normal; only a
+        # burst of the same text from several authors in a short window is a flood
+        self.channel_window = config.get('channel_window', 5)
+        self.channel_max_age = config.get('channel_max_age', 60)
+        self.channel_authors = max(2, config.get('channel_authors', 3))
+        
+        # Recent message signatures per channel and per (guild, user)
+        self.channel_indexes: Dict[int, NearDuplicateIndex] = {}
+        self.user_indexes: Dict[tuple, NearDuplicateIndex] = {}
+    
+    @staticmethod
+    def _index(indexes: Dict, key: Hashable, window: int, max_age: float) -> NearDuplicateIndex:
+        index = indexes.get(key)
+        if index is None:
+            index = indexes[key] = NearDuplicateIndex(window, max_age)
+        return index
+    
+    def check(self, ctx: MessageContext) -> Optional[Verdict]:
+        content = ctx.normalized
+        if len(content) < self.min_length:
+            return None
+        
+        signature = minhash_signature(content)
+        now = time.monotonic()
+        
+        # Always index in both scopes so neither history has gaps
+        channel_index = self._index(self.channel_indexes, ctx.channel_id, self.channel_window, self.channel_max_age)
+        channel_authors = channel_index.add(signature, self.threshold, now, ctx.author_id)
+        user_index = self._index(self.user_indexes, (ctx.guild_id, ctx.author_id), self.window, self.max_age)
+        by_user = user_index.add(signature, self.threshold, now)
+        
+        if by_user or channel_authors >= self.channel_authors:
+            return self.verdict("Repeated text")
+        return None
+    
+    def sweep(self) -> int:
+        now = time.monotonic()
+        evicted = 0
+        for indexes, max_age in ((self.channel_indexes, self.channel_max_age), (self.user_indexes, self.max_age)):
+            cutoff = now - max_age
+            idle = [key for key, index in indexes.items() if index.last_seen < cutoff]
+            for key in idle:
+                del indexes[key]
+            evicted += len(idle)
+        return evicted
+
+class BadWordsRule(AutoModRule):
+    section = "bad_words"
+    violation_type = "Inappropriate Language"
+    
+    def __init__(self, config: Dict[str, Any]):
+        super().__init__(config)
+        # Words are normalized like message content; keep the configured spelling for logs
+        self.originals = {}
+        for word in config.get('words', []):
+            if word:
+                self.originals.setdefault(normalize_text(word), word)
+        self.matcher = WordMatcher(self.originals, config.get('match', 'substring'))
+    
+    def check(self, ctx: MessageContext) -> Optional[Verdict]:
+        matches = self.matcher.find_all(ctx.normalized)
+        if not matches:
+            return None
+        words = ", ".join(self.originals[match] for match in matches)
+        return self.verdict(f"Inappropriate language: {words}")
+
+class InviteLinkRule(AutoModRule):
+    section = "invite_links"
+    violation_type = "Invite Link"
+    
+    def __init__(self, config: Dict[str, Any], resolve_invite: Callable[[str], Awaitable[Optional[int]]]):
+        super().__init__(config)
+        self.whitelist = frozenset(config.get('whitelist', []))
+        # Returns the guild ID an invite code points to, or None if it can't be resolved
+        self.resolve_invite = resolve_invite
+    
+    async def check(self, ctx: MessageContext) -> Optional[Verdict]:
+        invite_code = ctx.invite_code
+        if not invite_code:
+            return None
+        
+        if self.whitelist:
+            guild_id = await self.resolve_invite(invite_code)
+            if guild_id in self.whitelist:
+                return None  # Whitelisted server
+        
+        return self.verdict("Unauthorized invite link")
+
+class AutoModPipeline:
+    """Automod rules compiled once from config and evaluated together per message"""
+    
+    def __init__(self, rules: List[AutoModRule]):
+        self.rules = rules
+        self.sync_rules = [rule for rule in rules if not inspect.iscoroutinefunction(rule.check)]
+        self.async_rules = [rule for rule in rules if inspect.iscoroutinefunction(rule.check)]
+    
+    @classmethod
+    def from_config(cls, config: Dict[str, Any],
+                    resolve_invite: Callable[[str], Awaitable[Optional[int]]]) -> "AutoModPipeline":
+        """Build the pipeline from the moderation section of config.yml"""
+        rules = []
+        factories = (
+            ('spam', SpamRule),
+            ('caps', CapsRule),
+            ('repeated_text', RepeatedTextRule),
+            ('bad_words', BadWordsRule),
+        )
+        
+        for section, rule_class in factories:
+            rule_config = config.get(section, {})
+            if rule_config.get('enabled', False):
+                rules.append(rule_class(rule_config))
+        
+        invite_config = config.get('invite_links', {})
+        if invite_config.get('enabled', False):
+            rules.append(InviteLinkRule(invite_config, resolve_invite))
+        
+        return cls(rules)
+    
+    async def evaluate(self, message: discord.Message, ctx: MessageContext = None) -> List[Verdict]:
+        """Run every rule against the message and collect all verdicts
+        
+        Every rule sees every message so stateful rules (spam, repeated text)
+        stay accurate even when an earlier rule already flagged it.
+        """
+        if ctx is None:
+            ctx = MessageContext(message)
+        verdicts = []
+        
+        for rule in self.sync_rules:
+            verdict = rule.check(ctx)
+            if verdict:
+                verdicts.append(verdict)
+        
+        for rule in self.async_rules:
+            verdict = await rule.check(ctx)
+            if verdict:
+                verdicts.append(verdict)
+        
+        return verdicts
+    
+    def sweep(self) -> int:
+        """Evict idle state from every rule"""
+        return sum(rule.sweep() for rule in self.rules)
@@ -0,0 +1,203 @@
+import asyncio
+import logging
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+class AsyncTTLCache:
+    """Bounded TTL + LRU cache for async lookups
+    
+    Concurrent lookups of the same key share one in-flight request, and
+    negative results (None) are cached with their own, usually shorter, TTL.
+    Failed fetches are never cached.
+    """
+    
+    def __init__(self, maxsize: int = 1024, ttl: float = 3600, negative_ttl: float = 300):
+        self.maxsize = max(1, maxsize)
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+    
+    def __len__(self) -> int:
+        return len(self._data)
+    
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return a cached, unexpired value without fetching"""
+        entry = self._data.get(key)
+        if entry is None:
+            return default
+        
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            return default
+        
+        self._data.move_to_end(key)
+        return value
+    
+    def set(self, key: Hashable, value: Any):
+        """Store a value, evicting the least recently used entries when full"""
+        ttl = self.negative_ttl if value is None else self.ttl
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+    
+    def invalidate(self, key: Hashable):
+        self._data.pop(key, None)
+    
+    def clear(self):
+        self._data.clear()
+    
+    async def get_or_fetch(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the cached value for key, calling fetch() once on a miss
+        
+        The fetch runs in its own task that every caller waits on through a
+        shield, so cancelling one caller (even the one that started it) never
+        cancels the lookup for the others.
+        """
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            self.hits += 1
+            return value
+        
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            inflight = self._inflight[key] = asyncio.ensure_future(self._fetch(key, fetch))
+            inflight.add_done_callback(self._fetch_done)
+        return await asyncio.shield(inflight)
+    
+    async def _fetch(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            value = await fetch()
+        finally:
+            self._inflight.pop(key, None)
+        self.set(key, value)
+        return value
+    
+    @staticmethod
+    def _fetch_done(task: asyncio.Task):
+        # Mark a failure retrieved so it isn't reported as never retrieved when every caller was cancelled
+        if not task.cancelled():
+            task.exception()
+    
+    @property
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "size": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_rate": (self.hits + self.coalesced) / lookups if lookups else 0.0
+        }
+
+class StoredMessage:
+    """Content and metadata kept for a message after discord.py's cache has dropped it"""
+    
+    __slots__ = ("guild_id", "channel_id", "author_id", "content", "attachments")
+    
+    def __init__(self, guild_id: int, channel_id: int, author_id: int, content: str, attachments: Optional[str]):
+        self.guild_id = guild_id
+        self.channel_id = channel_id
+        self.author_id = author_id
+        self.content = content
+        self.attachments = attachments
+
+class MessageContentStore:
+    """Bounded LRU of recent message contents, used to log deletes and edits of uncached messages
+    
+    Entries are plain tuples and content longer than compress_threshold bytes is
+    zlib-compressed, so far more messages fit than in discord.py's own cache
+    of full Message objects. Holds at most max_messages entries and roughly
+    max_bytes of content, evicting the oldest first.
+    """
+    
+    def __init__(self, max_messages: int = 50000, max_bytes: int = 32 * 1024 * 1024, compress_threshold: int = 128):
+        self.max_messages = max(1, max_messages)
+        self.max_bytes = max_bytes
+        self.compress_threshold = compress_threshold
+        
+        # message_id -> (content as str or compressed bytes, guild_id, channel_id, author_id, attachments)
+        self._data: "OrderedDict[int, tuple]" = OrderedDict()
+        self.bytes = 0
+    
+    def __len__(self) -> int:
+        return len(self._data)
+    
+    def __contains__(self, message_id: int) -> bool:
+        return message_id in self._data
+    
+    def _pack(self, content: str):
+        if len(content) < self.compress_threshold:
+            return content
+        encoded = content.encode('utf-8')
+        compressed = zlib.compress(encoded)
+        # Short or random text can grow when compressed; keep whichever is smaller
+        return compressed if len(compressed) < len(encoded) else content
+    
+    @staticmethod
+    def _size(blob) -> int:
+        """Bytes a blob counts against max_bytes; str content is counted as UTF-8"""
+        return len(blob) if isinstance(blob, bytes) else len(blob.encode('utf-8'))
+    
+    @staticmethod
+    def _unpack(blob) -> str:
+        return zlib.decompress(blob).decode('utf-8') if isinstance(blob, bytes) else blob
+    
+    def put(self, message_id: int, guild_id: int, channel_id: int, author_id: int,
+            content: str, attachments: Optional[str] = None):
+        """Store or replace a message's content"""
+        self._discard(message_id)
+        
+        blob = self._pack(content or "")
+        self._data[message_id] = (blob, guild_id, channel_id, author_id, attachments)
+        self.bytes += self._size(blob)
+        
+        while len(self._data) > self.max_messages or (self.bytes > self.max_bytes and len(self._data) > 1):
+            _, (evicted, *_) = self._data.popitem(last=False)
+            self.bytes -= self._size(evicted)
+    
+    def get(self, message_id: int) -> Optional[StoredMessage]:
+        entry = self._data.get(message_id)
+        if entry is None:
+            return None
+        blob, guild_id, channel_id, author_id, attachments = entry
+        return StoredMessage(guild_id, channel_id, author_id, self._unpack(blob), attachments)
+    
+    def pop(self, message_id: int) -> Optional[StoredMessage]:
+        stored = self.get(message_id)
+        if stored is not None:
+            self._discard(message_id)
+        return stored
+    
+    def update(self, message_id: int, content: str):
+        """Replace the content of a stored message after an edit"""
+        entry = self._data.get(message_id)
+        if entry is not None:
+            _, guild_id, channel_id, author_id, attachments = entry
+            self.put(message_id, guild_id, channel_id, author_id, content, attachments)
+    
+    def _discard(self, message_id: int):
+        entry = self._data.pop(message_id, None)
+        if entry is not None:
+            self.bytes -= self._size(entry[0])
+    
+    @property
+    def stats(self) -> Dict[str, Any]:
+        return {"size": len(self._data), "bytes": self.bytes}
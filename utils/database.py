@@ -1,19 +1,340 @@
 import sqlite3
 import aiosqlite
+import asyncio
 import logging
+import time
+from collections import Counter
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
+import copy
 import json
-from typing import List, Dict, Optional, Any
+from typing import AsyncIterator, List, Dict, Optional, Any, Tuple
 
 logger = logging.getLogger(__name__)
 
+DURABILITY_MODES = ("immediate", "batched")
+
+# Default storage profile; every key can be overridden from config.yml (database.storage)
+STORAGE_DEFAULTS = {
+    "journal_mode": "wal",
+    "synchronous": "normal",
+    "cache_size_mb": 16,
+    "mmap_size_mb": 64,
+    "temp_store": "memory",
+    "busy_timeout_ms": 5000,
+}
+
+JOURNAL_MODES = ("delete", "truncate", "persist", "memory", "wal")
+SYNCHRONOUS_MODES = ("off", "normal", "full", "extra")
+TEMP_STORES = ("default", "file", "memory")
+
+# Versioned schema migrations, applied in order on top of the base tables.
+# The applied version is tracked in PRAGMA user_version; never edit a released
+# migration, append a new one instead.
+MIGRATIONS = [
+    (1, "Secondary indexes for history, warning, staff log and automod lookups", [
+        """CREATE INDEX IF NOT EXISTS idx_warnings_guild_user_active
+           ON warnings (guild_id, user_id, active, timestamp)""",
+        """CREATE INDEX IF NOT EXISTS idx_mod_history_guild_user_time
+           ON mod_history (guild_id, user_id, timestamp)""",
+        """CREATE INDEX IF NOT EXISTS idx_staff_logs_guild_staff_time
+           ON staff_logs (guild_id, staff_id, timestamp)""",
+        """CREATE INDEX IF NOT EXISTS idx_staff_logs_guild_time
+           ON staff_logs (guild_id, timestamp)""",
+        """CREATE INDEX IF NOT EXISTS idx_automod_guild_user_time
+           ON automod_violations (guild_id, user_id, timestamp)""",
+        """CREATE INDEX IF NOT EXISTS idx_automod_guild_type_time
+           ON automod_violations (guild_id, violation_type, timestamp)""",
+        """CREATE INDEX IF NOT EXISTS idx_automod_guild_time
+           ON automod_violations (guild_id, timestamp)""",
+        """CREATE INDEX IF NOT EXISTS idx_message_logs_time
+           ON message_logs (timestamp)""",
+        """CREATE INDEX IF NOT EXISTS idx_temp_actions_pending
+           ON temp_actions (expires_at) WHERE completed = 0""",
+    ]),
+    (2, "Overflow storage for log embeds the log channel could not keep up with", [
+        """CREATE TABLE IF NOT EXISTS spilled_logs (
+               id INTEGER PRIMARY KEY AUTOINCREMENT,
+               guild_id INTEGER NOT NULL,
+               channel_id INTEGER NOT NULL,
+               payload TEXT NOT NULL,
+               created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+           )""",
+        """CREATE INDEX IF NOT EXISTS idx_spilled_logs_channel
+           ON spilled_logs (channel_id, id)""",
+    ]),
+    (3, "Statistics counters maintained by the write path, backfilled from existing rows", [
+        """CREATE TABLE IF NOT EXISTS stat_counters (
+               guild_id INTEGER NOT NULL,
+               metric TEXT NOT NULL,
+               dimension TEXT NOT NULL,
+               count INTEGER NOT NULL DEFAULT 0,
+               PRIMARY KEY (guild_id, metric, dimension)
+           ) WITHOUT ROWID""",
+        """CREATE TABLE IF NOT EXISTS stat_buckets (
+               guild_id INTEGER NOT NULL,
+               metric TEXT NOT NULL,
+               bucket INTEGER NOT NULL,
+               dimension TEXT NOT NULL,
+               count INTEGER NOT NULL DEFAULT 0,
+               PRIMARY KEY (guild_id, metric, bucket, dimension)
+           ) WITHOUT ROWID""",
+        """INSERT INTO stat_counters (guild_id, metric, dimension, count)
+           SELECT guild_id, 'mod_action', action_type, COUNT(*) FROM mod_history GROUP BY guild_id, action_type
+           UNION ALL
+           SELECT guild_id, 'moderator', CAST(moderator_id AS TEXT), COUNT(*) FROM mod_history GROUP BY guild_id, moderator_id
+           UNION ALL
+           SELECT guild_id, 'automod', violation_type, COUNT(*) FROM automod_violations GROUP BY guild_id, violation_type
+           UNION ALL
+           SELECT guild_id, 'message_log', action_type, COUNT(*) FROM message_logs GROUP BY guild_id, action_type""",
+        """INSERT INTO stat_buckets (guild_id, metric, bucket, dimension, count)
+           SELECT guild_id, 'mod_action', CAST(strftime('%s', timestamp) AS INTEGER) / 3600 AS hour, action_type, COUNT(*)
+             FROM mod_history GROUP BY guild_id, hour, action_type
+           UNION ALL
+           SELECT guild_id, 'moderator', CAST(strftime('%s', timestamp) AS INTEGER) / 3600 AS hour, CAST(moderator_id AS TEXT), COUNT(*)
+             FROM mod_history GROUP BY guild_id, hour, moderator_id
+           UNION ALL
+           SELECT guild_id, 'automod', CAST(strftime('%s', timestamp) AS INTEGER) / 3600 AS hour, violation_type, COUNT(*)
+             FROM automod_violations GROUP BY guild_id, hour, violation_type
+           UNION ALL
+           SELECT guild_id, 'message_log', CAST(strftime('%s', timestamp) AS INTEGER) / 3600 AS hour, action_type, COUNT(*)
+             FROM message_logs GROUP BY guild_id, hour, action_type""",
+    ]),
+    (4, "Daily statistics rollups that hourly buckets are compacted into", [
+        """CREATE TABLE IF NOT EXISTS stat_days (
+               guild_id INTEGER NOT NULL,
+               metric TEXT NOT NULL,
+               day INTEGER NOT NULL,
+               dimension TEXT NOT NULL,
+               count INTEGER NOT NULL DEFAULT 0,
+               PRIMARY KEY (guild_id, metric, day, dimension)
+           ) WITHOUT ROWID""",
+        """CREATE INDEX IF NOT EXISTS idx_stat_buckets_bucket
+           ON stat_buckets (bucket)""",
+    ]),
+]
+
+# Counters kept in step with the log tables. Every insert into mod_history,
+# automod_violations or message_logs upserts its lifetime counter and its
+# hourly bucket (hours since the epoch, UTC like CURRENT_TIMESTAMP) in the
+# same transaction, so statistics never need to scan the log tables. Hourly
+# buckets past their retention are compacted into daily rollups (days since
+# the epoch) by compact_stat_buckets().
+STAT_METRICS = ("mod_action", "moderator", "automod", "message_log")
+
+STAT_COUNTER_UPSERT = """INSERT INTO stat_counters (guild_id, metric, dimension, count) VALUES (?, ?, ?, ?)
+    ON CONFLICT (guild_id, metric, dimension) DO UPDATE SET count = count + excluded.count"""
+
+STAT_BUCKET_UPSERT = """INSERT INTO stat_buckets (guild_id, metric, bucket, dimension, count)
+    VALUES (?, ?, CAST(strftime('%s', 'now') AS INTEGER) / 3600, ?, ?)
+    ON CONFLICT (guild_id, metric, bucket, dimension) DO UPDATE SET count = count + excluded.count"""
+
+STAT_UPSERTS = (STAT_COUNTER_UPSERT, STAT_BUCKET_UPSERT)
+
 class DatabaseManager:
-    def __init__(self, db_path: str = "database.db"):
+    def __init__(self, db_path: str = "database.db", pool_size: int = 4,
+                 durability: str = "batched", batch_size: int = 100,
+                 flush_interval_ms: int = 250, storage: Dict = None):
         self.db_path = db_path
+        self.pool_size = max(1, pool_size)
+        self.storage = self._build_storage_profile(storage or {})
+        
+        if durability not in DURABILITY_MODES:
+            logger.warning(f"Unknown durability mode '{durability}', falling back to 'immediate'")
+            durability = "immediate"
+        self.durability = durability
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = max(0, flush_interval_ms) / 1000
+        
+        # Long-lived connections, opened in initialize() and closed in close()
+        self._writer: Optional[aiosqlite.Connection] = None
+        self._readers: Optional[asyncio.Queue] = None
+        self._reader_connections: List[aiosqlite.Connection] = []
+        self._write_lock = asyncio.Lock()
+        
+        # Write-behind queue for high-volume log inserts (batched durability only)
+        self._write_queue: Optional[asyncio.Queue] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        
+        # Guild ID -> settings, loaded in initialize() and kept in step with every write
+        self._guild_settings: Dict[int, Dict] = {}
+    
+    @staticmethod
+    def _build_storage_profile(overrides: Dict) -> Dict:
+        """Merge storage overrides with the defaults, rejecting unknown PRAGMA values"""
+        profile = dict(STORAGE_DEFAULTS)
+        profile.update({key: value for key, value in overrides.items() if key in STORAGE_DEFAULTS})
+        
+        for key, allowed in (("journal_mode", JOURNAL_MODES),
+                             ("synchronous", SYNCHRONOUS_MODES),
+                             ("temp_store", TEMP_STORES)):
+            value = str(profile[key]).lower()
+            if value not in allowed:
+                logger.warning(f"Invalid database.storage.{key} '{value}', using '{STORAGE_DEFAULTS[key]}'")
+                value = STORAGE_DEFAULTS[key]
+            profile[key] = value
+        
+        for key in ("cache_size_mb", "mmap_size_mb", "busy_timeout_ms"):
+            profile[key] = max(0, int(profile[key]))
+        
+        return profile
+    
+    async def _connect(self, readonly: bool = False) -> aiosqlite.Connection:
+        """Open a connection to the database with the storage profile applied"""
+        connection = await aiosqlite.connect(self.db_path)
+        connection.row_factory = aiosqlite.Row
+        
+        # Values are validated in _build_storage_profile; PRAGMA does not accept bound parameters
+        profile = self.storage
+        if not readonly:
+            # journal_mode is persistent in the file, so the writer sets it once for everyone
+            await connection.execute(f"PRAGMA journal_mode = {profile['journal_mode']}")
+        await connection.execute(f"PRAGMA synchronous = {profile['synchronous']}")
+        await connection.execute(f"PRAGMA cache_size = -{profile['cache_size_mb'] * 1024}")
+        await connection.execute(f"PRAGMA mmap_size = {profile['mmap_size_mb'] * 1024 * 1024}")
+        await connection.execute(f"PRAGMA temp_store = {profile['temp_store']}")
+        await connection.execute(f"PRAGMA busy_timeout = {profile['busy_timeout_ms']}")
+        if readonly:
+            await connection.execute("PRAGMA query_only = 1")
+        
+        return connection
+    
+    @asynccontextmanager
+    async def _read(self):
+        """Borrow a reader connection from the pool"""
+        connection = await self._readers.get()
+        try:
+            yield connection
+        finally:
+            self._readers.put_nowait(connection)
+    
+    @asynccontextmanager
+    async def _write(self):
+        """Run a write transaction on the writer connection"""
+        async with self._write_lock:
+            try:
+                yield self._writer
+                await self._writer.commit()
+            except Exception:
+                await self._writer.rollback()
+                raise
+    
+    async def _submit(self, *statements):
+        """Queue log inserts for the next group commit, or write them now in immediate mode
+        
+        Each call is one job: its statements are always committed in the same transaction.
+        """
+        if self._write_queue is None:
+            await self._write_jobs([statements])
+            return
+        
+        await self._write_queue.put(statements)
+    
+    async def _flush_loop(self):
+        """Drain the write queue, committing up to batch_size rows per transaction"""
+        loop = asyncio.get_running_loop()
+        
+        while True:
+            batch = [await self._write_queue.get()]
+            rows = self._job_rows(batch[0])
+            deadline = loop.time() + self.flush_interval
+            
+            while rows < self.batch_size:
+                try:
+                    job = self._write_queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        job = await asyncio.wait_for(self._write_queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                
+                batch.append(job)
+                rows += self._job_rows(job)
+            
+            await self._commit_batch(batch)
+    
+    @staticmethod
+    def _job_rows(job: tuple) -> int:
+        """Log rows in a job; statistics upserts ride along and don't count towards batch_size"""
+        return sum(1 for query, _ in job if query not in STAT_UPSERTS)
+    
+    @staticmethod
+    def _group_statements(jobs: List[tuple]) -> Dict[str, List[tuple]]:
+        """Group the statements of several jobs by SQL, keeping row order"""
+        grouped: Dict[str, List[tuple]] = {}
+        for job in jobs:
+            for query, params in job:
+                grouped.setdefault(query, []).append(params)
+        
+        # Statistics increments for the same key collapse into one upsert
+        for query in STAT_UPSERTS:
+            rows = grouped.get(query)
+            if rows and len(rows) > 1:
+                merged = Counter()
+                for *key, count in rows:
+                    merged[tuple(key)] += count
+                grouped[query] = [(*key, count) for key, count in merged.items()]
+        return grouped
+    
+    @staticmethod
+    def _stat_statements(guild_id: int, counts: Counter) -> List[tuple]:
+        """Counter and hourly bucket upserts for {(metric, dimension): count}"""
+        statements = []
+        for (metric, dimension), count in counts.items():
+            statements.append((STAT_COUNTER_UPSERT, (guild_id, metric, str(dimension), count)))
+            statements.append((STAT_BUCKET_UPSERT, (guild_id, metric, str(dimension), count)))
+        return statements
+    
+    async def _write_jobs(self, jobs: List[tuple]):
+        """Commit jobs in one transaction with one executemany per statement"""
+        async with self._write() as db:
+            for query, rows in self._group_statements(jobs).items():
+                await db.executemany(query, rows)
+    
+    async def _commit_batch(self, batch: List[tuple]):
+        """Write a batch of queued jobs, falling back to one transaction per job if it fails
+        
+        A single bad row would otherwise roll back every unrelated job in the
+        batch; the retry narrows the loss down to the jobs that really fail.
+        """
+        try:
+            await self._write_jobs(batch)
+        except Exception as e:
+            if len(batch) > 1:
+                logger.warning(f"Group commit of {len(batch)} queued jobs failed ({e}), retrying them one by one")
+                for job in batch:
+                    try:
+                        await self._write_jobs([job])
+                    except Exception as job_error:
+                        logger.error(f"Dropped queued write {self._describe_job(job)}: {job_error}")
+            else:
+                logger.error(f"Dropped queued write {self._describe_job(batch[0])}: {e}")
+        finally:
+            for _ in batch:
+                self._write_queue.task_done()
+    
+    @staticmethod
+    def _describe_job(job: tuple) -> str:
+        """Short description of a job's log rows for error messages"""
+        rows = [
+            f"{' '.join(query.split()[:3])} {params!r}"
+            for query, params in job if query not in STAT_UPSERTS
+        ]
+        return "; ".join(rows) or f"of {len(job)} statistics updates"
+    
+    async def flush(self):
+        """Wait until every queued write has been committed"""
+        if self._write_queue is not None:
+            await self._write_queue.join()
     
     async def initialize(self):
-        """Initialize the database with required tables"""
-        async with aiosqlite.connect(self.db_path) as db:
+        """Initialize the database with required tables and open the connection pool"""
+        self._writer = await self._connect()
+        
+        async with self._write() as db:
             # User warnings table
             await db.execute("""
                 CREATE TABLE IF NOT EXISTS warnings (
@@ -109,22 +430,81 @@ class DatabaseManager:
                 )
             """)
             
-            await db.commit()
-            logger.info("Database initialized successfully")
+            await self._migrate(db)
+            
+            cursor = await db.execute("SELECT guild_id, settings FROM guild_settings")
+            self._guild_settings = {row[0]: json.loads(row[1]) for row in await cursor.fetchall()}
+        
+        self._readers = asyncio.Queue()
+        for _ in range(self.pool_size):
+            connection = await self._connect(readonly=True)
+            self._reader_connections.append(connection)
+            self._readers.put_nowait(connection)
+        
+        if self.durability == "batched":
+            self._write_queue = asyncio.Queue(maxsize=self.batch_size * 50)
+            self._flush_task = asyncio.create_task(self._flush_loop())
+        
+        logger.info(
+            f"Database initialized successfully ({self.pool_size} reader connections, "
+            f"{self.durability} durability, journal_mode={self.storage['journal_mode']})"
+        )
+    
+    async def _migrate(self, db: aiosqlite.Connection):
+        """Apply pending schema migrations"""
+        cursor = await db.execute("PRAGMA user_version")
+        row = await cursor.fetchone()
+        current_version = row[0] if row else 0
+        
+        for version, description, statements in MIGRATIONS:
+            if version <= current_version:
+                continue
+            
+            for statement in statements:
+                await db.execute(statement)
+            # PRAGMA does not accept bound parameters; version is a trusted int
+            await db.execute(f"PRAGMA user_version = {int(version)}")
+            logger.info(f"Applied database migration {version}: {description}")
+            current_version = version
+        
+        await db.execute("PRAGMA optimize")
+    
+    async def close(self):
+        """Flush queued writes and close all pooled connections"""
+        if self._flush_task is not None:
+            await self.flush()
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+            self._write_queue = None
+        
+        for connection in self._reader_connections:
+            await connection.close()
+        self._reader_connections = []
+        self._readers = None
+        
+        if self._writer is not None:
+            async with self._write_lock:
+                await self._writer.close()
+            self._writer = None
+        
+        logger.info("Database connections closed")
     
     async def add_warning(self, guild_id: int, user_id: int, moderator_id: int, reason: str) -> int:
         """Add a warning to a user"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self._write() as db:
             cursor = await db.execute(
                 "INSERT INTO warnings (guild_id, user_id, moderator_id, reason) VALUES (?, ?, ?, ?)",
                 (guild_id, user_id, moderator_id, reason)
             )
-            await db.commit()
             return cursor.lastrowid
     
     async def remove_warning(self, guild_id: int, user_id: int) -> bool:
         """Remove the most recent active warning from a user"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self._write() as db:
             cursor = await db.execute(
                 "SELECT id FROM warnings WHERE guild_id = ? AND user_id = ? AND active = 1 ORDER BY timestamp DESC LIMIT 1",
                 (guild_id, user_id)
@@ -136,14 +516,12 @@ class DatabaseManager:
                     "UPDATE warnings SET active = 0 WHERE id = ?",
                     (row[0],)
                 )
-                await db.commit()
                 return True
             return False
     
     async def get_warnings(self, guild_id: int, user_id: int) -> List[Dict]:
         """Get all active warnings for a user"""
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
+        async with self._read() as db:
             cursor = await db.execute(
                 "SELECT * FROM warnings WHERE guild_id = ? AND user_id = ? AND active = 1 ORDER BY timestamp DESC",
                 (guild_id, user_id)
@@ -153,7 +531,7 @@ class DatabaseManager:
     
     async def get_warning_count(self, guild_id: int, user_id: int) -> int:
         """Get the count of active warnings for a user"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self._read() as db:
             cursor = await db.execute(
                 "SELECT COUNT(*) FROM warnings WHERE guild_id = ? AND user_id = ? AND active = 1",
                 (guild_id, user_id)
@@ -165,20 +543,78 @@ class DatabaseManager:
                            action_type: str, reason: str = None, duration: int = None, 
                            additional_data: Dict = None):
         """Log a moderation action"""
-        async with aiosqlite.connect(self.db_path) as db:
-            additional_json = json.dumps(additional_data) if additional_data else None
-            await db.execute(
-                """INSERT INTO mod_history 
-                   (guild_id, user_id, moderator_id, action_type, reason, duration, additional_data) 
-                   VALUES (?, ?, ?, ?, ?, ?, ?)""",
-                (guild_id, user_id, moderator_id, action_type, reason, duration, additional_json)
-            )
-            await db.commit()
+        additional_json = json.dumps(additional_data) if additional_data else None
+        await self._submit((
+            """INSERT INTO mod_history 
+               (guild_id, user_id, moderator_id, action_type, reason, duration, additional_data) 
+               VALUES (?, ?, ?, ?, ?, ?, ?)""",
+            (guild_id, user_id, moderator_id, action_type, reason, duration, additional_json)
+        ), *self._stat_statements(guild_id, Counter({
+            ("mod_action", action_type): 1,
+            ("moderator", moderator_id): 1
+        })))
+    
+    async def record_bulk_punishment(self, guild_id: int, moderator_id: int, action_type: str,
+                                     reason: str, user_ids: List[int], duration: int = None,
+                                     violations: List[tuple] = None) -> Dict[int, int]:
+        """Record one punishment for many users in a single transaction
+        
+        Warnings are stored in warnings, every other action in mod_history.
+        violations are (user_id, violation_type, content, channel_id) rows for
+        automod_violations. For warnings, returns the active warning count per user.
+        """
+        counts = {}
+        stats = Counter()
+        if action_type != "warn" and user_ids:
+            stats["mod_action", action_type] = len(user_ids)
+            stats["moderator", moderator_id] = len(user_ids)
+        for violation in violations or ():
+            stats["automod", violation[1]] += 1
+        
+        async with self._write() as db:
+            if action_type == "warn":
+                await db.executemany(
+                    "INSERT INTO warnings (guild_id, user_id, moderator_id, reason) VALUES (?, ?, ?, ?)",
+                    [(guild_id, user_id, moderator_id, reason) for user_id in user_ids]
+                )
+            else:
+                await db.executemany(
+                    """INSERT INTO mod_history 
+                       (guild_id, user_id, moderator_id, action_type, reason, duration) 
+                       VALUES (?, ?, ?, ?, ?, ?)""",
+                    [(guild_id, user_id, moderator_id, action_type, reason, duration) for user_id in user_ids]
+                )
+            
+            if violations:
+                await db.executemany(
+                    """INSERT INTO automod_violations 
+                       (guild_id, user_id, violation_type, content, channel_id, action_taken) 
+                       VALUES (?, ?, ?, ?, ?, ?)""",
+                    [(guild_id, user_id, violation_type, content, channel_id, f"{action_type} applied")
+                     for user_id, violation_type, content, channel_id in violations]
+                )
+            
+            for query, rows in self._group_statements([self._stat_statements(guild_id, stats)]).items():
+                await db.executemany(query, rows)
+            
+            if action_type == "warn":
+                # Stay under SQLite's bound parameter limit
+                for start in range(0, len(user_ids), 500):
+                    chunk = user_ids[start:start + 500]
+                    placeholders = ", ".join("?" * len(chunk))
+                    cursor = await db.execute(
+                        f"""SELECT user_id, COUNT(*) FROM warnings 
+                            WHERE guild_id = ? AND active = 1 AND user_id IN ({placeholders}) 
+                            GROUP BY user_id""",
+                        (guild_id, *chunk)
+                    )
+                    for row in await cursor.fetchall():
+                        counts[row[0]] = row[1]
+        return counts
     
     async def get_user_history(self, guild_id: int, user_id: int, limit: int = 50) -> List[Dict]:
         """Get moderation history for a user"""
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
+        async with self._read() as db:
             cursor = await db.execute(
                 """SELECT * FROM mod_history 
                    WHERE guild_id = ? AND user_id = ? 
@@ -188,23 +624,78 @@ class DatabaseManager:
             rows = await cursor.fetchall()
             return [dict(row) for row in rows]
     
+    async def get_user_history_page(self, guild_id: int, user_id: int, limit: int = 10,
+                                    before: Optional[Tuple] = None, after: Optional[Tuple] = None,
+                                    oldest: bool = False) -> List[Dict]:
+        """Get one page of a user's history, newest first, by (timestamp, id) keyset cursor
+        
+        With `before` the page holds the entries just older than that cursor,
+        with `after` the entries just newer than it, with `oldest` the oldest
+        entries and otherwise the newest ones. Each page is an index range
+        scan, so its cost doesn't depend on how deep into the history it is.
+        """
+        if after is not None or oldest:
+            # Walk forward in time, then flip the page back to newest first
+            condition = "AND (timestamp, id) > (?, ?)" if after else ""
+            order = "ASC"
+            cursor_params = tuple(after) if after else ()
+        else:
+            condition = "AND (timestamp, id) < (?, ?)" if before else ""
+            order = "DESC"
+            cursor_params = tuple(before) if before else ()
+        
+        async with self._read() as db:
+            cursor = await db.execute(
+                f"""SELECT * FROM mod_history 
+                    WHERE guild_id = ? AND user_id = ? {condition} 
+                    ORDER BY timestamp {order}, id {order} LIMIT ?""",
+                (guild_id, user_id, *cursor_params, limit)
+            )
+            rows = [dict(row) for row in await cursor.fetchall()]
+        
+        if order == "ASC":
+            rows.reverse()
+        return rows
+    
+    async def count_user_history(self, guild_id: int, user_id: int) -> int:
+        """Count a user's history entries (answered from the index)"""
+        async with self._read() as db:
+            cursor = await db.execute(
+                "SELECT COUNT(*) FROM mod_history WHERE guild_id = ? AND user_id = ?",
+                (guild_id, user_id)
+            )
+            row = await cursor.fetchone()
+            return row[0]
+    
+    async def iter_user_history(self, guild_id: int, user_id: int, page_size: int = 100) -> AsyncIterator[Dict]:
+        """Stream a user's whole history, newest first, one keyset page at a time
+        
+        A reader connection is only held while a page is fetched, never
+        between pages.
+        """
+        before = None
+        while True:
+            page = await self.get_user_history_page(guild_id, user_id, page_size, before=before)
+            for row in page:
+                yield row
+            if len(page) < page_size:
+                return
+            before = (page[-1]['timestamp'], page[-1]['id'])
+    
     async def log_staff_action(self, guild_id: int, staff_id: int, command: str, 
                              target_id: int = None, channel_id: int = None, 
                              arguments: str = None, success: bool = True):
         """Log a staff command usage"""
-        async with aiosqlite.connect(self.db_path) as db:
-            await db.execute(
-                """INSERT INTO staff_logs 
-                   (guild_id, staff_id, command, target_id, channel_id, arguments, success) 
-                   VALUES (?, ?, ?, ?, ?, ?, ?)""",
-                (guild_id, staff_id, command, target_id, channel_id, arguments, success)
-            )
-            await db.commit()
+        await self._submit((
+            """INSERT INTO staff_logs 
+               (guild_id, staff_id, command, target_id, channel_id, arguments, success) 
+               VALUES (?, ?, ?, ?, ?, ?, ?)""",
+            (guild_id, staff_id, command, target_id, channel_id, arguments, success)
+        ))
     
     async def get_staff_logs(self, guild_id: int, staff_id: int = None, limit: int = 100) -> List[Dict]:
         """Get staff command logs"""
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
+        async with self._read() as db:
             if staff_id:
                 cursor = await db.execute(
                     """SELECT * FROM staff_logs 
@@ -226,31 +717,51 @@ class DatabaseManager:
                                user_id: int, action_type: str, content: str = None, 
                                additional_data: Dict = None):
         """Log a message-related action"""
-        async with aiosqlite.connect(self.db_path) as db:
-            additional_json = json.dumps(additional_data) if additional_data else None
-            await db.execute(
-                """INSERT INTO message_logs 
-                   (guild_id, channel_id, message_id, user_id, content, action_type, additional_data) 
-                   VALUES (?, ?, ?, ?, ?, ?, ?)""",
-                (guild_id, channel_id, message_id, user_id, content, action_type, additional_json)
-            )
-            await db.commit()
+        additional_json = json.dumps(additional_data) if additional_data else None
+        await self._submit((
+            """INSERT INTO message_logs 
+               (guild_id, channel_id, message_id, user_id, content, action_type, additional_data) 
+               VALUES (?, ?, ?, ?, ?, ?, ?)""",
+            (guild_id, channel_id, message_id, user_id, content, action_type, additional_json)
+        ), *self._stat_statements(guild_id, Counter({("message_log", action_type): 1})))
+    
+    async def log_message_actions(self, rows: List[tuple]):
+        """Log many message actions in one write
+        
+        rows are (guild_id, channel_id, message_id, user_id, action_type, content) tuples.
+        """
+        if not rows:
+            return
+        
+        stats: Dict[int, Counter] = {}
+        for row in rows:
+            stats.setdefault(row[0], Counter())["message_log", row[4]] += 1
+        
+        await self._submit(*(
+            ("""INSERT INTO message_logs 
+                (guild_id, channel_id, message_id, user_id, content, action_type) 
+                VALUES (?, ?, ?, ?, ?, ?)""",
+             (guild_id, channel_id, message_id, user_id, content, action_type))
+            for guild_id, channel_id, message_id, user_id, action_type, content in rows
+        ), *(
+            statement
+            for guild_id, counts in stats.items()
+            for statement in self._stat_statements(guild_id, counts)
+        ))
     
     async def add_temp_action(self, guild_id: int, user_id: int, action_type: str, 
                             expires_at: datetime) -> int:
         """Add a temporary action"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self._write() as db:
             cursor = await db.execute(
                 "INSERT INTO temp_actions (guild_id, user_id, action_type, expires_at) VALUES (?, ?, ?, ?)",
                 (guild_id, user_id, action_type, expires_at)
             )
-            await db.commit()
             return cursor.lastrowid
     
     async def get_expired_temp_actions(self) -> List[Dict]:
         """Get all expired temporary actions that haven't been completed"""
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
+        async with self._read() as db:
             cursor = await db.execute(
                 "SELECT * FROM temp_actions WHERE expires_at <= ? AND completed = 0",
                 (datetime.now(),)
@@ -258,33 +769,75 @@ class DatabaseManager:
             rows = await cursor.fetchall()
             return [dict(row) for row in rows]
     
+    async def get_pending_temp_actions(self) -> List[Dict]:
+        """Get all temporary actions that haven't been completed, soonest first"""
+        async with self._read() as db:
+            cursor = await db.execute(
+                "SELECT * FROM temp_actions WHERE completed = 0 ORDER BY expires_at"
+            )
+            rows = await cursor.fetchall()
+            return [dict(row) for row in rows]
+    
     async def complete_temp_action(self, action_id: int):
         """Mark a temporary action as completed"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self._write() as db:
             await db.execute(
                 "UPDATE temp_actions SET completed = 1 WHERE id = ?",
                 (action_id,)
             )
-            await db.commit()
+    
+    async def complete_temp_actions(self, action_ids: List[int]):
+        """Mark several temporary actions as completed in one transaction"""
+        if not action_ids:
+            return
+        
+        async with self._write() as db:
+            # Chunked to stay under SQLite's bound-parameter limit
+            for start in range(0, len(action_ids), 500):
+                chunk = action_ids[start:start + 500]
+                placeholders = ", ".join("?" for _ in chunk)
+                await db.execute(
+                    f"UPDATE temp_actions SET completed = 1 WHERE id IN ({placeholders})",
+                    chunk
+                )
+    
+    async def spill_log_embeds(self, guild_id: int, channel_id: int, payloads: List[str]):
+        """Store serialized log embeds that did not fit in the channel's send queue"""
+        await self._submit(*(
+            ("INSERT INTO spilled_logs (guild_id, channel_id, payload) VALUES (?, ?, ?)",
+             (guild_id, channel_id, payload))
+            for payload in payloads
+        ))
+    
+    async def pop_spilled_log_embeds(self, channel_id: int, limit: int = 100) -> List[str]:
+        """Remove and return the oldest spilled log embeds for a channel"""
+        async with self._write() as db:
+            cursor = await db.execute(
+                "SELECT id, payload FROM spilled_logs WHERE channel_id = ? ORDER BY id LIMIT ?",
+                (channel_id, limit)
+            )
+            rows = await cursor.fetchall()
+            if rows:
+                await db.execute(
+                    "DELETE FROM spilled_logs WHERE channel_id = ? AND id <= ?",
+                    (channel_id, rows[-1][0])
+                )
+            return [row[1] for row in rows]
     
     async def log_automod_violation(self, guild_id: int, user_id: int, violation_type: str, 
                                   content: str, channel_id: int, action_taken: str = None):
         """Log an auto-moderation violation"""
-        async with aiosqlite.connect(self.db_path) as db:
-            await db.execute(
-                """INSERT INTO automod_violations 
-                   (guild_id, user_id, violation_type, content, channel_id, action_taken) 
-                   VALUES (?, ?, ?, ?, ?, ?)""",
-                (guild_id, user_id, violation_type, content, channel_id, action_taken)
-            )
-            await db.commit()
+        await self._submit((
+            """INSERT INTO automod_violations 
+               (guild_id, user_id, violation_type, content, channel_id, action_taken) 
+               VALUES (?, ?, ?, ?, ?, ?)""",
+            (guild_id, user_id, violation_type, content, channel_id, action_taken)
+        ), *self._stat_statements(guild_id, Counter({("automod", violation_type): 1})))
     
     async def get_automod_violations(self, guild_id: int, user_id: int = None, 
                                    violation_type: str = None, limit: int = 50) -> List[Dict]:
         """Get auto-moderation violations"""
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
-            
+        async with self._read() as db:
             query = "SELECT * FROM automod_violations WHERE guild_id = ?"
             params = [guild_id]
             
@@ -303,46 +856,158 @@ class DatabaseManager:
             rows = await cursor.fetchall()
             return [dict(row) for row in rows]
     
+    @staticmethod
+    def _stat_window(guild_id: int, hours: int, metric: str = None) -> Tuple[str, list]:
+        """SQL and parameters for (metric, dimension, bucket, count) rows from the last `hours` hours
+        
+        Recent hours come from the hourly buckets and compacted ones from the
+        daily rollups, so a window reaching past the hourly retention starts
+        at the beginning of its first day.
+        """
+        start_hour = int(time.time()) // 3600 - hours + 1
+        metric_filter = " AND metric = ?" if metric else ""
+        filter_params = [guild_id, metric] if metric else [guild_id]
+        
+        sql = f"""SELECT metric, dimension, bucket, count FROM stat_buckets 
+                  WHERE guild_id = ?{metric_filter} AND bucket >= ? 
+                  UNION ALL 
+                  SELECT metric, dimension, day * 24 AS bucket, count FROM stat_days 
+                  WHERE guild_id = ?{metric_filter} AND day >= ?"""
+        return sql, [*filter_params, start_hour, *filter_params, start_hour // 24]
+    
+    async def get_stat_counts(self, guild_id: int, metric: str, hours: int = None) -> Dict[str, int]:
+        """Get counts per dimension for a metric, all-time or over the last `hours` hours
+        
+        Reads the counter tables only, so the cost depends on the number of
+        dimensions (and hours), never on the size of the log tables.
+        """
+        async with self._read() as db:
+            if hours is None:
+                cursor = await db.execute(
+                    "SELECT dimension, count FROM stat_counters WHERE guild_id = ? AND metric = ?",
+                    (guild_id, metric)
+                )
+            else:
+                window, params = self._stat_window(guild_id, hours, metric)
+                cursor = await db.execute(
+                    f"SELECT dimension, SUM(count) FROM ({window}) GROUP BY dimension",
+                    params
+                )
+            rows = await cursor.fetchall()
+            return {row[0]: row[1] for row in rows}
+    
+    async def get_stat_series(self, guild_id: int, metric: str, hours: int = 24,
+                              dimension: str = None, granularity: str = "hour") -> List[Tuple[datetime, int]]:
+        """Get hourly or daily totals for a metric over the last `hours` hours
+        
+        Periods are UTC and oldest first; empty periods are omitted. Hours
+        that were compacted into daily rollups show up at their day's start.
+        """
+        step = 24 if granularity == "day" else 1
+        window, params = self._stat_window(guild_id, hours, metric)
+        query = f"SELECT bucket / {step} * {step} AS period, SUM(count) FROM ({window})"
+        if dimension is not None:
+            query += " WHERE dimension = ?"
+            params.append(str(dimension))
+        query += " GROUP BY period ORDER BY period"
+        
+        async with self._read() as db:
+            cursor = await db.execute(query, params)
+            rows = await cursor.fetchall()
+            return [(datetime.utcfromtimestamp(row[0] * 3600), row[1]) for row in rows]
+    
+    async def get_guild_stats(self, guild_id: int, hours: int = 24) -> Dict[str, Dict[str, Dict[str, int]]]:
+        """Get all-time and recent counts for every metric in one read
+        
+        Returns {metric: {"total": {dimension: count}, "recent": {dimension: count}}}.
+        """
+        window, params = self._stat_window(guild_id, hours)
+        async with self._read() as db:
+            cursor = await db.execute(
+                "SELECT metric, dimension, count FROM stat_counters WHERE guild_id = ?",
+                (guild_id,)
+            )
+            totals = await cursor.fetchall()
+            cursor = await db.execute(
+                f"SELECT metric, dimension, SUM(count) FROM ({window}) GROUP BY metric, dimension",
+                params
+            )
+            recent = await cursor.fetchall()
+        
+        stats = {metric: {"total": {}, "recent": {}} for metric in STAT_METRICS}
+        for key, rows in (("total", totals), ("recent", recent)):
+            for metric, dimension, count in rows:
+                stats.setdefault(metric, {"total": {}, "recent": {}})[key][dimension] = count
+        return stats
+    
+    async def compact_stat_buckets(self, keep_hours: int = 168) -> int:
+        """Fold hourly buckets older than keep_hours into daily rollups, returning the rows folded
+        
+        Only whole UTC days are folded, one per transaction, so the writer is
+        never held for long and a day is never split between the two tables.
+        """
+        cutoff_day = (int(time.time()) // 3600 - keep_hours) // 24
+        folded = 0
+        
+        while True:
+            async with self._write() as db:
+                cursor = await db.execute("SELECT MIN(bucket) FROM stat_buckets")
+                row = await cursor.fetchone()
+                if row[0] is None or row[0] // 24 >= cutoff_day:
+                    return folded
+                
+                day = row[0] // 24
+                await db.execute(
+                    """INSERT INTO stat_days (guild_id, metric, day, dimension, count)
+                       SELECT guild_id, metric, ?, dimension, SUM(count) FROM stat_buckets 
+                       WHERE bucket >= ? AND bucket < ? 
+                       GROUP BY guild_id, metric, dimension
+                       ON CONFLICT (guild_id, metric, day, dimension) DO UPDATE SET count = count + excluded.count""",
+                    (day, day * 24, day * 24 + 24)
+                )
+                cursor = await db.execute(
+                    "DELETE FROM stat_buckets WHERE bucket >= ? AND bucket < ?",
+                    (day * 24, day * 24 + 24)
+                )
+                folded += cursor.rowcount
+            
+            # Let other writers in between days
+            await asyncio.sleep(0)
+    
     async def setup_guild(self, guild_id: int, settings: Dict = None):
         """Setup a guild in the database"""
         if settings is None:
             settings = {}
         
-        async with aiosqlite.connect(self.db_path) as db:
-            await db.execute(
-                """INSERT OR REPLACE INTO guild_settings (guild_id, settings, updated_at) 
-                   VALUES (?, ?, ?)""",
-                (guild_id, json.dumps(settings), datetime.now())
-            )
-            await db.commit()
+        await self.update_guild_settings(guild_id, settings)
     
     async def get_guild_settings(self, guild_id: int) -> Dict:
-        """Get guild settings"""
-        async with aiosqlite.connect(self.db_path) as db:
-            cursor = await db.execute(
-                "SELECT settings FROM guild_settings WHERE guild_id = ?",
-                (guild_id,)
-            )
-            row = await cursor.fetchone()
-            if row:
-                return json.loads(row[0])
-            return {}
+        """Get guild settings (served from memory)"""
+        return copy.deepcopy(self._guild_settings.get(guild_id, {}))
+    
+    def cached_guild_settings(self, guild_id: int) -> Dict:
+        """Get guild settings without copying; callers must not modify the result"""
+        return self._guild_settings.get(guild_id, {})
+    
+    async def get_all_guild_settings(self) -> Dict[int, Dict]:
+        """Get settings for every guild, keyed by guild ID"""
+        return copy.deepcopy(self._guild_settings)
     
     async def update_guild_settings(self, guild_id: int, settings: Dict):
-        """Update guild settings"""
-        async with aiosqlite.connect(self.db_path) as db:
+        """Update guild settings, writing through to the in-memory copy once committed"""
+        async with self._write() as db:
             await db.execute(
                 """INSERT OR REPLACE INTO guild_settings (guild_id, settings, updated_at) 
                    VALUES (?, ?, ?)""",
                 (guild_id, json.dumps(settings), datetime.now())
             )
-            await db.commit()
+        self._guild_settings[guild_id] = copy.deepcopy(settings)
     
     async def cleanup_old_data(self, days: int = 365):
         """Clean up old data from the database"""
         cutoff_date = datetime.now() - timedelta(days=days)
         
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self._write() as db:
             # Clean old message logs
             await db.execute(
                 "DELETE FROM message_logs WHERE timestamp < ?",
@@ -361,7 +1026,12 @@ class DatabaseManager:
                 (cutoff_date,)
             )
             
-            await db.commit()
+            # Hourly statistics share the retention window; daily rollups and lifetime counters are kept
+            await db.execute(
+                "DELETE FROM stat_buckets WHERE bucket < ?",
+                (int(cutoff_date.timestamp()) // 3600,)
+            )
+            
             logger.info(f"Cleaned up data older than {days} days")
     
     async def backup_database(self, backup_path: str = None):
@@ -370,9 +1040,9 @@ class DatabaseManager:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             backup_path = f"database_backup_{timestamp}.db"
         
-        async with aiosqlite.connect(self.db_path) as source:
+        async with self._write_lock:
             async with aiosqlite.connect(backup_path) as backup:
-                await source.backup(backup)
+                await self._writer.backup(backup)
         
         logger.info(f"Database backed up to {backup_path}")
         return backup_path
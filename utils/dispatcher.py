@@ -0,0 +1,216 @@
+import asyncio
+import discord
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+OVERFLOW_POLICIES = ("drop", "summarize", "spill")
+
+# Discord limits for a single message
+EMBEDS_PER_MESSAGE = 10
+EMBED_CHARS_PER_MESSAGE = 6000
+
+class ChannelQueue:
+    """Pending embeds for one log channel and the task draining them"""
+    
+    def __init__(self, channel: discord.abc.Messageable):
+        self.channel = channel
+        self.items = deque()  # (enqueued_at, embed), oldest first
+        self.wakeup = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+        
+        self.suppressed = 0  # Dropped under the summarize policy, not yet reported
+        self.spilled = 0  # Stored in the database, waiting to be replayed
+        self.last_lag = 0.0
+    
+    @property
+    def lag(self) -> float:
+        """Seconds the oldest pending embed has been waiting"""
+        return time.monotonic() - self.items[0][0] if self.items else 0.0
+
+class LogDispatcher:
+    """Coalesces log embeds into as few messages as possible, per channel
+    
+    Each channel gets a bounded queue drained by its own task, so one rate
+    limited channel never holds up another. A batch is sent as soon as ten
+    embeds are waiting or flush_interval has passed since the first one.
+    When a queue is full the overflow policy decides what happens to new
+    embeds: drop them, drop them and post a summary count later, or spill
+    them to the database and replay them once the queue drains.
+    """
+    
+    def __init__(self, send: Callable[[Any, List[discord.Embed]], Awaitable[None]],
+                 max_queue: int = 500, flush_interval: float = 1.0, overflow: str = "summarize",
+                 spill: Callable[[Any, List[discord.Embed]], Awaitable[None]] = None,
+                 unspill: Callable[[Any, int], Awaitable[List[discord.Embed]]] = None):
+        if overflow not in OVERFLOW_POLICIES:
+            logger.warning(f"Unknown overflow policy '{overflow}', falling back to 'summarize'")
+            overflow = "summarize"
+        if overflow == "spill" and (spill is None or unspill is None):
+            logger.warning("Spill overflow policy needs database callbacks, falling back to 'summarize'")
+            overflow = "summarize"
+        
+        self.send = send
+        self.max_queue = max(EMBEDS_PER_MESSAGE, max_queue)
+        self.flush_interval = flush_interval
+        self.overflow = overflow
+        self.spill = spill
+        self.unspill = unspill
+        
+        self._queues: Dict[int, ChannelQueue] = {}
+        self._closing = False
+        
+        self.sent_messages = 0
+        self.sent_embeds = 0
+        self.dropped = 0
+        self.spilled = 0
+    
+    async def enqueue(self, channel: discord.abc.Messageable, embed: discord.Embed) -> bool:
+        """Queue an embed for channel, returning False if the overflow policy rejected it"""
+        queue = self._queues.get(channel.id)
+        if queue is None:
+            queue = self._queues[channel.id] = ChannelQueue(channel)
+            if self.overflow == "spill":
+                # Check once for embeds spilled before a restart
+                queue.spilled = 1
+        queue.channel = channel
+        
+        if len(queue.items) >= self.max_queue:
+            await self._overflow(queue, embed)
+            return False
+        
+        queue.items.append((time.monotonic(), embed))
+        if len(queue.items) >= EMBEDS_PER_MESSAGE:
+            queue.wakeup.set()
+        
+        if queue.task is None or queue.task.done():
+            queue.task = asyncio.create_task(self._drain(queue))
+        return True
+    
+    async def _overflow(self, queue: ChannelQueue, embed: discord.Embed):
+        if self.overflow == "spill":
+            try:
+                await self.spill(queue.channel, [embed])
+                queue.spilled += 1
+                self.spilled += 1
+                return
+            except Exception as e:
+                logger.error(f"Error spilling log embed for channel {queue.channel.id}: {e}")
+        
+        self.dropped += 1
+        if self.overflow == "summarize":
+            queue.suppressed += 1
+    
+    def _take_batch(self, queue: ChannelQueue) -> List[tuple]:
+        """Pop up to ten embeds that fit in one message"""
+        batch = []
+        chars = 0
+        while queue.items and len(batch) < EMBEDS_PER_MESSAGE:
+            size = len(queue.items[0][1])
+            if batch and chars + size > EMBED_CHARS_PER_MESSAGE:
+                break
+            batch.append(queue.items.popleft())
+            chars += size
+        return batch
+    
+    async def _drain(self, queue: ChannelQueue):
+        """Send the channel's pending embeds, exiting once the queue is empty"""
+        while True:
+            if not queue.items:
+                if queue.suppressed:
+                    queue.items.append((time.monotonic(), self._summary(queue.suppressed)))
+                    queue.suppressed = 0
+                elif queue.spilled and not self._closing:
+                    await self._replay(queue)
+                    if not queue.items:
+                        return
+                else:
+                    return
+            
+            # Give more embeds a chance to arrive unless a full message is already waiting
+            if len(queue.items) < EMBEDS_PER_MESSAGE and not self._closing:
+                queue.wakeup.clear()
+                wait = self.flush_interval - queue.lag
+                if wait > 0:
+                    try:
+                        await asyncio.wait_for(queue.wakeup.wait(), wait)
+                    except asyncio.TimeoutError:
+                        pass
+            
+            batch = self._take_batch(queue)
+            if not batch:
+                continue
+            
+            queue.last_lag = time.monotonic() - batch[0][0]
+            embeds = [embed for _, embed in batch]
+            try:
+                await self.send(queue.channel, embeds)
+                self.sent_messages += 1
+                self.sent_embeds += len(embeds)
+            except discord.Forbidden:
+                logger.warning(f"No permission to send logs in channel {queue.channel.id}")
+                self.dropped += len(embeds)
+            except Exception as e:
+                logger.error(f"Error sending logs in channel {queue.channel.id}: {e}")
+                self.dropped += len(embeds)
+    
+    async def _replay(self, queue: ChannelQueue):
+        """Move spilled embeds back into the queue once it has drained"""
+        try:
+            embeds = await self.unspill(queue.channel, self.max_queue // 2)
+        except Exception as e:
+            logger.error(f"Error loading spilled logs for channel {queue.channel.id}: {e}")
+            return
+        
+        if len(embeds) < self.max_queue // 2:
+            queue.spilled = 0
+        else:
+            queue.spilled = max(1, queue.spilled - len(embeds))
+        
+        now = time.monotonic()
+        queue.items.extend((now, embed) for embed in embeds)
+    
+    @staticmethod
+    def _summary(count: int) -> discord.Embed:
+        return discord.Embed(
+            title="⚠️ Logs Dropped",
+            description=f"{count} log entries were dropped because the log channel was falling behind.",
+            color=0xffaa00
+        )
+    
+    async def close(self):
+        """Flush every queue, skipping the batching delay"""
+        self._closing = True
+        for queue in self._queues.values():
+            queue.wakeup.set()
+        
+        tasks = [queue.task for queue in self._queues.values() if queue.task and not queue.task.done()]
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+    
+    def channel_stats(self, channel_id: int) -> Dict[str, Any]:
+        queue = self._queues.get(channel_id)
+        if queue is None:
+            return {"depth": 0, "lag": 0.0, "last_lag": 0.0, "spilled": 0}
+        return {
+            "depth": len(queue.items),
+            "lag": queue.lag,
+            "last_lag": queue.last_lag,
+            "spilled": queue.spilled
+        }
+    
+    @property
+    def stats(self) -> Dict[str, Any]:
+        queues = self._queues.values()
+        return {
+            "channels": len(self._queues),
+            "depth": sum(len(queue.items) for queue in queues),
+            "max_lag": max((queue.lag for queue in queues), default=0.0),
+            "sent_messages": self.sent_messages,
+            "sent_embeds": self.sent_embeds,
+            "dropped": self.dropped,
+            "spilled": self.spilled
+        }
@@ -2,7 +2,7 @@ import yaml
 import discord
 from datetime import datetime, timedelta
 import re
-from typing import Optional, Dict, Any, Union
+from typing import Optional, Dict, Any, Union, Awaitable, Callable, List
 import logging
 
 logger = logging.getLogger(__name__)
@@ -145,6 +145,17 @@ def truncate_text(text: str, max_length: int = 1024) -> str:
         return text
     return text[:max_length - 3] + "..."
 
+def format_bar_chart(rows: List[tuple], width: int = 16) -> str:
+    """Render (label, value) rows as a monospace bar chart, for use in a code block"""
+    peak = max((value for _, value in rows), default=0)
+    label_width = max((len(label) for label, _ in rows), default=0)
+    
+    lines = []
+    for label, value in rows:
+        bar = "█" * (round(value / peak * width) if peak else 0)
+        lines.append(f"{label.rjust(label_width)} │{bar.ljust(width)} {value}")
+    return "\n".join(lines)
+
 def get_user_avatar(user: Union[discord.User, discord.Member]) -> str:
     """Get user avatar URL"""
     if user.avatar:
@@ -181,18 +192,21 @@ def is_url(text: str) -> bool:
     )
     return url_pattern.search(text) is not None
 
+# Tolerates the usual obfuscations: "discord . gg", "discord dot gg", "discord(.)gg/ abc"
+_DOT = r'\s*(?:\.|\(\s*\.\s*\)|\[\s*\.\s*\]|\(?\s*dot\s*\)?|\[\s*dot\s*\])\s*'
+INVITE_PATTERN = re.compile(
+    r'discord(?:app)?' + _DOT + r'(?:gg|com\s*/\s*invite|io|me|li)\s*/\s*([a-zA-Z0-9-]+)',
+    re.IGNORECASE
+)
+
 def extract_invite_code(text: str) -> Optional[str]:
-    """Extract Discord invite code from text"""
-    invite_patterns = [
-        r'discord\.gg/([a-zA-Z0-9]+)',
-        r'discord\.com/invite/([a-zA-Z0-9]+)',
-        r'discordapp\.com/invite/([a-zA-Z0-9]+)'
-    ]
+    """Extract Discord invite code from text
     
-    for pattern in invite_patterns:
-        match = re.search(pattern, text)
-        if match:
-            return match.group(1)
+    Pass text through utils.text.fold_text first to also catch homoglyphs and zero-width characters.
+    """
+    match = INVITE_PATTERN.search(text)
+    if match:
+        return match.group(1)
     
     return None
 
@@ -275,6 +289,61 @@ class Paginator:
         """Get total number of pages"""
         return len(self.pages)
 
+class KeysetPaginator:
+    """Lazy pagination over rows ordered newest first by (timestamp, id)
+    
+    Only the current page is held. Pages are fetched on demand through
+    fetch_page(limit, before=..., after=..., oldest=...), using the first or
+    last entry of the current page as the cursor, so moving a page costs the
+    same whether the history has ten rows or a million.
+    """
+    
+    def __init__(self, fetch_page: Callable[..., Awaitable[List[Dict]]], total: int, per_page: int = 10):
+        self.fetch_page = fetch_page
+        self.total = total
+        self.per_page = per_page
+        self.page_num = 0
+        self.entries: List[Dict] = []
+    
+    @staticmethod
+    def _cursor(entry: Dict) -> tuple:
+        return entry['timestamp'], entry['id']
+    
+    @property
+    def max_pages(self) -> int:
+        """Get total number of pages"""
+        return max(1, -(-self.total // self.per_page))
+    
+    async def first(self) -> List[Dict]:
+        self.entries = await self.fetch_page(self.per_page)
+        self.page_num = 0
+        return self.entries
+    
+    async def next(self) -> List[Dict]:
+        if self.entries and self.page_num < self.max_pages - 1:
+            page = await self.fetch_page(self.per_page, before=self._cursor(self.entries[-1]))
+            if page:
+                self.entries = page
+                self.page_num += 1
+        return self.entries
+    
+    async def previous(self) -> List[Dict]:
+        if self.entries and self.page_num > 0:
+            page = await self.fetch_page(self.per_page, after=self._cursor(self.entries[0]))
+            if len(page) < self.per_page:
+                # Ran into the newest entries (some were deleted meanwhile)
+                return await self.first()
+            self.entries = page
+            self.page_num -= 1
+        return self.entries
+    
+    async def last(self) -> List[Dict]:
+        # The last page holds whatever is left over, so page boundaries match walking forward
+        remainder = self.total % self.per_page or self.per_page
+        self.entries = await self.fetch_page(remainder, oldest=True)
+        self.page_num = self.max_pages - 1
+        return self.entries
+
 def validate_reason(reason: str, max_length: int = 512) -> Optional[str]:
     """Validate and clean reason string"""
     if not reason:
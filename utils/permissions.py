@@ -1,108 +1,147 @@
 import discord
 from discord.ext import commands
-from typing import List, Union, Optional
+from typing import Dict, List, Union, Optional
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Permission levels in ascending order; each level includes the ones below it
+LEVELS = {
+    "user": 0,
+    "helper": 1,
+    "moderator": 2,
+    "admin": 3,
+    "owner": 4
+}
+LEVEL_NAMES = {value: name for name, value in LEVELS.items()}
+
+# Cached member levels kept before the cache is reset
+MAX_CACHED_LEVELS = 100000
+
 class PermissionManager:
+    """Resolves permission levels from config roles, compiled once and cached per member
+    
+    Role lists are compiled into a role ID -> level map whenever the config is
+    (re)loaded, and each member's level is computed once and cached until their
+    roles, a role's permissions or the config change.
+    """
+    
     def __init__(self, bot):
         self.bot = bot
+        self._levels: Dict[int, Dict[int, int]] = {}  # guild_id -> member_id -> level
+        self._cached = 0
+        self.compile()
     
     def get_config(self):
         """Get bot configuration"""
         return getattr(self.bot, 'config', {})
     
-    def is_owner(self, user: Union[discord.User, discord.Member]) -> bool:
-        """Check if user is bot owner"""
+    def compile(self):
+        """Rebuild role and command lookups from the config and drop cached levels"""
         config = self.get_config()
-        owners = config.get('bot', {}).get('owners', [])
-        return user.id in owners or self.bot.is_owner(user)
+        permissions = config.get('permissions', {})
+        
+        owners = set(config.get('bot', {}).get('owners', []))
+        # Set from the application info in setup_hook
+        if getattr(self.bot, 'owner_id', None):
+            owners.add(self.bot.owner_id)
+        owners.update(getattr(self.bot, 'owner_ids', None) or ())
+        self.owner_ids = frozenset(owners)
+        
+        # Highest level wins for a role listed under several keys
+        role_levels = {}
+        for level_name in ("helper", "moderator", "admin"):
+            for role_id in permissions.get(f'{level_name}_roles', []):
+                role_levels[role_id] = LEVELS[level_name]
+        self.role_levels = role_levels
+        
+        # Command -> lowest level allowed to use it
+        self.command_levels = {}
+        for command_name, required in permissions.get('commands', {}).items():
+            allowed = [LEVELS[perm] for perm in required if perm in LEVELS]
+            if required:
+                self.command_levels[command_name] = min(allowed) if allowed else LEVELS["owner"]
+        
+        self.invalidate_all()
     
-    def is_admin(self, member: discord.Member) -> bool:
-        """Check if member has admin permissions"""
-        if self.is_owner(member):
-            return True
+    def invalidate_member(self, member: discord.Member):
+        levels = self._levels.get(member.guild.id)
+        if levels is not None and levels.pop(member.id, None) is not None:
+            self._cached -= 1
+    
+    def invalidate_guild(self, guild: discord.Guild):
+        levels = self._levels.pop(guild.id, None)
+        if levels:
+            self._cached -= len(levels)
+    
+    def invalidate_all(self):
+        self._levels.clear()
+        self._cached = 0
+    
+    def get_level(self, member: Union[discord.User, discord.Member]) -> int:
+        """Highest permission level of a member, cached until their roles change"""
+        if member.id in self.owner_ids:
+            return LEVELS["owner"]
+        
+        guild = getattr(member, 'guild', None)
+        if guild is None:
+            return LEVELS["user"]
+        
+        levels = self._levels.get(guild.id)
+        if levels is not None:
+            level = levels.get(member.id)
+            if level is not None:
+                return level
+        else:
+            levels = self._levels[guild.id] = {}
         
-        # Check if member has administrator permission
-        if member.guild_permissions.administrator:
-            return True
+        level = self._compute_level(member)
         
-        # Check configured admin roles
-        config = self.get_config()
-        admin_roles = config.get('permissions', {}).get('admin_roles', [])
+        if self._cached >= MAX_CACHED_LEVELS:
+            self.invalidate_all()
+            levels = self._levels[guild.id] = {}
+        levels[member.id] = level
+        self._cached += 1
+        return level
+    
+    def _compute_level(self, member: discord.Member) -> int:
+        if member.guild_permissions.administrator:
+            return LEVELS["admin"]
         
+        level = LEVELS["user"]
+        role_levels = self.role_levels
         for role in member.roles:
-            if role.id in admin_roles:
-                return True
-        
-        return False
+            if role.id in role_levels and role_levels[role.id] > level:
+                level = role_levels[role.id]
+        return level
+    
+    def is_owner(self, user: Union[discord.User, discord.Member]) -> bool:
+        """Check if user is bot owner"""
+        return user.id in self.owner_ids
+    
+    def is_admin(self, member: discord.Member) -> bool:
+        """Check if member has admin permissions"""
+        return self.get_level(member) >= LEVELS["admin"]
     
     def is_moderator(self, member: discord.Member) -> bool:
         """Check if member has moderator permissions"""
-        if self.is_admin(member):
-            return True
-        
-        # Check configured moderator roles
-        config = self.get_config()
-        moderator_roles = config.get('permissions', {}).get('moderator_roles', [])
-        
-        for role in member.roles:
-            if role.id in moderator_roles:
-                return True
-        
-        return False
+        return self.get_level(member) >= LEVELS["moderator"]
     
     def is_helper(self, member: discord.Member) -> bool:
         """Check if member has helper permissions"""
-        if self.is_moderator(member):
-            return True
-        
-        # Check configured helper roles
-        config = self.get_config()
-        helper_roles = config.get('permissions', {}).get('helper_roles', [])
-        
-        for role in member.roles:
-            if role.id in helper_roles:
-                return True
-        
-        return False
+        return self.get_level(member) >= LEVELS["helper"]
     
     def can_use_command(self, member: discord.Member, command_name: str) -> bool:
         """Check if member can use a specific command"""
-        if self.is_owner(member):
-            return True
-        
-        config = self.get_config()
-        command_perms = config.get('permissions', {}).get('commands', {})
-        
-        required_perms = command_perms.get(command_name, [])
-        
-        if not required_perms:
+        required = self.command_levels.get(command_name)
+        if required is None:
             return True  # No specific permissions required
         
-        for perm in required_perms:
-            if perm == "admin" and self.is_admin(member):
-                return True
-            elif perm == "moderator" and self.is_moderator(member):
-                return True
-            elif perm == "helper" and self.is_helper(member):
-                return True
-        
-        return False
+        return self.get_level(member) >= required
     
     def get_user_level(self, member: discord.Member) -> str:
         """Get the highest permission level of a user"""
-        if self.is_owner(member):
-            return "owner"
-        elif self.is_admin(member):
-            return "admin"
-        elif self.is_moderator(member):
-            return "moderator"
-        elif self.is_helper(member):
-            return "helper"
-        else:
-            return "user"
+        return LEVEL_NAMES[self.get_level(member)]
     
     def check_hierarchy(self, moderator: discord.Member, target: discord.Member) -> bool:
         """Check if moderator can act on target based on role hierarchy"""
@@ -0,0 +1,129 @@
+import asyncio
+import heapq
+import logging
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+def to_timestamp(value: Union[datetime, str]) -> float:
+    """Convert a stored expires_at value (datetime or SQLite text) to a POSIX timestamp"""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return value.timestamp()
+
+class TempActionScheduler:
+    """Fires temporary actions at their expiry time using a min-heap
+    
+    Pending actions are kept in memory ordered by expiry, so scheduling costs
+    O(log n) and the runner sleeps exactly until the next deadline instead of
+    polling the database.
+    """
+    
+    def __init__(self, callback: Callable[[List[Dict]], Awaitable[None]], max_sleep: float = 60.0):
+        self.callback = callback
+        # Cap on a single sleep, so wall-clock adjustments are picked up
+        self.max_sleep = max_sleep
+        
+        self._heap: List[tuple] = []
+        self._pending_ids = set()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+    
+    def __len__(self) -> int:
+        return len(self._heap)
+    
+    def schedule(self, action: Dict):
+        """Schedule a temp_actions row; rows already scheduled are ignored"""
+        action_id = action['id']
+        if action_id in self._pending_ids:
+            return
+        
+        expires_at = to_timestamp(action['expires_at'])
+        self._pending_ids.add(action_id)
+        heapq.heappush(self._heap, (expires_at, action_id, action))
+        
+        # Only wake the runner if this action is now the earliest deadline
+        if self._heap[0][1] == action_id:
+            self._wakeup.set()
+    
+    def start(self):
+        """Start the scheduler task"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        """Stop the scheduler task, leaving pending actions in the database"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
+    def _pop_due(self, now: float) -> List[Dict]:
+        """Remove and return every action whose deadline has passed"""
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            _, action_id, action = heapq.heappop(self._heap)
+            self._pending_ids.discard(action_id)
+            due.append(action)
+        return due
+    
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            
+            due = self._pop_due(time.time())
+            if due:
+                try:
+                    await self.callback(due)
+                except Exception as e:
+                    logger.error(f"Error processing {len(due)} expired temporary actions: {e}")
+                continue
+            
+            timeout = self.max_sleep
+            if self._heap:
+                timeout = min(timeout, max(0.0, self._heap[0][0] - time.time()))
+            
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+class GroupedExecutor:
+    """Runs work for grouped items concurrently with bounded parallelism
+    
+    Groups map to Discord rate-limit buckets (e.g. one group per guild for the
+    guild ban route), so each group gets a small concurrency limit while a
+    global limit caps the total number of in-flight requests. discord.py still
+    handles the bucket headers and 429 retries for every request.
+    """
+    
+    def __init__(self, max_concurrency: int = 10, per_group_concurrency: int = 2):
+        self.max_concurrency = max(1, max_concurrency)
+        self.per_group_concurrency = max(1, per_group_concurrency)
+    
+    async def run(self, groups: Dict[Any, List], worker: Callable[[Any, Any], Awaitable[Any]]) -> List[tuple]:
+        """Call worker(group_key, item) for every item, returning (item, result) pairs
+        
+        A worker that raises yields the exception as its result.
+        """
+        global_limit = asyncio.Semaphore(self.max_concurrency)
+        
+        async def run_item(key, item, group_limit):
+            async with group_limit, global_limit:
+                try:
+                    return item, await worker(key, item)
+                except Exception as e:
+                    logger.error(f"Error processing {item!r} for {key}: {e}")
+                    return item, e
+        
+        tasks = []
+        for key, items in groups.items():
+            group_limit = asyncio.Semaphore(self.per_group_concurrency)
+            tasks.extend(run_item(key, item, group_limit) for item in items)
+        
+        return list(await asyncio.gather(*tasks))
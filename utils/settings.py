@@ -0,0 +1,69 @@
+import logging
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+def merge_settings(defaults: Dict, overrides: Dict) -> Dict:
+    """Deep-merge overrides into defaults without modifying either
+    
+    Nested dicts are merged key by key; any other value in overrides replaces
+    the default. Subtrees without overrides are shared, not copied.
+    """
+    merged = dict(defaults)
+    for key, value in overrides.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge_settings(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+class GuildConfig:
+    """Effective per-guild configuration: config.yml defaults merged with guild_settings overrides
+    
+    Merged configs are built on first use and cached per guild, so reading
+    one costs a dict lookup. Guilds without overrides share bot.config
+    itself. Updates are written through to the database and announced with
+    a guild_settings_update event so cogs can rebuild anything derived from
+    the old values.
+    """
+    
+    def __init__(self, bot):
+        self.bot = bot
+        self._effective: Dict[int, Dict] = {}
+    
+    def get(self, guild_id: Optional[int]) -> Dict[str, Any]:
+        """Get the effective configuration for a guild (bot.config for DMs); treat it as read-only"""
+        if guild_id is None:
+            return self.bot.config
+        
+        effective = self._effective.get(guild_id)
+        if effective is None:
+            overrides = self.overrides(guild_id)
+            effective = merge_settings(self.bot.config, overrides) if overrides else self.bot.config
+            self._effective[guild_id] = effective
+        return effective
+    
+    def overrides(self, guild_id: int) -> Dict[str, Any]:
+        """Get the settings a guild overrides; treat it as read-only"""
+        return self.bot.db.cached_guild_settings(guild_id)
+    
+    def has_overrides(self, guild_id: int, section: str) -> bool:
+        return section in self.overrides(guild_id)
+    
+    async def update(self, guild_id: int, changes: Dict[str, Any]):
+        """Merge changes into a guild's overrides, save them and notify listeners"""
+        settings = merge_settings(self.overrides(guild_id), changes)
+        await self.bot.db.update_guild_settings(guild_id, settings)
+        self.changed(guild_id)
+    
+    def changed(self, guild_id: int):
+        """Drop a guild's merged config and dispatch guild_settings_update"""
+        self._effective.pop(guild_id, None)
+        self.bot.dispatch('guild_settings_update', guild_id)
+    
+    def invalidate(self, guild_id: Optional[int] = None):
+        """Drop merged configs, e.g. after config.yml is reloaded"""
+        if guild_id is None:
+            self._effective.clear()
+        else:
+            self._effective.pop(guild_id, None)
@@ -0,0 +1,232 @@
+import logging
+import re
+import unicodedata
+from array import array
+from typing import Iterable, List, Set
+
+logger = logging.getLogger(__name__)
+
+# Invisible characters used to split words without changing how they render
+ZERO_WIDTH_CHARS = "\u200b\u200c\u200d\u200e\u200f\u2060\u2061\u2062\u2063\u2064\ufeff\u00ad\u180e\u034f"
+
+# Lookalike letters NFKC leaves alone (mostly Cyrillic and Greek), folded to Latin
+CONFUSABLES = {
+    "а": "a", "в": "b", "е": "e", "ё": "e", "к": "k", "м": "m", "н": "h", "о": "o",
+    "р": "p", "с": "c", "т": "t", "у": "y", "х": "x", "і": "i", "ї": "i", "ј": "j",
+    "ѕ": "s", "ԁ": "d", "ɡ": "g", "ո": "n", "ս": "u",
+    "А": "A", "В": "B", "Е": "E", "К": "K", "М": "M", "Н": "H", "О": "O", "Р": "P",
+    "С": "C", "Т": "T", "У": "Y", "Х": "X", "І": "I", "Ј": "J", "Ѕ": "S",
+    "α": "a", "β": "b", "ε": "e", "ι": "i", "κ": "k", "ν": "v", "ο": "o", "ρ": "p",
+    "τ": "t", "υ": "u", "χ": "x",
+    "Α": "A", "Β": "B", "Ε": "E", "Ζ": "Z", "Η": "H", "Ι": "I", "Κ": "K", "Μ": "M",
+    "Ν": "N", "Ο": "O", "Ρ": "P", "Τ": "T", "Υ": "Y", "Χ": "X",
+}
+
+# Common leetspeak substitutions, applied after lowercasing. Punctuation such as
+# "!", "|" and "+" is left out, since it is far more often just punctuation, and
+# so is "8", which ordinary chat uses as a syllable ("l8r", "gr8").
+LEETSPEAK = {
+    "0": "o", "1": "i", "3": "e", "4": "a", "5": "s", "7": "t",
+    "@": "a", "$": "s",
+}
+
+FOLD_TABLE = str.maketrans({**dict.fromkeys(ZERO_WIDTH_CHARS), **CONFUSABLES})
+LEET_TABLE = str.maketrans(LEETSPEAK)
+# Leetspeak is only undone inside tokens that also contain a letter ("sh1t", "a$$"), never in "100" or "$5".
+# Only tokens holding a leet character match, so ordinary words never reach _unleet.
+LEET_TOKEN = re.compile(r"[\w@$]*[0-9@$][\w@$]*")
+# Runs of three or more of a character; doubled letters are normal spelling ("ass", "fool")
+REPEATED_CHARS = re.compile(r"(.)\1{2,}", re.DOTALL)
+
+def fold_text(text: str) -> str:
+    """Apply NFKC, strip zero-width characters and fold confusable letters, keeping case"""
+    if not text.isascii():
+        text = unicodedata.normalize("NFKC", text).translate(FOLD_TABLE)
+    return text
+
+def _unleet(match: re.Match) -> str:
+    token = match.group()
+    if any(char.isalpha() for char in token):
+        return token.translate(LEET_TABLE)
+    return token
+
+def normalize_text(text: str) -> str:
+    """Canonical form for obfuscation-resistant matching
+    
+    Folds the text, lowercases it, undoes leetspeak inside words and shortens
+    runs of three or more of the same character to two ("fuuuu" -> "fuu").
+    Patterns must go through the same function before they are compared
+    against normalized text.
+    """
+    return normalize_folded(fold_text(text))
+
+def normalize_folded(text: str) -> str:
+    """normalize_text for text that already went through fold_text"""
+    text = text.lower()
+    if text.translate(LEET_TABLE) != text:
+        text = LEET_TOKEN.sub(_unleet, text)
+    return REPEATED_CHARS.sub(r"\1\1", text)
+
+MATCH_MODES = ("substring", "whole_word")
+
+# Below this many words a plain substring scan beats walking the automaton in Python
+SMALL_LIST_THRESHOLD = 50
+
+class WordMatcher:
+    """Aho-Corasick automaton that finds every listed term in a single scan
+    
+    The automaton is built once from the word list, so a lookup costs
+    O(len(text) + matches) regardless of how many words are configured.
+    Words are matched case-insensitively; callers pass lowercased text.
+    """
+    
+    def __init__(self, words: Iterable[str], mode: str = "substring"):
+        if mode not in MATCH_MODES:
+            logger.warning(f"Unknown match mode '{mode}', falling back to 'substring'")
+            mode = "substring"
+        self.mode = mode
+        
+        # Deduplicate while keeping config order
+        self.words = list(dict.fromkeys(word.lower() for word in words if word))
+        
+        # State 0 is the root; each state has a goto table, a fail link and its outputs
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+        
+        for index, word in enumerate(self.words):
+            state = 0
+            for char in word:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                    self._goto[state][char] = next_state
+                state = next_state
+            self._output[state].append(index)
+        
+        self._build_fail_links()
+    
+    def _build_fail_links(self):
+        """Breadth-first pass linking each state to its longest proper suffix state"""
+        queue = list(self._goto[0].values())
+        head = 0
+        
+        while head < len(queue):
+            state = queue[head]
+            head += 1
+            
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                
+                # Inherit matches that end here through the suffix link
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+    
+    def __len__(self) -> int:
+        return len(self.words)
+    
+    def find_all(self, text: str) -> List[str]:
+        """Return every distinct listed word found in text"""
+        if not self.words:
+            return []
+        
+        if self.mode == "substring" and len(self.words) < SMALL_LIST_THRESHOLD:
+            return [word for word in self.words if word in text]
+        
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+        whole_word = self.mode == "whole_word"
+        
+        found = {}
+        state = 0
+        for position, char in enumerate(text):
+            next_state = goto[state].get(char)
+            while next_state is None and state:
+                state = fail[state]
+                next_state = goto[state].get(char)
+            state = next_state or 0
+            
+            if not output[state]:
+                continue
+            
+            for index in output[state]:
+                if index in found:
+                    continue
+                if whole_word and not self._is_whole_word(text, position, len(self.words[index])):
+                    continue
+                found[index] = None
+        
+        return [self.words[index] for index in found]
+    
+    def search(self, text: str) -> bool:
+        """Return True if any listed word occurs in text"""
+        return bool(self.find_all(text))
+    
+    @staticmethod
+    def _is_whole_word(text: str, end: int, length: int) -> bool:
+        """Check that the match ending at position end is not part of a longer word"""
+        start = end - length + 1
+        if start > 0 and (text[start - 1].isalnum() or text[start - 1] == '_'):
+            return False
+        if end + 1 < len(text) and (text[end + 1].isalnum() or text[end + 1] == '_'):
+            return False
+        return True
+
+# Character n-gram size used for near-duplicate detection; short enough for chat messages
+SHINGLE_SIZE = 3
+
+# One-permutation MinHash: the low bits of a shingle hash pick the bin, the rest is the value
+SIGNATURE_BINS = 32
+_BIN_BITS = SIGNATURE_BINS.bit_length() - 1
+_VALUE_MASK = 0xFFFFFFFF
+_EMPTY_BIN = _VALUE_MASK + 1
+_DENSIFY_STEP = 0x9E3779B1
+
+def shingle_hashes(text: str, size: int = SHINGLE_SIZE) -> Set[int]:
+    """Hash every overlapping character n-gram of text"""
+    if len(text) <= size:
+        return {hash(text)} if text else set()
+    return {hash(text[i:i + size]) for i in range(len(text) - size + 1)}
+
+def minhash_signature(text: str) -> array:
+    """Fixed-size MinHash signature of text's shingles, computed in one pass
+    
+    Uses one-permutation hashing with rotation densification, so the fraction
+    of equal bins between two signatures estimates the Jaccard similarity of
+    their shingle sets.
+    """
+    bins = [_EMPTY_BIN] * SIGNATURE_BINS
+    for value in shingle_hashes(text):
+        index = value & (SIGNATURE_BINS - 1)
+        value = (value >> _BIN_BITS) & _VALUE_MASK
+        if value < bins[index]:
+            bins[index] = value
+    
+    if _EMPTY_BIN in bins and len(set(bins)) > 1:
+        # Short texts leave bins empty; borrow from the next filled bin so empty bins don't match by accident
+        filled = list(bins)
+        for index in range(SIGNATURE_BINS):
+            if filled[index] != _EMPTY_BIN:
+                continue
+            offset = 1
+            while bins[(index + offset) % SIGNATURE_BINS] == _EMPTY_BIN:
+                offset += 1
+            filled[index] = (bins[(index + offset) % SIGNATURE_BINS] + offset * _DENSIFY_STEP) & _VALUE_MASK
+        bins = filled
+    elif _EMPTY_BIN in bins:
+        bins = [0] * SIGNATURE_BINS
+    
+    return array('I', bins)
+
+def signature_similarity(first: array, second: array) -> float:
+    """Estimated Jaccard similarity of two MinHash signatures"""
+    return sum(1 for a, b in zip(first, second) if a == b) / SIGNATURE_BINS